@@ -0,0 +1,275 @@
+import json
+import queue
+import threading
+import time
+from metrics import get_registry
+
+_STOP = object()
+
+
+def format_location(location):
+    if location is None:
+        return "unknown"
+    lat, lon = location
+    return f"{abs(lat):.4f}°{'N' if lat >= 0 else 'S'}, {abs(lon):.4f}°{'E' if lon >= 0 else 'W'}"
+
+
+def format_history(record):
+    if record.prior_incidents is None:
+        return ""
+    if not record.prior_incidents:
+        return "   📁 FAA history: no prior incidents\n"
+    plural = "" if record.prior_incidents == 1 else "s"
+    return f"   📁 FAA history: {record.prior_incidents} prior incident{plural}, latest {record.last_incident}\n"
+
+
+def format_alert(record):
+    """Render an AlertRecord the way the console has always shown it"""
+    severity = f"{record.severity} ⬆️ ESCALATED" if record.escalated else record.severity
+    repeats = f" (+{record.suppressed} suppressed)" if record.suppressed else ""
+    if record.type == "cockpit":
+        return f"🛩️  COCKPIT {severity} [{record.time_str}]: {record.message}{repeats}"
+    if record.type == "ground":
+        return (f"🏢 GROUND {severity} [{record.time_str}]: Aircraft {record.registration}\n"
+                f"   Location: {format_location(record.location)}\n"
+                + format_history(record) +
+                f"   Issue: {record.message}{repeats}")
+    if record.rescue_bases:
+        name, distance = record.rescue_bases[0]
+        rescue = f"   🚁 Search & Rescue dispatched from {name} ({distance:.0f} nm)!\n"
+    else:
+        rescue = "   🚁 Search & Rescue teams dispatched!\n"
+    return (f"🚨 EMERGENCY CRASH ALERT [{record.time_str}]!\n"
+            f"   Aircraft: {record.registration}\n"
+            f"   Location: {format_location(record.location)}\n"
+            f"   Altitude: {record.altitude} ft\n"
+            f"   Speed: {record.speed} knots\n"
+            f"   G-Force: {record.g_force}\n"
+            + format_history(record) + rescue +
+            "   📞 Emergency contacts notified!")
+
+
+class ConsoleSink:
+    """Print each batch of alerts to stdout in one write"""
+    name = "console"
+
+    def deliver(self, records):
+        print("\n".join(format_alert(r) for r in records), flush=True)
+
+
+class FileSink:
+    """Append alerts to a JSON-lines file, one write per batch"""
+    name = "file"
+
+    def __init__(self, path):
+        self.path = path
+
+    def deliver(self, records):
+        lines = "".join(json.dumps(r.as_dict()) + "\n" for r in records)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+class WebhookSink:
+    """POST each batch of alerts as a JSON array to an HTTP endpoint"""
+    name = "webhook"
+
+    def __init__(self, url="http://127.0.0.1:8765/alerts", timeout=2.0):
+        self.url = url
+        self.timeout = timeout
+
+    def deliver(self, records):
+        import urllib.request
+        body = json.dumps([r.as_dict() for r in records]).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body,
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class WebhookStandIn:
+    """
+    Minimal local HTTP server standing in for a real alert webhook.
+    Counts the alerts it receives; use with WebhookSink(stand_in.url).
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        stand_in = self
+        self.received = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                stand_in.received += len(json.loads(self.rfile.read(length) or b"[]"))
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.url = f"http://{host}:{self.server.server_address[1]}/alerts"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class AlertDispatcher:
+    """
+    Bounded alert queue drained by background worker threads.
+
+    submit() never does I/O: it enqueues the record and returns. When the
+    queue is full the caller waits up to `block_timeout` seconds (backpressure)
+    and the record is dropped and counted if space does not free up in time.
+    Critical records wait as long as it takes. Workers deliver in batches of
+    up to `batch_size` to every sink; a failing sink is counted and does not
+    stop the others. Once a batch has been through every sink, each record's
+    hazard-to-alert latency is recorded in `registry`.
+    """
+
+    def __init__(self, sinks=None, maxsize=10000, workers=1, batch_size=100, block_timeout=0.01,
+                 registry=None):
+        self.sinks = list(sinks) if sinks is not None else [ConsoleSink()]
+        self.registry = registry if registry is not None else get_registry()
+        self.batch_size = batch_size
+        self.block_timeout = block_timeout
+        self._queue = queue.Queue(maxsize)
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.dropped = 0
+        self.delivered = {sink.name: 0 for sink in self.sinks}
+        self.errors = {sink.name: 0 for sink in self.sinks}
+        self.batches = 0
+        self.max_depth = 0
+        self._closed = False
+        self._workers = [threading.Thread(target=self._work, name=f"alert-dispatch-{i}", daemon=True)
+                         for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, record, critical=False):
+        """
+        Queue a record for delivery; return False if it had to be dropped,
+        because the queue was full or the dispatcher is closed.
+        """
+        if self._closed:
+            with self._lock:
+                self.dropped += 1
+            self.registry.inc("alerts_dropped")
+            return False
+        try:
+            if critical:
+                self._queue.put(record)
+            elif self.block_timeout:
+                self._queue.put(record, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            self.registry.inc("alerts_dropped")
+            return False
+        with self._lock:
+            self.submitted += 1
+            depth = self._queue.qsize()
+            if depth > self.max_depth:
+                self.max_depth = depth
+        return True
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._deliver(batch)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _deliver(self, batch):
+        for sink in self.sinks:
+            try:
+                sink.deliver(batch)
+            except Exception:
+                with self._lock:
+                    self.errors[sink.name] += 1
+            else:
+                with self._lock:
+                    self.delivered[sink.name] += len(batch)
+                self.registry.inc("alert_deliveries", len(batch), sink=sink.name)
+        with self._lock:
+            self.batches += 1
+        now = time.perf_counter_ns()
+        latency = self.registry.histogram("hazard_to_alert")
+        for record in batch:
+            if record.detected_ns is not None:
+                latency.record(now - record.detected_ns)
+
+    def flush(self):
+        """Block until every queued alert has been handed to the sinks"""
+        self._queue.join()
+
+    def close(self):
+        """Flush the queue and stop the workers"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._workers:
+            self._queue.put(_STOP)
+        for worker in self._workers:
+            worker.join()
+        # A submit racing with close can land behind the stop markers; deliver
+        # it here so flush() never waits on a queue nobody drains
+        leftover = []
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if leftover:
+            self._deliver(leftover)
+        for _ in leftover:
+            self._queue.task_done()
+
+    def metrics(self):
+        """Return queue depth and delivery counters"""
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_depth": self.max_depth,
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "batches": self.batches,
+                "delivered": dict(self.delivered),
+                "errors": dict(self.errors),
+            }
+
+
+if __name__ == "__main__":
+    from alert_store import AlertRecord
+
+    stand_in = WebhookStandIn()
+    dispatcher = AlertDispatcher([ConsoleSink(), WebhookSink(stand_in.url)], batch_size=50)
+    for i in range(3):
+        dispatcher.submit(AlertRecord("cockpit", "ADVISORY", "Turbulence detected", "N12345", time.time()))
+    dispatcher.close()
+    print("Webhook stand-in received:", stand_in.received, "alerts")
+    print("Dispatch metrics:", dispatcher.metrics())
+    stand_in.close()
@@ -0,0 +1,137 @@
+from bisect import bisect_left
+from collections import Counter, deque
+from datetime import datetime
+
+
+class AlertRecord:
+    """One alert, stored as a slotted record instead of a dict"""
+    __slots__ = ("seq", "type", "severity", "message", "registration", "timestamp",
+                 "location", "altitude", "speed", "g_force", "suppressed", "escalated",
+                 "rescue_bases", "prior_incidents", "last_incident", "detected_ns")
+
+    def __init__(self, type, severity, message, registration, timestamp,
+                 location=None, altitude=None, speed=None, g_force=None,
+                 suppressed=0, escalated=False, rescue_bases=None, prior_incidents=None,
+                 last_incident=None, detected_ns=None):
+        self.seq = -1  # assigned by AlertStore.add
+        self.type = type
+        self.severity = severity
+        self.message = message
+        self.registration = registration
+        self.timestamp = timestamp  # seconds since the epoch
+        self.location = location  # (latitude, longitude) of the aircraft, None if unknown
+        self.altitude = altitude
+        self.speed = speed
+        self.g_force = g_force
+        self.suppressed = suppressed  # duplicates held back since the previous alert of this kind
+        self.escalated = escalated
+        self.rescue_bases = rescue_bases  # [(name, distance_nm)] nearest first, for crashes
+        # FAA incident history of the aircraft; None when no incident index is loaded
+        self.prior_incidents = prior_incidents
+        self.last_incident = last_incident
+        # perf_counter_ns() when the hazard was detected, for hazard-to-alert latency
+        self.detected_ns = detected_ns
+
+    @property
+    def time_str(self):
+        return datetime.fromtimestamp(self.timestamp).strftime("%H:%M:%S")
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__ if name != "detected_ns"}
+
+    def __repr__(self):
+        return f"AlertRecord({self.seq}, {self.type}, {self.severity}, {self.registration}, {self.message!r})"
+
+
+class AlertStore:
+    """
+    Bounded, indexed alert history.
+
+    Keeps at most `capacity` records; the oldest are evicted first. Counters by
+    type, severity and registration cover every alert ever added and are kept
+    up to date on insert, so summaries never scan the history. Secondary
+    indexes answer "alerts for aircraft X" and "alerts since T" over the
+    retained records. Records must be added in timestamp order.
+    """
+
+    def __init__(self, capacity=10000):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.total = 0
+        self.evicted = 0
+        self.by_type = Counter()
+        self.by_severity = Counter()
+        self.by_registration = Counter()
+        self.suppressed = Counter()
+        # Retained records live in _records[_start:]; the dead prefix is
+        # trimmed in bulk so eviction stays amortized O(1)
+        self._records = []
+        self._times = []
+        self._start = 0
+        self._by_registration = {}
+
+    def __len__(self):
+        return len(self._records) - self._start
+
+    def __iter__(self):
+        return iter(self._records[self._start:])
+
+    def add(self, record):
+        """Insert a record, evicting the oldest one if the store is full"""
+        record.seq = self.total
+        self.total += 1
+        self.by_type[record.type] += 1
+        self.by_severity[record.severity] += 1
+        self.by_registration[record.registration] += 1
+        self._records.append(record)
+        self._times.append(record.timestamp)
+        per_aircraft = self._by_registration.get(record.registration)
+        if per_aircraft is None:
+            per_aircraft = self._by_registration[record.registration] = deque()
+        per_aircraft.append(record)
+        if len(self) > self.capacity:
+            self._evict_oldest()
+        return record
+
+    def count_suppressed(self, type):
+        """Count an alert that was suppressed or rate limited instead of stored"""
+        self.suppressed[type] += 1
+
+    def _evict_oldest(self):
+        oldest = self._records[self._start]
+        self._records[self._start] = None
+        self._start += 1
+        self.evicted += 1
+        per_aircraft = self._by_registration[oldest.registration]
+        per_aircraft.popleft()
+        if not per_aircraft:
+            del self._by_registration[oldest.registration]
+        if self._start >= self.capacity:
+            del self._records[:self._start]
+            del self._times[:self._start]
+            self._start = 0
+
+    def for_registration(self, registration):
+        """Return the retained alerts for one aircraft, oldest first"""
+        return list(self._by_registration.get(registration, ()))
+
+    def since(self, timestamp):
+        """Return the retained alerts with timestamp >= `timestamp`, oldest first"""
+        i = bisect_left(self._times, timestamp, lo=self._start)
+        return self._records[i:]
+
+    def latest(self, n):
+        """Return the n most recent alerts, oldest first"""
+        return self._records[max(self._start, len(self._records) - n):]
+
+    def summary(self):
+        """Return running counts without touching the stored records"""
+        return {
+            "total": self.total,
+            "retained": len(self),
+            "evicted": self.evicted,
+            "by_type": dict(self.by_type),
+            "by_severity": dict(self.by_severity),
+            "suppressed": dict(self.suppressed),
+        }
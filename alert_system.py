@@ -1,70 +1,227 @@
-import random
-from datetime import datetime
+import math
+import time
+from collections import deque
+from alert_dispatch import AlertDispatcher
+from alert_store import AlertStore, AlertRecord
+from alert_throttle import AlertThrottle, ESCALATE, RATE_LIMIT, SUPPRESS
+from hazard_rules import get_active_rules
+from metrics import get_registry
+from proximity import LATERAL_MINIMUM_NM, VERTICAL_MINIMUM_FT
+from spatial_index import GridIndex, aircraft_position, rescue_base_index
+
+# Located ground and emergency alerts stay searchable by position this long
+ACTIVE_ALERT_SECONDS = 1800.0
+RESCUE_BASES_PER_CRASH = 3
 
 class AlertSystem:
-    def __init__(self):
-        self.alert_history = []
+    def __init__(self, capacity=10000, dispatcher=None, throttle=None, registry=None,
+                 rescue_bases=None, alert_ttl=ACTIVE_ALERT_SECONDS, incidents=None):
+        # Bounded, indexed history; see alert_store.AlertStore
+        self.alert_history = AlertStore(capacity)
+        # Delivery (printing, files, webhooks) happens on background workers
+        self.dispatcher = dispatcher if dispatcher is not None else AlertDispatcher()
+        # Per (registration, hazard, sink) suppression and rate limiting
+        self.throttle = throttle if throttle is not None else AlertThrottle()
+        # Hazard and alert counters, exported by metrics.MetricsServer
+        self.registry = registry if registry is not None else get_registry()
+        # Rescue bases and recent located alerts, indexed by position
+        self.rescue_bases = rescue_bases if rescue_bases is not None else rescue_base_index()
+        self.active_alerts = GridIndex()
+        self.alert_ttl = alert_ttl
+        self._located = deque()
+        # Optional incident_index.IncidentIndex for FAA history on ground and crash alerts
+        self.incidents = incidents
+    
+    def _locate(self, record):
+        """Add a ground or emergency alert with a known position to the spatial index"""
+        if record.location is None:
+            return
+        self._expire(record.timestamp)
+        if len(self._located) >= self.alert_history.capacity:
+            self.active_alerts.remove(self._located.popleft())
+        self._located.append(record)
+        self.active_alerts.insert(record, *record.location)
+    
+    def _expire(self, now):
+        located = self._located
+        while located and located[0].timestamp < now - self.alert_ttl:
+            self.active_alerts.remove(located.popleft())
+    
+    def alerts_within(self, lat, lon, radius_nm):
+        """Return [(AlertRecord, distance_nm)] for active located alerts within radius_nm, nearest first"""
+        self._expire(time.time())
+        return self.active_alerts.within(lat, lon, radius_nm)
+    
+    def nearest_rescue_bases(self, lat, lon, n=RESCUE_BASES_PER_CRASH):
+        """Return [(base name, distance_nm)] for the n rescue bases nearest a position"""
+        return self.rescue_bases.nearest(lat, lon, n)
+    
+    def incident_history(self, registration):
+        """Return (prior incident count, latest incident text), or (None, None) without an index"""
+        if self.incidents is None:
+            return None, None
+        history = self.incidents.history(registration)
+        if history is None:
+            return 0, None
+        return history.count, history.latest
+    
+    def _admit(self, sink, registration, hazard, severity, margin, ceiling=None):
+        """Run an alert through the throttle; return (severity, suppressed, escalated) or None"""
+        decision, severity, suppressed = self.throttle.check((registration, hazard, sink), severity, margin,
+                                                             ceiling)
+        if decision in (SUPPRESS, RATE_LIMIT):
+            self.alert_history.count_suppressed(sink)
+            self.registry.inc("alerts_suppressed", sink=sink)
+            return None
+        self.registry.inc("alerts", sink=sink)
+        return severity, suppressed, decision == ESCALATE
     
-    def send_cockpit_warning(self, hazard_msg, severity="WARNING"):
+    def send_cockpit_warning(self, hazard_msg, severity="WARNING", registration=None,
+                             hazard=None, margin=None, detected_ns=None, ceiling=None):
         """Simulate cockpit warning display"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"🛩️  COCKPIT {severity} [{timestamp}]: {hazard_msg}")
-        self.alert_history.append({
-            "type": "cockpit",
-            "severity": severity,
-            "message": hazard_msg,
-            "timestamp": timestamp
-        })
-    
-    def send_ground_alert(self, data, hazard_msg, severity="ALERT"):
+        detected_ns = detected_ns or time.perf_counter_ns()
+        admitted = self._admit("cockpit", registration, hazard or hazard_msg, severity, margin, ceiling)
+        if admitted is None:
+            return None
+        severity, suppressed, escalated = admitted
+        record = self.alert_history.add(AlertRecord(
+            "cockpit", severity, hazard_msg, registration, time.time(),
+            suppressed=suppressed, escalated=escalated, detected_ns=detected_ns))
+        self.dispatcher.submit(record)
+        return record
+    
+    def send_ground_alert(self, data, hazard_msg, severity="ALERT", hazard=None, margin=None,
+                          detected_ns=None, ceiling=None):
         """Simulate ground control alert"""
-        lat = random.uniform(0, 90)
-        lon = random.uniform(0, 180)
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"🏢 GROUND {severity} [{timestamp}]: Aircraft {data.get('registration', 'N12345')}")
-        print(f"   Location: {lat:.4f}°N, {lon:.4f}°E")
-        print(f"   Issue: {hazard_msg}")
-        self.alert_history.append({
-            "type": "ground",
-            "severity": severity,
-            "message": hazard_msg,
-            "location": (lat, lon),
-            "timestamp": timestamp
-        })
-    
-    def send_emergency_alert(self, data):
+        detected_ns = detected_ns or time.perf_counter_ns()
+        registration = data.get('registration', 'N12345')
+        admitted = self._admit("ground", registration, hazard or hazard_msg, severity, margin, ceiling)
+        if admitted is None:
+            return None
+        severity, suppressed, escalated = admitted
+        prior_incidents, last_incident = self.incident_history(registration)
+        record = self.alert_history.add(AlertRecord(
+            "ground", severity, hazard_msg, registration, time.time(),
+            location=aircraft_position(data), suppressed=suppressed, escalated=escalated,
+            prior_incidents=prior_incidents, last_incident=last_incident, detected_ns=detected_ns))
+        self._locate(record)
+        self.dispatcher.submit(record)
+        return record
+    
+    def send_emergency_alert(self, data, detected_ns=None):
         """Simulate emergency crash alert"""
-        lat = random.uniform(0, 90)
-        lon = random.uniform(0, 180)
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"🚨 EMERGENCY CRASH ALERT [{timestamp}]!")
-        print(f"   Aircraft: {data.get('registration', 'N12345')}")
-        print(f"   Location: {lat:.4f}°N, {lon:.4f}°E")
-        print(f"   Altitude: {data['altitude']} ft")
-        print(f"   Speed: {data['speed']} knots")
-        print(f"   G-Force: {data['g_force']}")
-        print("   🚁 Search & Rescue teams dispatched!")
-        print("   📞 Emergency contacts notified!")
-        
-        self.alert_history.append({
-            "type": "emergency",
-            "severity": "CRITICAL",
-            "message": "CRASH DETECTED",
-            "location": (lat, lon),
-            "data": data,
-            "timestamp": timestamp
-        })
+        detected_ns = detected_ns or time.perf_counter_ns()
+        self.registry.inc("alerts", sink="emergency")
+        location = aircraft_position(data)
+        rescue_bases = None
+        if location is not None:
+            rescue_bases = [(name, round(distance, 1))
+                            for name, distance in self.nearest_rescue_bases(*location)]
+        registration = data.get('registration', 'N12345')
+        prior_incidents, last_incident = self.incident_history(registration)
+        # Keep only the readings the alert needs, not a copy of the telemetry dict
+        record = self.alert_history.add(AlertRecord(
+            "emergency", "CRITICAL", "CRASH DETECTED", registration,
+            time.time(), location=location, altitude=data['altitude'], speed=data['speed'],
+            g_force=data['g_force'], rescue_bases=rescue_bases, prior_incidents=prior_incidents,
+            last_incident=last_incident, detected_ns=detected_ns))
+        self._locate(record)
+        # Crash alerts are never suppressed or dropped, even when the queue is full
+        self.dispatcher.submit(record, critical=True)
+        return record
+    
+    def accept_alert(self, record):
+        """
+        Store and deliver an alert that was raised and throttled elsewhere,
+        e.g. by a sharded_monitor worker. It is stamped on arrival so the
+        history stays in time order; crash alerts keep their priority.
+        """
+        record.timestamp = time.time()
+        self.alert_history.add(record)
+        self._locate(record)
+        self.dispatcher.submit(record, critical=record.type == "emergency")
+        return record
+    
+    def send_separation_alert(self, data, intruder, distance_nm, vertical_ft, closing_kt=math.nan,
+                              minima=(LATERAL_MINIMUM_NM, VERTICAL_MINIMUM_FT), detected_ns=None):
+        """
+        Alert the cockpit and ground control that `intruder` is inside the
+        separation minima. Converging (or not yet known) traffic is a
+        WARNING/ALERT, diverging traffic a CAUTION/WARNING. Each intruder is
+        throttled as its own hazard and escalates as the aircraft close in.
+        """
+        detected_ns = detected_ns or time.perf_counter_ns()
+        self.registry.inc("hazards", type="loss_of_separation")
+        lateral, vertical = minima
+        # How far inside the minima, by the looser of the two
+        margin = min((lateral - distance_nm) / lateral, (vertical - vertical_ft) / vertical)
+        if math.isnan(closing_kt):
+            closing = ""
+        else:
+            closing = f", {'closing' if closing_kt > 0 else 'opening'} at {abs(closing_kt):.0f} kt"
+        message = f"Loss of separation! Traffic {intruder} {distance_nm:.1f} nm, {vertical_ft:.0f} ft{closing}."
+        cockpit, ground = ("CAUTION", "WARNING") if closing_kt <= 0 else ("WARNING", "ALERT")
+        hazard = f"separation:{intruder}"
+        self.send_cockpit_warning(message, cockpit, data.get('registration'), hazard=hazard,
+                                  margin=margin, detected_ns=detected_ns)
+        self.send_ground_alert(data, message, ground, hazard=hazard, margin=margin,
+                               detected_ns=detected_ns)
+    
+    def flush(self):
+        """Wait until every queued alert has been delivered"""
+        self.dispatcher.flush()
+    
+    def close(self):
+        """Deliver outstanding alerts and stop the dispatch workers"""
+        self.dispatcher.close()
+    
+    def raise_hazard_alerts(self, data, hazards, rules=None, detected_ns=None):
+        """
+        Send the cockpit and ground alerts for each detected hazard, using the
+        severities declared by the rule that produced it. A hazard that merely
+        persists escalates no further than the rule's ground severity (its
+        cockpit severity when it has none). `detected_ns` is the
+        perf_counter_ns() reading taken when the sample was detected; it
+        defaults to now.
+        """
+        rules = rules if rules is not None else get_active_rules()
+        detected_ns = detected_ns or time.perf_counter_ns()
+        for hazard in hazards:
+            rule = rules.by_message.get(hazard)
+            if rule is None:
+                self.registry.inc("hazards", type="unknown")
+                self.send_cockpit_warning(hazard, "WARNING", data.get('registration'),
+                                          detected_ns=detected_ns)
+                continue
+            self.registry.inc("hazards", type=rule["name"])
+            margin = rules.margin(rule, data)
+            ceiling = rule.get("ground_severity") or rule["severity"]
+            self.send_cockpit_warning(hazard, rule["severity"], data.get('registration'),
+                                      hazard=rule["name"], margin=margin, detected_ns=detected_ns,
+                                      ceiling=ceiling)
+            if rule.get("ground_severity"):
+                self.send_ground_alert(data, hazard, rule["ground_severity"],
+                                       hazard=rule["name"], margin=margin, detected_ns=detected_ns,
+                                       ceiling=ceiling)
     
     def get_alert_summary(self):
         """Return summary of all alerts"""
+        self.flush()
+        counts = self.alert_history.by_type
+        dispatch = self.dispatcher.metrics()
         print(f"\n📊 Alert Summary:")
-        print(f"   Total alerts: {len(self.alert_history)}")
-        cockpit_alerts = len([a for a in self.alert_history if a["type"] == "cockpit"])
-        ground_alerts = len([a for a in self.alert_history if a["type"] == "ground"])
-        emergency_alerts = len([a for a in self.alert_history if a["type"] == "emergency"])
-        print(f"   Cockpit warnings: {cockpit_alerts}")
-        print(f"   Ground alerts: {ground_alerts}")
-        print(f"   Emergency alerts: {emergency_alerts}")
+        print(f"   Total alerts: {self.alert_history.total}")
+        print(f"   Cockpit warnings: {counts['cockpit']}")
+        print(f"   Ground alerts: {counts['ground']}")
+        print(f"   Emergency alerts: {counts['emergency']}")
+        print(f"   Suppressed duplicates: {sum(self.alert_history.suppressed.values())} "
+              f"({self.throttle.escalated} escalations)")
+        print(f"   Dispatch: {dispatch['batches']} batches, peak queue depth {dispatch['max_depth']}, "
+              f"{dispatch['dropped']} dropped")
+        summary = self.alert_history.summary()
+        summary["dispatch"] = dispatch
+        summary["throttle"] = self.throttle.metrics()
+        return summary
 
 if __name__ == "__main__":
     # Test the alert system
@@ -72,12 +229,18 @@ if __name__ == "__main__":
     
     # Simulate some alerts
     alert_sys.send_cockpit_warning("Turbulence detected", "WARNING")
-    alert_sys.send_ground_alert({"registration": "N12345"}, "High G-force detected", "ALERT")
+    alert_sys.send_ground_alert({"registration": "N12345", "latitude": 30.41, "longitude": -88.35},
+                                "High G-force detected", "ALERT")
     alert_sys.send_emergency_alert({
         "registration": "N12345",
         "altitude": 500,
         "speed": 400,
-        "g_force": 6.0
+        "g_force": 6.0,
+        "latitude": 30.38,
+        "longitude": -88.41
     })
     
-    alert_sys.get_alert_summary() 
\ No newline at end of file
+    nearby = alert_sys.alerts_within(30.4, -88.4, 25)
+    print(f"📍 {len(nearby)} active alerts within 25 nm of 30.40°N, 88.40°W")
+    alert_sys.get_alert_summary()
+    alert_sys.close() 
\ No newline at end of file
@@ -0,0 +1,158 @@
+import time
+
+# Severities in increasing order of urgency, across cockpit and ground alerts
+SEVERITY_ORDER = ["ADVISORY", "CAUTION", "WARNING", "ALERT", "CRITICAL"]
+SEVERITY_RANK = {severity: rank for rank, severity in enumerate(SEVERITY_ORDER)}
+
+# Decisions returned by AlertThrottle.check
+SEND = "send"
+ESCALATE = "escalate"
+SUPPRESS = "suppress"
+RATE_LIMIT = "rate_limit"
+
+
+class _KeyState:
+    """Throttle state for one (registration, hazard, sink) key"""
+    __slots__ = ("tokens", "refilled", "episode_start", "last_seen", "last_sent",
+                 "sent_severity", "sent_margin", "suppressed")
+
+    def __init__(self, now, burst):
+        self.tokens = float(burst)
+        self.refilled = now
+        self.episode_start = now
+        self.last_seen = now
+        self.last_sent = None
+        self.sent_severity = None
+        self.sent_margin = None
+        self.suppressed = 0
+
+
+class AlertThrottle:
+    """
+    Suppression windows, token-bucket rate limiting and escalation per
+    (registration, hazard type, sink) key.
+
+    The first alert of an episode goes out; repeats within
+    `suppression_window` seconds of the last one sent are suppressed. An
+    episode ends once the hazard has not been seen for a full window. Every
+    alert that would go out also needs a token from the key's bucket
+    (`burst` tokens, refilled at `rate` per second). A suppressed hazard is
+    escalated - sent anyway, bypassing the bucket - when its severity rises,
+    when its margin past the threshold grows by `worsen_step`, or when it has
+    persisted for `escalate_after` seconds. The first two go out at the
+    severity they arrive with. Only persistence raises it, to one level above
+    the last severity sent, never above `max_escalation` or the ceiling the
+    caller gives for that hazard, so a long patch of turbulence is repeated
+    rather than promoted to CRITICAL.
+    """
+
+    def __init__(self, suppression_window=30.0, rate=0.1, burst=3, escalate_after=60.0,
+                 worsen_step=0.2, clock=time.monotonic, max_keys=100000, max_escalation="ALERT"):
+        self.suppression_window = suppression_window
+        self.rate = rate
+        self.burst = burst
+        self.escalate_after = escalate_after
+        self.worsen_step = worsen_step
+        self.max_escalation = max_escalation
+        self.clock = clock
+        self.max_keys = max_keys
+        self._states = {}
+        self.sent = 0
+        self.escalated = 0
+        self.suppressed = 0
+        self.rate_limited = 0
+
+    def check(self, key, severity, margin=None, ceiling=None):
+        """
+        Decide what to do with one alert. Returns (decision, severity,
+        suppressed_since_last_sent); severity is raised only when the hazard
+        has persisted, up to `ceiling` and max_escalation.
+        """
+        now = self.clock()
+        state = self._states.get(key)
+        if state is None:
+            if len(self._states) >= self.max_keys:
+                self._prune(now)
+            state = self._states[key] = _KeyState(now, self.burst)
+        elif now - state.last_seen > self.suppression_window:
+            # The hazard cleared for a full window: start a new episode but keep
+            # the bucket, so a flapping hazard is still rate limited
+            state.episode_start = now
+            state.last_sent = None
+            state.sent_severity = None
+            state.sent_margin = None
+        state.last_seen = now
+
+        # Refill the bucket for the time since the last check
+        state.tokens = min(self.burst, state.tokens + (now - state.refilled) * self.rate)
+        state.refilled = now
+
+        decision = SEND
+        if state.last_sent is not None:
+            rank = SEVERITY_RANK.get(severity, 0)
+            worse = (rank > SEVERITY_RANK.get(state.sent_severity, 0)
+                     or (margin is not None and state.sent_margin is not None
+                         and margin >= state.sent_margin + self.worsen_step))
+            persisted = now - state.episode_start >= self.escalate_after
+            if worse or persisted:
+                decision = ESCALATE
+                if persisted:
+                    top = SEVERITY_RANK.get(self.max_escalation, len(SEVERITY_ORDER) - 1)
+                    if ceiling is not None:
+                        top = min(top, SEVERITY_RANK.get(ceiling, top))
+                    current = max(rank, SEVERITY_RANK.get(state.sent_severity, 0))
+                    severity = SEVERITY_ORDER[max(min(current + 1, top), rank)]
+            elif now - state.last_sent < self.suppression_window:
+                decision = SUPPRESS
+
+        if decision == SEND and state.tokens < 1.0:
+            decision = RATE_LIMIT
+        if decision in (SUPPRESS, RATE_LIMIT):
+            state.suppressed += 1
+            if decision == SUPPRESS:
+                self.suppressed += 1
+            else:
+                self.rate_limited += 1
+            return decision, severity, state.suppressed
+
+        # Escalations bypass the bucket but still drain it
+        state.tokens = max(0.0, state.tokens - 1.0)
+        if decision == ESCALATE:
+            self.escalated += 1
+            state.episode_start = now
+        self.sent += 1
+        suppressed, state.suppressed = state.suppressed, 0
+        state.last_sent = now
+        state.sent_severity = severity
+        state.sent_margin = margin
+        return decision, severity, suppressed
+
+    def _prune(self, now):
+        # Drop keys whose episode is over and whose bucket has refilled, since a
+        # fresh state would behave identically
+        idle = max(self.suppression_window, self.burst / self.rate if self.rate else float("inf"))
+        stale = [key for key, state in self._states.items() if now - state.last_seen > idle]
+        for key in stale:
+            del self._states[key]
+
+    def metrics(self):
+        return {
+            "tracked_keys": len(self._states),
+            "sent": self.sent,
+            "escalated": self.escalated,
+            "suppressed": self.suppressed,
+            "rate_limited": self.rate_limited,
+        }
+
+
+if __name__ == "__main__":
+    # A plane sitting in turbulence, sampled every 0.2s for two minutes
+    clock_time = [0.0]
+    throttle = AlertThrottle(clock=lambda: clock_time[0])
+    decisions = {}
+    for step in range(600):
+        clock_time[0] = step * 0.2
+        decision, severity, _ = throttle.check(("N12345", "turbulence", "cockpit"), "ADVISORY")
+        decisions[decision] = decisions.get(decision, 0) + 1
+    print("Decisions:", decisions)
+    print("Metrics:", throttle.metrics())
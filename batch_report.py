@@ -0,0 +1,218 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+from hazard_rules import compile_rules, rules_from_config
+from telemetry_replay import READERS, read_recording, recording_format
+from visualization import DEFAULT_DPI, render_flight
+
+REPORT_FORMATS = ("png", "pdf", "svg")
+INDEX_NAME = "report_index.json"
+# A recording whose worker dies this many times when run alone is given up on
+MAX_WORKER_CRASHES = 2
+
+
+def find_recordings(directory):
+    """Return the recordings in a directory that replay can read, sorted by name"""
+    paths = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path):
+            continue
+        try:
+            recording_format(path)
+        except ValueError:
+            continue
+        paths.append(path)
+    return paths
+
+
+def load_flight(path):
+    """Read a whole recording into one dict of columns"""
+    chunks = list(read_recording(path))
+    if not chunks:
+        return None
+    return {name: np.concatenate([c[name] for c in chunks]) for name in chunks[0]}
+
+
+def _safe_name(text):
+    """
+    Percent-encode everything but letters, digits and "_.-~". Unlike
+    substituting a placeholder this is reversible, so distinct recordings
+    and registrations never share an output file.
+    """
+    return urllib.parse.quote(str(text), safe="")
+
+
+def _write_hazard_table(path, columns, flagged, masks, crashes, rules):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["step", "timestamp", "registration", "altitude", "speed", "g_force",
+                         "turbulence", "hazards", "crash"])
+        for i in flagged:
+            writer.writerow([int(i), f"{columns['timestamp'][i]:.3f}", columns["registration"][i],
+                             columns["altitude"][i], columns["speed"][i], columns["g_force"][i],
+                             bool(columns["turbulence"][i]), "; ".join(rules.messages_for(masks[i])),
+                             bool(crashes[i])])
+
+
+def render_report(path, out_dir, format="png", dpi=DEFAULT_DPI, rules_config=None):
+    """
+    Render the chart and hazard table for every aircraft in one recording.
+
+    Runs in a worker process; never raises. Returns a summary dict with the
+    status, output files and hazard counts, or the error that stopped it.
+    Outputs are named after the recording file, extension included so that
+    f0.csv and f0.jsonl do not collide (plus "+" and the registration when
+    the recording holds several aircraft; "+" is always escaped inside
+    either part). Names are deterministic, so reruns overwrite the same
+    files.
+    """
+    stem = _safe_name(os.path.basename(path))
+    result = {"recording": path, "status": "ok", "outputs": [], "samples": 0, "hazards": 0,
+              "crashes": 0, "error": None}
+    try:
+        start = time.perf_counter()
+        rules = rules_from_config(rules_config) if rules_config else compile_rules()
+        columns = load_flight(path)
+        if columns is None:
+            result["status"] = "empty"
+            return result
+        registrations = np.asarray(columns["registration"]).astype(str)
+        # Group rows by aircraft in one sort rather than a scan per aircraft
+        aircraft, codes = np.unique(registrations, return_inverse=True)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.cumsum(np.bincount(codes, minlength=len(aircraft)))[:-1]
+        for registration, rows in zip(aircraft, np.split(order, bounds)):
+            flight = {name: np.asarray(col)[rows] for name, col in columns.items()}
+            masks, crashes = rules.batch(flight)
+            flagged = np.flatnonzero((masks != 0) | crashes)
+            hazard_rows = np.flatnonzero(masks)
+            name = stem if len(aircraft) == 1 else f"{stem}+{_safe_name(registration)}"
+            chart = os.path.join(out_dir, f"{name}.{format}")
+            table = os.path.join(out_dir, f"{name}_hazards.csv")
+            render_flight(flight, hazard_rows, ['; '.join(rules.messages_for(masks[i])) for i in hazard_rows[:20]],
+                          path=chart, dpi=dpi, format=format)
+            _write_hazard_table(table, flight, flagged, masks, crashes, rules)
+            result["outputs"] += [chart, table]
+            result["samples"] += len(rows)
+            result["hazards"] += len(hazard_rows)
+            result["crashes"] += int(crashes.sum())
+        result["seconds"] = time.perf_counter() - start
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def _print_result(result):
+    icon = "✅" if result["status"] == "ok" else "❌" if result["status"] == "failed" else "⚪"
+    detail = result["error"] or f"{result.get('hazards', 0)} hazards"
+    print(f"{icon} {os.path.basename(result['recording'])}: {detail}")
+
+
+def _run_pool(paths, workers, args, results, verbose):
+    """
+    Render `paths` on a fresh pool of `workers` processes, storing results.
+    Returns the paths left unfinished because a worker died and broke the
+    pool, in submission order.
+    """
+    lost = set()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(render_report, path, *args): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                lost.add(path)
+                continue
+            except Exception as e:
+                result = {"recording": path, "status": "failed", "outputs": [],
+                          "error": f"{type(e).__name__}: {e}"}
+            results[path] = result
+            if verbose:
+                _print_result(result)
+    return [path for path in paths if path in lost]
+
+
+def build_reports(directory, out_dir, format="png", dpi=DEFAULT_DPI, workers=None, rules_config=None,
+                  verbose=True):
+    """
+    Render reports for every recording in `directory` on a process pool.
+    One recording failing, or its worker dying, is recorded in the index and
+    does not stop the others. Returns the per-recording results in name order
+    and writes them to report_index.json in `out_dir`.
+
+    A dying worker (os._exit, OOM kill) breaks the whole pool, so the
+    unfinished recordings are resubmitted to a fresh one. Tasks start in
+    submission order, so only the first few unfinished ones can have been
+    running; those are rerun one per process to find the culprit, which
+    fails after MAX_WORKER_CRASHES crashes.
+    """
+    if format not in REPORT_FORMATS:
+        raise ValueError(f"Unsupported report format {format!r}")
+    os.makedirs(out_dir, exist_ok=True)
+    paths = find_recordings(directory)
+    workers = workers or os.cpu_count() or 1
+    args = (out_dir, format, dpi, rules_config)
+    results = {}
+    pending = paths
+    while pending:
+        lost = _run_pool(pending, workers, args, results, verbose)
+        # Workers take tasks in order, so the running ones lead the unfinished ones
+        suspects, pending = lost[:workers], lost[workers:]
+        for path in suspects:
+            for _ in range(MAX_WORKER_CRASHES):
+                if not _run_pool([path], 1, args, results, verbose):
+                    break
+            else:
+                results[path] = {"recording": path, "status": "failed", "outputs": [],
+                                 "error": f"worker crashed {MAX_WORKER_CRASHES} times"}
+                if verbose:
+                    _print_result(results[path])
+    ordered = [results[path] for path in paths]
+    with open(os.path.join(out_dir, INDEX_NAME), "w") as f:
+        json.dump(ordered, f, indent=2)
+    return ordered
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Render per-flight charts and hazard tables in parallel")
+    parser.add_argument("recordings", help=f"directory of recorded flights ({', '.join(sorted(READERS))})")
+    parser.add_argument("--out", default="reports", help="output directory")
+    parser.add_argument("--format", default="png", choices=REPORT_FORMATS)
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--rules", default=None, help="JSON threshold config (same keys as the dashboard)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rules_config = None
+    if args.rules:
+        with open(args.rules) as f:
+            rules_config = json.load(f)
+    print("📑 Flight Batch Reports")
+    print("=" * 60)
+    start = time.perf_counter()
+    results = build_reports(args.recordings, args.out, args.format, args.dpi, args.workers, rules_config)
+    failed = sum(r["status"] == "failed" for r in results)
+    print("-" * 60)
+    print(f"Rendered {len(results) - failed}/{len(results)} recordings to {args.out} "
+          f"in {time.perf_counter() - start:.1f}s")
+    if failed:
+        print(f"❌ {failed} recording(s) failed; see {os.path.join(args.out, INDEX_NAME)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
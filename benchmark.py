@@ -0,0 +1,377 @@
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from flight_sim import generate_flight_data, generate_fleet_trajectories, fleet_snapshot
+from hazard_detection import detect_hazards, check_crash, detect_hazards_batch, hazard_messages
+from temporal_detection import FleetDetector
+from spatial_index import GridIndex
+from proximity import find_conflicts
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000, 10000000]
+DEFAULT_OUTPUT = "benchmark_results.json"
+DEFAULT_BASELINE = "benchmark_baseline.json"
+# A benchmark counts as regressed when it is this much slower than the baseline
+DEFAULT_THRESHOLD = 0.2
+# Scalar benchmarks cycle through this many distinct samples
+POOL_SIZE = 10000
+STEPS_PER_AIRCRAFT = 1000
+# Modules a restarted monitor imports before it can detect anything; none of
+# them may pull in the plotting, data frame or web stacks
+STARTUP_MODULES = ["main", "fleet_monitor", "telemetry_replay", "hazard_detection", "alert_system"]
+HEAVY_MODULES = ["matplotlib", "pandas", "plotly", "streamlit"]
+
+
+def sample_columns(n, seed):
+    """Return n seeded telemetry samples as columns, drawn from a simulated fleet"""
+    n_aircraft = max(1, math.ceil(n / STEPS_PER_AIRCRAFT))
+    fleet = generate_fleet_trajectories(n_aircraft, min(n, STEPS_PER_AIRCRAFT), seed=seed)
+    columns = {name: fleet[name].ravel()[:n] for name in ("altitude", "speed", "g_force", "turbulence")}
+    columns["registration"] = np.repeat(fleet["registration"], fleet["altitude"].shape[1])[:n]
+    return columns
+
+
+def sample_pool(seed, size=POOL_SIZE):
+    """Return `size` seeded telemetry dicts, the input of the scalar benchmarks"""
+    columns = sample_columns(size, seed)
+    return [{
+        "registration": str(columns["registration"][i]),
+        "altitude": int(columns["altitude"][i]),
+        "speed": int(columns["speed"][i]),
+        "g_force": float(columns["g_force"][i]),
+        "turbulence": bool(columns["turbulence"][i]),
+    } for i in range(len(columns["altitude"]))]
+
+
+def _quiet_alert_system():
+    # No sinks: measures the producer path (throttle, store, queue), not printing
+    from alert_dispatch import AlertDispatcher
+    from alert_system import AlertSystem
+    alert_sys = AlertSystem(dispatcher=AlertDispatcher(sinks=[]))
+    return alert_sys, alert_sys.close
+
+
+# Each setup(n, seed) prepares inputs outside the timed region and returns the
+# function to time, optionally with a cleanup function.
+
+def bench_generate_flight_data(n, seed):
+    random.seed(seed)
+    def run():
+        for _ in range(n):
+            generate_flight_data()
+    return run
+
+
+def bench_generate_fleet(n, seed):
+    n_aircraft = max(1, math.ceil(n / STEPS_PER_AIRCRAFT))
+    return lambda: generate_fleet_trajectories(n_aircraft, min(n, STEPS_PER_AIRCRAFT), seed=seed)
+
+
+def bench_fleet_detector(n, seed):
+    n_aircraft = max(1, math.ceil(n / STEPS_PER_AIRCRAFT))
+    fleet = generate_fleet_trajectories(n_aircraft, min(n, STEPS_PER_AIRCRAFT), seed=seed)
+    snapshots = [fleet_snapshot(fleet, t) for t in range(fleet["altitude"].shape[1])]
+    def run():
+        detector = FleetDetector(n_aircraft)
+        for snapshot in snapshots:
+            detector.update(snapshot)
+    return run
+
+
+def bench_spatial_within(n, seed):
+    rng = random.Random(seed)
+    index = GridIndex()
+    for i in range(POOL_SIZE):
+        index.insert(i, rng.uniform(25.0, 49.0), rng.uniform(-124.0, -67.0))
+    queries = [(rng.uniform(25.0, 49.0), rng.uniform(-124.0, -67.0)) for _ in range(POOL_SIZE)]
+    def run():
+        for lat, lon in itertools.islice(itertools.cycle(queries), n):
+            index.within(lat, lon, 50)
+    return run
+
+
+def bench_find_conflicts(n, seed):
+    # One fleet-wide check of n aircraft spread over the simulated region
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(25.0, 49.0, n)
+    lon = rng.uniform(-124.0, -67.0, n)
+    alt = rng.uniform(0.0, 40000.0, n)
+    return lambda: find_conflicts(lat, lon, alt)
+
+
+def _scalar(fn):
+    def setup(n, seed):
+        pool = sample_pool(seed)
+        def run():
+            for data in itertools.islice(itertools.cycle(pool), n):
+                fn(data)
+        return run
+    return setup
+
+
+def bench_detect_batch(n, seed):
+    columns = sample_columns(n, seed)
+    return lambda: detect_hazards_batch(columns)
+
+
+def _alert_method(call):
+    def setup(n, seed):
+        pool = sample_pool(seed)
+        alert_sys, cleanup = _quiet_alert_system()
+        def run():
+            for data in itertools.islice(itertools.cycle(pool), n):
+                call(alert_sys, data)
+        return run, cleanup
+    return setup
+
+
+def bench_raise_hazard_alerts(n, seed):
+    pool = [(data, detect_hazards(data)) for data in sample_pool(seed)]
+    pool = [item for item in pool if item[1]]
+    alert_sys, cleanup = _quiet_alert_system()
+    def run():
+        for data, hazards in itertools.islice(itertools.cycle(pool), n):
+            alert_sys.raise_hazard_alerts(data, hazards)
+    return run, cleanup
+
+
+def bench_plot_flight(n, seed):
+    import pandas as pd
+    from visualization import plot_flight
+    columns = sample_columns(n, seed)
+    frame = pd.DataFrame({name: columns[name] for name in ("altitude", "speed", "g_force")})
+    masks, _ = detect_hazards_batch(columns)
+    hazard_indices = np.flatnonzero(masks)[:20]
+    hazard_msgs = ['; '.join(hazard_messages(masks[i])) for i in hazard_indices]
+    tmp = tempfile.TemporaryDirectory()
+    path = os.path.join(tmp.name, "flight.png")
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            plot_flight(frame, hazard_indices, hazard_msgs, path=path)
+    return run, tmp.cleanup
+
+
+def bench_flight_chart(n, seed):
+    from dashboard_charts import FlightChart
+    from telemetry_buffer import TelemetryBuffer
+    columns = sample_columns(n, seed)
+    buffer = TelemetryBuffer(capacity=n)
+    buffer.extend(columns)
+    masks, _ = detect_hazards_batch(columns)
+    hazards = [{'time': int(i)} for i in np.flatnonzero(masks)]
+    chart = FlightChart(window=n)
+    def run():
+        # Building the update plus the JSON payload the browser receives
+        chart.reset()
+        chart.update(buffer, hazards).to_json()
+    return run
+
+
+# (name, setup, largest size worth running). Per-sample Python loops stop at
+# 1e6 samples; vectorized paths go to 1e7.
+BENCHMARKS = [
+    ("generate_flight_data", bench_generate_flight_data, 1000000),
+    ("generate_fleet_trajectories", bench_generate_fleet, 10000000),
+    ("detect_hazards", _scalar(detect_hazards), 1000000),
+    ("check_crash", _scalar(check_crash), 1000000),
+    ("detect_hazards_batch", bench_detect_batch, 10000000),
+    ("FleetDetector.update", bench_fleet_detector, 10000000),
+    ("GridIndex.within", bench_spatial_within, 100000),
+    ("find_conflicts", bench_find_conflicts, 1000000),
+    ("AlertSystem.send_cockpit_warning",
+     _alert_method(lambda a, d: a.send_cockpit_warning("High G-Force!", "WARNING", d["registration"])),
+     1000000),
+    ("AlertSystem.send_ground_alert",
+     _alert_method(lambda a, d: a.send_ground_alert(d, "High G-Force!", "ALERT")), 1000000),
+    ("AlertSystem.send_emergency_alert",
+     _alert_method(lambda a, d: a.send_emergency_alert(d)), 1000000),
+    ("AlertSystem.raise_hazard_alerts", bench_raise_hazard_alerts, 1000000),
+    ("plot_flight", bench_plot_flight, 10000000),
+    ("FlightChart.update", bench_flight_chart, 1000000),
+]
+
+
+def time_benchmark(setup, n, seed, repeat):
+    """Return the timings of `repeat` runs, each with freshly prepared inputs"""
+    timings = []
+    for _ in range(repeat):
+        prepared = setup(n, seed)
+        run, cleanup = prepared if isinstance(prepared, tuple) else (prepared, None)
+        try:
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        finally:
+            if cleanup is not None:
+                cleanup()
+    return timings
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, seed=42, repeat=3, only=None, max_size=None, verbose=True):
+    """Run every selected benchmark at every size it supports and return the results"""
+    results = []
+    for name, setup, limit in BENCHMARKS:
+        if only and name not in only:
+            continue
+        for n in sizes:
+            if n > limit or (max_size and n > max_size):
+                continue
+            timings = time_benchmark(setup, n, seed, repeat)
+            best = min(timings)
+            result = {
+                "name": name,
+                "size": n,
+                "seconds": best,
+                "median_seconds": float(np.median(timings)),
+                "ns_per_sample": best / n * 1e9,
+                "samples_per_sec": n / best if best else float("inf"),
+            }
+            results.append(result)
+            if verbose:
+                print(f"⏱️  {name:<34} n={n:<9,} {best * 1000:10.2f} ms  "
+                      f"{result['ns_per_sample']:10.1f} ns/sample")
+    return results
+
+
+def measure_startup(module, repeat=5):
+    """
+    Time a fresh interpreter importing `module`, as a watchdog restart would,
+    and report which heavy modules the import loaded.
+    """
+    code = (f"import json, sys; import {module}; "
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))")
+    timings, heavy = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        timings.append(time.perf_counter() - start)
+        heavy = json.loads(out.strip().splitlines()[-1])
+    return {
+        "name": f"import {module}",
+        "size": 1,
+        "seconds": min(timings),
+        "median_seconds": float(np.median(timings)),
+        "heavy_imports": heavy,
+    }
+
+
+def run_startup_checks(repeat=5, verbose=True):
+    """Measure startup of every entry point; return (results, modules with heavy imports)"""
+    results, offenders = [], []
+    for module in STARTUP_MODULES:
+        result = measure_startup(module, repeat)
+        results.append(result)
+        if result["heavy_imports"]:
+            offenders.append((module, result["heavy_imports"]))
+        if verbose:
+            heavy = f"  loads {', '.join(result['heavy_imports'])}" if result["heavy_imports"] else ""
+            print(f"🚦 {result['name']:<34} {result['seconds'] * 1000:10.1f} ms{heavy}")
+    return results, offenders
+
+
+def environment(seed, repeat):
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "seed": seed,
+        "repeat": repeat,
+        "timestamp": time.time(),
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare results with a baseline run. Returns (regressions, improvements),
+    each a list of (name, size, ratio) where ratio is new time / baseline time.
+    """
+    previous = {(r["name"], r["size"]): r["seconds"] for r in baseline["results"]}
+    regressions, improvements = [], []
+    for r in results:
+        base = previous.get((r["name"], r["size"]))
+        if not base:
+            continue
+        ratio = r["seconds"] / base
+        if ratio > 1 + threshold:
+            regressions.append((r["name"], r["size"], ratio))
+        elif ratio < 1 / (1 + threshold):
+            improvements.append((r["name"], r["size"], ratio))
+    return regressions, improvements
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every stage of the flight hazard pipeline")
+    parser.add_argument("--sizes", default=",".join(str(n) for n in DEFAULT_SIZES),
+                        help="comma-separated sample counts, e.g. 1e3,1e4")
+    parser.add_argument("--max-size", type=float, default=None, help="skip sizes above this")
+    parser.add_argument("--only", default=None, help="comma-separated benchmark names to run")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the fastest counts")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="stored results to compare against")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store this run as the new baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown ratio above 1 counted as a regression")
+    parser.add_argument("--skip-startup", action="store_true",
+                        help="skip the entry point import-time checks")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(float(s)) for s in args.sizes.split(",")]
+    only = set(args.only.split(",")) if args.only else None
+    print("🏁 Flight Hazard Pipeline Benchmarks")
+    print("=" * 60)
+    offenders = []
+    results = []
+    if not args.skip_startup and (only is None or "startup" in only):
+        results, offenders = run_startup_checks()
+    results += run_benchmarks(sizes, args.seed, args.repeat, only, args.max_size)
+    report = {"environment": environment(args.seed, args.repeat), "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results written to {args.output}")
+
+    for module, heavy in offenders:
+        print(f"❌ Importing {module} loads {', '.join(heavy)}; import it where it is used instead")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📌 Baseline saved to {args.baseline}")
+        return 1 if offenders else 0
+    if not os.path.exists(args.baseline):
+        print(f"ℹ️  No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 1 if offenders else 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions, improvements = compare(results, baseline, args.threshold)
+    for name, size, ratio in improvements:
+        print(f"🚀 {name} n={size:,}: {ratio:.2f}x the baseline time")
+    for name, size, ratio in regressions:
+        print(f"🐢 REGRESSION {name} n={size:,}: {ratio:.2f}x the baseline time")
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    if offenders:
+        return 1
+    print("✅ No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
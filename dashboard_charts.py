@@ -0,0 +1,84 @@
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+# (column, trace name, line color) for the three monitoring subplots
+CHART_SERIES = [
+    ("altitude", "Altitude", "#667eea"),
+    ("speed", "Speed", "#764ba2"),
+    ("g_force", "G-Force", "#f093fb"),
+]
+
+
+class FlightChart:
+    """
+    Live flight monitoring figure that is built once and updated in place.
+
+    Each update points the WebGL traces at the newest `window` samples of a
+    TelemetryBuffer and appends only the hazards reported since the previous
+    update to a single marker trace, so the work per step does not grow with
+    the length of the run. Data is handed to Plotly as NumPy arrays, which Plotly serializes
+    as binary typed arrays instead of JSON number lists.
+    """
+
+    def __init__(self, window=2000):
+        self.window = window
+        self._hazard_steps = np.empty(0, dtype=np.int64)
+        self.fig = self._build()
+
+    def _build(self):
+        fig = make_subplots(
+            rows=3, cols=1,
+            subplot_titles=('🛩️ Altitude (ft)', '⚡ Speed (knots)', '🔄 G-Force'),
+            vertical_spacing=0.1
+        )
+        for row, (_, name, color) in enumerate(CHART_SERIES, start=1):
+            fig.add_trace(
+                go.Scattergl(x=np.empty(0), y=np.empty(0), name=name, mode='lines',
+                             line=dict(color=color, width=3)),
+                row=row, col=1
+            )
+        # Every hazard marker lives in this one trace instead of one annotation each
+        fig.add_trace(
+            go.Scattergl(x=np.empty(0), y=np.empty(0), name='Hazards', mode='markers',
+                         marker=dict(symbol='triangle-up', size=12, color='red')),
+            row=1, col=1
+        )
+        fig.update_layout(
+            height=600,
+            showlegend=False,
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font=dict(size=12, color='#495057'),
+            margin=dict(l=50, r=50, t=50, b=50),
+            uirevision='flight',  # keep the user's zoom across updates
+        )
+        return fig
+
+    def reset(self):
+        """Forget all hazards, ready for a new run"""
+        self._hazard_steps = np.empty(0, dtype=np.int64)
+
+    def update(self, flight_data, new_hazards=()):
+        """
+        Bring the figure up to date with a TelemetryBuffer and the hazard
+        records ({'time': step, ...}) reported since the previous update.
+        """
+        n = len(flight_data)
+        shown = min(n, self.window)
+        first_step = flight_data.total - shown
+        steps = np.arange(first_step, flight_data.total, dtype=np.int64)
+        columns = flight_data.latest(shown)
+        for trace, (column, _, _) in zip(self.fig.data, CHART_SERIES):
+            trace.x = steps
+            trace.y = columns[column]
+
+        if new_hazards:
+            new_steps = np.fromiter((h['time'] for h in new_hazards), dtype=np.int64)
+            self._hazard_steps = np.concatenate([self._hazard_steps, new_steps])
+        # Drop hazards that scrolled out of the window; they can never come back
+        self._hazard_steps = self._hazard_steps[self._hazard_steps >= first_step]
+        markers = self.fig.data[len(CHART_SERIES)]
+        markers.x = self._hazard_steps
+        markers.y = columns['altitude'][self._hazard_steps - first_step]
+        return self.fig
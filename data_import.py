@@ -1,11 +1,252 @@
-import pandas as pd
+import hashlib
+import json
+import os
+import numpy as np
 
-def load_faa_ntsb_data():
-    url = "https://raw.githubusercontent.com/aaronraimist/FAA-Preliminary-Accident-and-Incident-Data/main/FAA-Accident-Incident-Data.csv"
-    df = pd.read_csv(url)
-    print("Sample FAA/NTSB Crash Data:")
-    print(df.head())
+FAA_DATA_URL = "https://raw.githubusercontent.com/aaronraimist/FAA-Preliminary-Accident-and-Incident-Data/main/FAA-Accident-Incident-Data.csv"
+
+# A local copy of the CSV is used when present; set FAA_DATA_PATH to point elsewhere
+DEFAULT_CSV_PATH = os.path.join("data", "FAA-Accident-Incident-Data.csv")
+# Columnar caches are written here; set FAA_CACHE_DIR to move them
+DEFAULT_CACHE_DIR = ".faa_cache"
+CACHE_VERSION = 1
+# Rows per chunk when streaming the CSV with iter_faa_chunks
+DEFAULT_CHUNK_ROWS = 100000
+
+# Low-cardinality text columns stored as integer codes plus a category table.
+# Other text columns become categorical automatically when mostly repeated.
+CATEGORICAL_COLUMNS = ["LOC_STATE_NAME", "ACFT_MAKE_NAME", "EVENT_TYPE_DESC"]
+DATE_COLUMNS = ["EVENT_LCL_DATE"]
+# Identifiers that look numeric but must stay text
+TEXT_COLUMNS = ["REGIST_NBR", "FLT_NBR"]
+
+
+def resolve_faa_source(source=None):
+    """
+    Pick where to read the FAA data from: an explicit path or URL, then
+    FAA_DATA_PATH, then data/FAA-Accident-Incident-Data.csv, then the GitHub
+    URL.
+    """
+    if source:
+        return source
+    path = os.environ.get("FAA_DATA_PATH", DEFAULT_CSV_PATH)
+    if os.path.exists(path):
+        return path
+    return FAA_DATA_URL
+
+
+def _offline(offline):
+    if offline is None:
+        return os.environ.get("FAA_OFFLINE", "") not in ("", "0")
+    return offline
+
+
+def _is_url(source):
+    return source.startswith(("http://", "https://"))
+
+
+def source_fingerprint(source):
+    """Identify the current version of a source; URLs are only identified by name"""
+    if _is_url(source):
+        return {"source": source}
+    stat = os.stat(source)
+    return {"source": os.path.abspath(source), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _cache_path(source, cache_dir):
+    key = os.path.abspath(source) if not _is_url(source) else source
+    return os.path.join(cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest()[:16])
+
+
+def faa_cache_path(source, cache_dir=None):
+    """Directory holding the columnar cache (and derived indexes) of a source"""
+    cache_dir = cache_dir or os.environ.get("FAA_CACHE_DIR", DEFAULT_CACHE_DIR)
+    return _cache_path(source, cache_dir)
+
+
+def _read_meta(path):
+    try:
+        with open(os.path.join(path, "meta.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _csv_dtypes(source):
+    """Explicit dtypes for the columns we know about, plus the CSV header"""
+    import pandas as pd
+    header = pd.read_csv(source, nrows=0).columns
+    return {col: str for col in TEXT_COLUMNS + CATEGORICAL_COLUMNS if col in header}, header
+
+
+def _parse_dates(df):
+    import pandas as pd
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            # Parse each distinct string once: dates repeat heavily, and a format
+            # pandas cannot infer is parsed element by element. Saying so up front
+            # keeps pandas 2 from warning about it on every chunk.
+            codes, uniques = pd.factorize(df[col])
+            mixed = {"format": "mixed"} if int(pd.__version__.split(".")[0]) >= 2 else {}
+            parsed = pd.DatetimeIndex(pd.to_datetime(uniques, errors="coerce", **mixed))
+            # Missing values have code -1, which only means "missing" with a fill value
+            df[col] = pd.Series(parsed.take(codes, allow_fill=True, fill_value=pd.NaT), index=df.index)
+    return df
+
+
+def _read_csv(source):
+    """Read the raw CSV with explicit dtypes for the columns we know about"""
+    import pandas as pd
+    dtype, _ = _csv_dtypes(source)
+    return _parse_dates(pd.read_csv(source, dtype=dtype, low_memory=False))
+
+
+def iter_faa_chunks(source=None, columns=None, chunk_rows=DEFAULT_CHUNK_ROWS, offline=None):
+    """
+    Stream the FAA CSV as DataFrames of at most `chunk_rows` rows, with the
+    dtypes of a full load. Only the current chunk is held in memory and
+    nothing is cached, so this works on files too large to load whole.
+    `columns` limits which columns are read; missing ones are skipped.
+    """
+    import pandas as pd
+    source = resolve_faa_source(source)
+    if _is_url(source) and _offline(offline):
+        raise FileNotFoundError(
+            f"No local FAA data at {os.environ.get('FAA_DATA_PATH', DEFAULT_CSV_PATH)}; offline mode is on")
+    dtype, header = _csv_dtypes(source)
+    usecols = None if columns is None else [col for col in header if col in set(columns)]
+    with pd.read_csv(source, dtype=dtype, usecols=usecols, chunksize=chunk_rows,
+                     low_memory=False) as reader:
+        for chunk in reader:
+            yield _parse_dates(chunk)
+
+
+def _write_cache(df, path, fingerprint):
+    """Write one .npy file per column plus meta.json describing how to rebuild them"""
+    import pandas as pd
+    os.makedirs(path, exist_ok=True)
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        base = os.path.join(path, f"c{i}")
+        if pd.api.types.is_datetime64_any_dtype(series):
+            values = series.to_numpy(dtype="datetime64[ns]").view(np.int64)
+            np.save(base + ".npy", values)
+            columns.append({"name": name, "kind": "datetime"})
+        elif pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+            np.save(base + ".npy", series.to_numpy())
+            columns.append({"name": name, "kind": "numeric"})
+        elif name in CATEGORICAL_COLUMNS or series.nunique(dropna=True) <= 0.5 * max(len(series), 1):
+            cat = series.astype("category")
+            codes = cat.cat.codes.to_numpy()
+            np.save(base + ".npy", codes.astype(np.int16 if len(cat.cat.categories) < 32000 else np.int32))
+            columns.append({"name": name, "kind": "category",
+                            "categories": [str(c) for c in cat.cat.categories]})
+        else:
+            # Free text: one UTF-8 blob plus offsets, with a mask for missing values
+            missing = series.isna().to_numpy()
+            encoded = [b"" if m else str(v).encode("utf-8") for v, m in zip(series, missing)]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(b) for b in encoded], out=offsets[1:])
+            np.save(base + ".npy", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+            np.save(base + "_offsets.npy", offsets)
+            np.save(base + "_missing.npy", missing)
+            columns.append({"name": name, "kind": "text"})
+        columns[-1]["file"] = f"c{i}"
+    meta = {"version": CACHE_VERSION, "fingerprint": fingerprint, "rows": len(df), "columns": columns}
+    # meta.json is written last so a half-written cache is never treated as valid
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    return meta
+
+
+def _load_cache(path, meta, columns=None):
+    """Rebuild a DataFrame from the cache, memory-mapping every array"""
+    import pandas as pd
+    wanted = set(columns) if columns is not None else None
+    data = {}
+    for col in meta["columns"]:
+        name = col["name"]
+        if wanted is not None and name not in wanted:
+            continue
+        base = os.path.join(path, col["file"])
+        values = np.load(base + ".npy", mmap_mode="r")
+        if col["kind"] == "numeric":
+            data[name] = values
+        elif col["kind"] == "datetime":
+            data[name] = values.view("datetime64[ns]")
+        elif col["kind"] == "category":
+            data[name] = pd.Categorical.from_codes(np.asarray(values), categories=col["categories"])
+        else:
+            offsets = np.load(base + "_offsets.npy", mmap_mode="r")
+            missing = np.load(base + "_missing.npy", mmap_mode="r")
+            data[name] = _text_column(values, offsets, missing)
+    return pd.DataFrame(data, copy=False)
+
+
+def _text_column(blob, offsets, missing):
+    """
+    Rebuild a text column from its UTF-8 blob and offsets. The layout is
+    Arrow's large_string, so with pyarrow (and pandas 2.3+) the
+    memory-mapped buffers are wrapped without copying as pandas' "str"
+    dtype, missing values NaN as when reading the CSV. Otherwise the strings
+    are cut out and decoded with vectorized NumPy rather than one Python
+    slice per row.
+    """
+    import pandas as pd
+    n = len(missing)
+    try:
+        import pyarrow as pa
+        dtype = pd.StringDtype("pyarrow", na_value=np.nan)
+    except (ImportError, TypeError):
+        pa = None
+    if pa is not None:
+        valid = pa.py_buffer(np.packbits(~np.asarray(missing), bitorder="little"))
+        strings = pa.LargeStringArray.from_buffers(n, pa.py_buffer(offsets), pa.py_buffer(blob), valid,
+                                                   int(np.count_nonzero(missing)))
+        return pd.array(strings, dtype=dtype)
+    # Pad each string into a fixed-width bytes array, then decode the lot at once
+    lengths = np.diff(offsets)
+    width = max(int(lengths.max(initial=0)), 1)
+    cols = np.arange(width)
+    fixed = np.zeros((n, width), dtype=np.uint8)
+    inside = cols < lengths[:, None]
+    fixed[inside] = np.asarray(blob)[(offsets[:-1, None] + cols)[inside]]
+    text = np.char.decode(fixed.view(f"S{width}").ravel(), "utf-8").astype(object)
+    text[np.asarray(missing)] = None
+    return text
+
+
+def load_faa_ntsb_data(source=None, columns=None, cache_dir=None, refresh=False, offline=None,
+                       verbose=True):
+    """
+    Load the FAA/NTSB accident and incident data as a DataFrame.
+
+    The first load of a source parses the CSV and converts it to a columnar
+    cache (one memory-mappable .npy file per column, categorical codes for
+    state, make and event type). Later loads read the cache, which is rebuilt
+    only when a local source file changes or `refresh` is set. `columns`
+    limits which columns are loaded. In offline mode (offline=True or
+    FAA_OFFLINE=1) the network is never used; a previously cached download
+    still loads.
+    """
+    source = resolve_faa_source(source)
+    path = faa_cache_path(source, cache_dir)
+    meta = _read_meta(path)
+    fingerprint = source_fingerprint(source)
+    stale = (meta is None or meta.get("version") != CACHE_VERSION
+             or meta.get("fingerprint") != fingerprint)
+    if refresh or stale:
+        if _is_url(source) and _offline(offline):
+            raise FileNotFoundError(
+                f"No local FAA data at {os.environ.get('FAA_DATA_PATH', DEFAULT_CSV_PATH)} "
+                "and no cached download; offline mode is on")
+        meta = _write_cache(_read_csv(source), path, fingerprint)
+    df = _load_cache(path, meta, columns)
+    if verbose:
+        print("Sample FAA/NTSB Crash Data:")
+        print(df.head())
     return df
 
 if __name__ == "__main__":
-    load_faa_ntsb_data() 
\ No newline at end of file
+    load_faa_ntsb_data()
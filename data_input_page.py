@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
-from data_import import load_faa_ntsb_data
+from faa_analytics import get_faa_summary, get_faa_stream_summary
+from hazard_rules import RULES_PATH, configure, load_config, save_config
 
 def show_data_input_page():
     st.title("📊 Data Input & Configuration")
@@ -61,39 +62,66 @@ def show_data_input_page():
     with tab2:
         st.header("📈 Real FAA Accident & Incident Data")
         
-        if st.button("🔄 Load Latest FAA Data"):
+        col_load, col_refresh = st.columns(2)
+        with col_load:
+            if st.button("🔄 Load Latest FAA Data"):
+                st.session_state.faa_loaded = True
+        with col_refresh:
+            refresh = st.button("♻️ Re-read Source", help="Ignore the cache and parse the source again")
+            if refresh:
+                st.session_state.faa_loaded = True
+        streaming = st.checkbox(
+            "🪶 Low-memory summary",
+            help="Stream the source in chunks and keep only running totals; "
+                 "unique aircraft is then an estimate")
+        
+        # The dataset and its aggregates are shared by every session and rerun;
+        # they are only recomputed when the source file changes
+        if st.session_state.get('faa_loaded'):
             with st.spinner("Loading FAA accident and incident data..."):
                 try:
-                    df = load_faa_ntsb_data()
+                    if streaming:
+                        summary = get_faa_stream_summary(refresh=refresh)
+                    else:
+                        summary = get_faa_summary(refresh=refresh)
                     
-                    st.success(f"✅ Successfully loaded {len(df)} records from FAA database")
+                    st.success(f"✅ Successfully loaded {summary.records} records from FAA database")
                     
                     # Show data summary
                     col1, col2, col3 = st.columns(3)
                     with col1:
-                        st.metric("Total Records", len(df))
+                        st.metric("Total Records", summary.records)
                     with col2:
-                        st.metric("Date Range", f"{df['EVENT_LCL_DATE'].min()} to {df['EVENT_LCL_DATE'].max()}")
+                        st.metric("Date Range", summary.date_range)
                     with col3:
-                        st.metric("Unique Aircraft", df['REGIST_NBR'].nunique())
+                        st.metric("Unique Aircraft (approx.)" if summary.approximate else "Unique Aircraft",
+                                  summary.unique_aircraft)
                     
                     # Show sample data
                     st.subheader("Sample Data")
-                    st.dataframe(df.head(10), use_container_width=True)
+                    st.dataframe(summary.sample, use_container_width=True)
                     
                     # Data analysis
                     st.subheader("Data Analysis")
                     
                     # Event types
-                    if 'EVENT_TYPE_DESC' in df.columns:
-                        event_counts = df['EVENT_TYPE_DESC'].value_counts()
-                        st.bar_chart(event_counts)
+                    if summary.event_counts is not None:
+                        st.bar_chart(summary.event_counts)
+                    
+                    # Incidents over time
+                    if summary.year_counts is not None:
+                        st.write("Incidents per Year:")
+                        st.bar_chart(summary.year_counts)
                     
                     # Geographic distribution
-                    if 'LOC_STATE_NAME' in df.columns:
-                        state_counts = df['LOC_STATE_NAME'].value_counts().head(10)
+                    if summary.state_counts is not None:
                         st.write("Top 10 States by Incidents:")
-                        st.dataframe(state_counts)
+                        st.dataframe(summary.state_counts)
+                    
+                    # Aircraft types
+                    if summary.model_counts is not None:
+                        st.write("Top 10 Aircraft Makes and Models:")
+                        st.dataframe(summary.model_counts)
                         
                 except Exception as e:
                     st.error(f"❌ Error loading FAA data: {str(e)}")
@@ -114,6 +142,7 @@ def show_data_input_page():
         st.header("⚙️ System Configuration")
         
         st.subheader("Hazard Detection Sensitivity")
+        saved = load_config()
         
         col1, col2 = st.columns(2)
         
@@ -122,7 +151,7 @@ def show_data_input_page():
                 "G-Force Warning Threshold",
                 min_value=1.0,
                 max_value=5.0,
-                value=2.5,
+                value=saved.get("g_force_warning", 2.5),
                 step=0.1,
                 help="G-Force level that triggers a warning"
             )
@@ -131,7 +160,7 @@ def show_data_input_page():
                 "Low Altitude Warning (ft)",
                 min_value=500,
                 max_value=5000,
-                value=3000,
+                value=saved.get("altitude_warning", 3000),
                 step=100,
                 help="Altitude below which warnings are triggered"
             )
@@ -141,7 +170,7 @@ def show_data_input_page():
                 "High Speed Warning (knots)",
                 min_value=150,
                 max_value=500,
-                value=250,
+                value=saved.get("speed_warning", 250),
                 step=10,
                 help="Speed above which warnings are triggered"
             )
@@ -150,7 +179,7 @@ def show_data_input_page():
                 "Crash Detection Threshold (G-Force)",
                 min_value=3.0,
                 max_value=10.0,
-                value=5.0,
+                value=saved.get("crash_threshold", 5.0),
                 step=0.5,
                 help="G-Force level that triggers crash detection"
             )
@@ -160,12 +189,12 @@ def show_data_input_page():
         alert_types = st.multiselect(
             "Enable Alert Types",
             ["Cockpit Warnings", "Ground Control Alerts", "Emergency Alerts", "Email Notifications", "SMS Alerts"],
-            default=["Cockpit Warnings", "Ground Control Alerts", "Emergency Alerts"]
+            default=saved.get("alert_types", ["Cockpit Warnings", "Ground Control Alerts", "Emergency Alerts"])
         )
         
         auto_response = st.checkbox(
             "Enable Automatic Emergency Response",
-            value=True,
+            value=saved.get("auto_response", True),
             help="Automatically dispatch search and rescue teams"
         )
         
@@ -180,8 +209,11 @@ def show_data_input_page():
                 "auto_response": auto_response
             }
             
-            st.session_state.config = config
-            st.success("✅ Configuration saved successfully!")
+            # The dashboard and the command line monitor load the thresholds from
+            # this file; recompile this process's rules right away as well
+            save_config(config)
+            configure(config)
+            st.success(f"✅ Configuration saved to {RULES_PATH}")
             
             # Show saved config
             st.json(config)
@@ -10,7 +10,11 @@ Author: College Project
 Purpose: Aviation Safety System Demonstration
 """
 
+import argparse
+import contextlib
+import io
 import os
+import runpy
 import sys
 import subprocess
 import time
@@ -86,30 +90,67 @@ def run_data_demo():
     except Exception as e:
         print(f"❌ Error running data demo: {e}")
 
-def test_components():
-    """Test individual system components"""
+COMPONENTS = [
+    ("Flight Simulation", "flight_sim.py"),
+    ("Hazard Rules", "hazard_rules.py"),
+    ("Hazard Detection", "hazard_detection.py"),
+    ("Temporal Detection", "temporal_detection.py"),
+    ("Telemetry Buffer", "telemetry_buffer.py"),
+    ("Spatial Index", "spatial_index.py"),
+    ("Proximity Detection", "proximity.py"),
+    ("Alert Throttle", "alert_throttle.py"),
+    ("Alert System", "alert_system.py"),
+    ("Visualization", "visualization.py")
+]
+
+def run_component(file):
+    """
+    Run a module's __main__ block inside this interpreter, with its output
+    captured. Returns None on success or the error text.
+    """
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            runpy.run_path(file, run_name="__main__")
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            return f"exited with status {e.code}"
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+def run_component_isolated(file):
+    """Run a module's __main__ block in a fresh interpreter"""
+    result = subprocess.run([sys.executable, file], capture_output=True, text=True, timeout=10)
+    if result.returncode != 0:
+        return f"exited with status {result.returncode}"
+    return None
+
+def test_components(isolated=False):
+    """
+    Test individual system components. By default every check runs in this
+    process, so numpy and the rest are imported once rather than once per
+    component; `isolated` starts a fresh interpreter for each instead.
+    Returns the number of failures.
+    """
     print("⚙️  Testing System Components...")
     print()
     
-    components = [
-        ("Flight Simulation", "flight_sim.py"),
-        ("Hazard Detection", "hazard_detection.py"),
-        ("Alert System", "alert_system.py"),
-        ("Visualization", "visualization.py")
-    ]
-    
-    for name, file in components:
+    run = run_component_isolated if isolated else run_component
+    failures = 0
+    for name, file in COMPONENTS:
         print(f"🧪 Testing {name}...")
+        start = time.perf_counter()
         try:
-            result = subprocess.run([sys.executable, file], 
-                                  capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                print(f"✅ {name} test passed")
-            else:
-                print(f"❌ {name} test failed")
+            error = run(file)
         except Exception as e:
-            print(f"❌ Error testing {name}: {e}")
+            error = str(e)
+        if error is None:
+            print(f"✅ {name} test passed ({time.perf_counter() - start:.2f}s)")
+        else:
+            failures += 1
+            print(f"❌ {name} test failed: {error}")
         print()
+    return failures
 
 def show_documentation():
     """Display documentation and help"""
@@ -148,6 +189,15 @@ def show_documentation():
 
 def main():
     """Main demo function"""
+    parser = argparse.ArgumentParser(description="Flight Hazard Alert System demo")
+    parser.add_argument("--check", action="store_true",
+                        help="run the component checks and exit non-zero on failure")
+    parser.add_argument("--isolated", action="store_true",
+                        help="run each component check in its own interpreter")
+    args = parser.parse_args()
+    if args.check:
+        sys.exit(1 if test_components(isolated=args.isolated) else 0)
+    
     print_banner()
     
     while True:
@@ -0,0 +1,247 @@
+import math
+import threading
+from collections import Counter
+import numpy as np
+import pandas as pd
+from data_import import (DEFAULT_CHUNK_ROWS, iter_faa_chunks, load_faa_ntsb_data, resolve_faa_source,
+                         source_fingerprint)
+
+# The columns the dashboard aggregates; streaming reads only these
+SUMMARY_COLUMNS = ["EVENT_LCL_DATE", "EVENT_TYPE_DESC", "LOC_STATE_NAME", "ACFT_MAKE_NAME",
+                   "ACFT_MODEL_NAME", "REGIST_NBR"]
+HLL_PRECISION = 14
+
+
+def _format_date(value):
+    if value is None or pd.isna(value):
+        return "?"
+    return value.strftime("%Y-%m-%d") if hasattr(value, "strftime") else str(value)
+
+
+def _make_model(df):
+    """'MAKE MODEL' per row, missing where the make is unknown"""
+    make = df['ACFT_MAKE_NAME'].astype("string").str.strip()
+    model = (df['ACFT_MODEL_NAME'].astype("string").str.strip().fillna("")
+             if 'ACFT_MODEL_NAME' in df.columns else "")
+    return (make + " " + model).str.strip()
+
+
+class HyperLogLog:
+    """
+    Approximate distinct counter. Memory is fixed at 2**precision one-byte
+    registers however many values are added; the standard error is about
+    1.04 / sqrt(2**precision), under 1% at the default precision.
+    """
+
+    def __init__(self, precision=HLL_PRECISION):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        """Add 64-bit hashes: the top bits pick a register, the rest give its rank"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        width = 64 - self.precision
+        index = (hashes >> np.uint64(width)).astype(np.intp)
+        # Under 2**53, so exact as floats; frexp gives the bit length
+        rest = (hashes & np.uint64((1 << width) - 1)).astype(np.float64)
+        rank = width + 1 - np.frexp(rest)[1]
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def add(self, values):
+        """Add a Series (or list) of values; missing values are skipped"""
+        values = pd.Series(values).dropna().astype(str)
+        self.add_hashes(pd.util.hash_pandas_object(values, index=False).to_numpy())
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("can only merge sketches of the same precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.ldexp(1.0, -self.registers.astype(np.int64)).sum()
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction: linear counting over the empty registers
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class FAASummary:
+    """The FAA dataset plus the aggregates the dashboard shows, computed once"""
+    approximate = False
+
+    def __init__(self, df, source, fingerprint):
+        self.df = df
+        self.source = source
+        self.fingerprint = fingerprint
+        self.records = len(df)
+        self.sample = df.head(10)
+        self.date_min = self.date_max = None
+        if 'EVENT_LCL_DATE' in df.columns:
+            dates = df['EVENT_LCL_DATE']
+            self.date_min, self.date_max = dates.min(), dates.max()
+        self.unique_aircraft = int(df['REGIST_NBR'].nunique()) if 'REGIST_NBR' in df.columns else 0
+        self.event_counts = (df['EVENT_TYPE_DESC'].value_counts()
+                             if 'EVENT_TYPE_DESC' in df.columns else None)
+        self.state_counts = (df['LOC_STATE_NAME'].value_counts().head(10)
+                             if 'LOC_STATE_NAME' in df.columns else None)
+        self.year_counts = (df['EVENT_LCL_DATE'].dt.year.dropna().astype(int).value_counts().sort_index()
+                            if 'EVENT_LCL_DATE' in df.columns else None)
+        self.model_counts = (_make_model(df).value_counts().head(10)
+                             if 'ACFT_MAKE_NAME' in df.columns else None)
+
+    @property
+    def date_range(self):
+        """Date range as display text"""
+        return f"{_format_date(self.date_min)} to {_format_date(self.date_max)}"
+
+
+class FAAStreamSummary:
+    """
+    The same aggregates as FAASummary, built one chunk at a time.
+
+    Each update folds a chunk into running counts by event type, state,
+    make/model and year, and adds its registrations to a HyperLogLog sketch,
+    so memory stays bounded by the chunk size and the number of distinct
+    categories rather than the size of the file. Distinct aircraft are an
+    estimate.
+    """
+    approximate = True
+
+    def __init__(self, source=None, fingerprint=None, precision=HLL_PRECISION):
+        self.source = source
+        self.fingerprint = fingerprint
+        self.records = 0
+        self.chunks = 0
+        self.sample = None
+        self.date_min = self.date_max = None
+        self.aircraft = HyperLogLog(precision)
+        self._events = Counter()
+        self._states = Counter()
+        self._models = Counter()
+        self._years = Counter()
+
+    def update(self, chunk):
+        """Fold one chunk of the FAA data into the aggregates"""
+        self.chunks += 1
+        self.records += len(chunk)
+        if self.sample is None:
+            self.sample = chunk.head(10).copy()
+        if 'EVENT_LCL_DATE' in chunk.columns:
+            dates = chunk['EVENT_LCL_DATE']
+            low, high = dates.min(), dates.max()
+            if not pd.isna(low) and (self.date_min is None or low < self.date_min):
+                self.date_min = low
+            if not pd.isna(high) and (self.date_max is None or high > self.date_max):
+                self.date_max = high
+            self._years.update(dates.dt.year.dropna().astype(int).value_counts().to_dict())
+        if 'EVENT_TYPE_DESC' in chunk.columns:
+            self._events.update(chunk['EVENT_TYPE_DESC'].value_counts().to_dict())
+        if 'LOC_STATE_NAME' in chunk.columns:
+            self._states.update(chunk['LOC_STATE_NAME'].value_counts().to_dict())
+        if 'ACFT_MAKE_NAME' in chunk.columns:
+            self._models.update(_make_model(chunk).value_counts().to_dict())
+        if 'REGIST_NBR' in chunk.columns:
+            self.aircraft.add(chunk['REGIST_NBR'])
+
+    @staticmethod
+    def _series(counts, top=None):
+        if not counts:
+            return None
+        items = counts.most_common(top)
+        return pd.Series([n for _, n in items], index=[k for k, _ in items], name="count")
+
+    @property
+    def unique_aircraft(self):
+        return self.aircraft.estimate()
+
+    @property
+    def event_counts(self):
+        return self._series(self._events)
+
+    @property
+    def state_counts(self):
+        return self._series(self._states, 10)
+
+    @property
+    def model_counts(self):
+        return self._series(self._models, 10)
+
+    @property
+    def year_counts(self):
+        series = self._series(self._years)
+        return None if series is None else series.sort_index()
+
+    @property
+    def date_range(self):
+        """Date range as display text"""
+        return f"{_format_date(self.date_min)} to {_format_date(self.date_max)}"
+
+
+def summarize_faa_stream(source=None, chunk_rows=DEFAULT_CHUNK_ROWS, offline=None):
+    """Stream an FAA source in chunks into an FAAStreamSummary, never loading it whole"""
+    source = resolve_faa_source(source)
+    summary = FAAStreamSummary(source, source_fingerprint(source))
+    for chunk in iter_faa_chunks(source, columns=SUMMARY_COLUMNS, chunk_rows=chunk_rows, offline=offline):
+        summary.update(chunk)
+    return summary
+
+
+# One summary per source, shared by every session in the process
+_summaries = {}
+_stream_summaries = {}
+_lock = threading.Lock()
+
+
+def get_faa_summary(source=None, refresh=False):
+    """
+    Return the cached FAASummary for a source, loading and aggregating it only
+    if this process has not seen it yet, the local file's fingerprint changed,
+    or `refresh` is set. Concurrent callers wait for a single load.
+    """
+    source = resolve_faa_source(source)
+    fingerprint = source_fingerprint(source)
+    with _lock:
+        summary = _summaries.get(source)
+        if summary is None or refresh or summary.fingerprint != fingerprint:
+            df = load_faa_ntsb_data(source, refresh=refresh, verbose=False)
+            summary = _summaries[source] = FAASummary(df, source, fingerprint)
+        return summary
+
+
+def get_faa_stream_summary(source=None, refresh=False, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Like get_faa_summary, but the aggregates are streamed from the source in
+    chunks and no DataFrame of the whole dataset is ever built or kept.
+    """
+    source = resolve_faa_source(source)
+    fingerprint = source_fingerprint(source)
+    with _lock:
+        summary = _stream_summaries.get(source)
+        if summary is None or refresh or summary.fingerprint != fingerprint:
+            summary = _stream_summaries[source] = summarize_faa_stream(source, chunk_rows)
+        return summary
+
+
+def get_faa_dataset(source=None):
+    """Return the shared FAA DataFrame handle"""
+    return get_faa_summary(source).df
+
+
+if __name__ == "__main__":
+    import time
+    start = time.perf_counter()
+    summary = get_faa_summary()
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    get_faa_summary()
+    print(f"Records: {summary.records}, aircraft: {summary.unique_aircraft}, dates: {summary.date_range}")
+    print(f"First load {first * 1000:.1f} ms, cached {(time.perf_counter() - start) * 1000:.3f} ms")
+    start = time.perf_counter()
+    stream = summarize_faa_stream(summary.source)
+    print(f"Streamed {stream.records} records in {stream.chunks} chunks in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms, ~{stream.unique_aircraft} aircraft")
@@ -0,0 +1,253 @@
+import asyncio
+import time
+import numpy as np
+from flight_sim import generate_fleet_trajectories, fleet_snapshot
+from hazard_detection import detect_hazards_batch, hazard_messages
+from hazard_rules import get_active_rules
+from alert_system import AlertSystem
+from metrics import get_registry
+from spatial_index import GridIndex
+
+
+class AircraftState:
+    """Per-aircraft monitoring state, keyed by registration in FleetMonitor"""
+    __slots__ = ("registration", "index", "last_sample", "hazard_count", "crashed")
+
+    def __init__(self, registration, index):
+        self.registration = registration
+        self.index = index          # row of this aircraft in the fleet arrays
+        self.last_sample = None
+        self.hazard_count = 0
+        self.crashed = False
+
+
+class FleetMonitor:
+    """
+    asyncio monitoring engine for many aircraft at once.
+
+    A tick scheduler pulls one snapshot of the whole fleet per tick, a
+    detection stage scores it with detect_hazards_batch, and a dispatch stage
+    raises alerts for the flagged aircraft. The stages are connected by
+    bounded queues so detection of the next tick overlaps dispatch of the
+    previous one, and a slow dispatch stage holds the scheduler back rather
+    than letting work pile up. With a `recorder` (a TelemetryWriter) every
+    snapshot is also appended to a recording. With a `temporal` detector
+    (a temporal_detection.FleetDetector sized for the fleet) every snapshot
+    also feeds the sliding-window rules, and the instantaneous rules those
+    replace are masked out. With a `proximity` detector
+    (proximity.ProximityDetector) every tick is also checked for pairs of
+    aircraft inside the separation minima.
+    """
+
+    def __init__(self, fleet, alert_sys=None, tick_interval=0.2, queue_size=4, verbose=True,
+                 rules_watcher=None, recorder=None, temporal=None, proximity=None):
+        self.fleet = fleet
+        self.rules_watcher = rules_watcher
+        self.recorder = recorder
+        self.temporal = temporal
+        self.proximity = proximity
+        self.registry = get_registry()
+        self.alert_sys = alert_sys if alert_sys is not None else AlertSystem()
+        self.tick_interval = tick_interval
+        self.queue_size = queue_size
+        self.verbose = verbose
+        self.registrations = fleet["registration"]
+        self.aircraft = {reg: AircraftState(reg, i) for i, reg in enumerate(self.registrations)}
+        self.active = np.ones(len(self.registrations), dtype=bool)
+        self.ticks_run = 0
+        self.total_hazards = 0
+        self.crashes = 0
+        self.conflicts = 0
+        self.late_ticks = 0
+        self._last_snapshot = None
+        self._aircraft_index = None
+        self._index_tick = None
+
+    async def run(self, ticks=None):
+        """Monitor the fleet for `ticks` ticks (default: the whole recorded fleet)"""
+        if ticks is None:
+            ticks = self.fleet["altitude"].shape[1]
+        detect_q = asyncio.Queue(self.queue_size)
+        dispatch_q = asyncio.Queue(self.queue_size)
+        await asyncio.gather(
+            self._schedule(ticks, detect_q),
+            self._detect_stage(detect_q, dispatch_q),
+            self._dispatch_stage(dispatch_q),
+        )
+
+    async def _schedule(self, ticks, detect_q):
+        # Ticks are pinned to absolute deadlines, so time spent in the
+        # pipeline does not accumulate as drift the way a fixed sleep would
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for tick in range(ticks):
+            if not self.active.any():
+                break
+            delay = start + tick * self.tick_interval - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif tick and self.tick_interval > 0:
+                # With no interval every tick is due at once; none of them is late
+                self.late_ticks += 1
+            if self.rules_watcher is not None and self.rules_watcher.poll():
+                print(f"🔧 Hazard thresholds reloaded from {self.rules_watcher.path}")
+            # Hazard-to-alert latency is measured from when the snapshot is taken
+            await detect_q.put((tick, fleet_snapshot(self.fleet, tick), time.perf_counter_ns()))
+        await detect_q.put(None)
+
+    async def _detect_stage(self, detect_q, dispatch_q):
+        while True:
+            item = await detect_q.get()
+            if item is None:
+                await dispatch_q.put(None)
+                return
+            tick, snapshot, detected_ns = item
+            self.registry.inc("samples", len(snapshot["altitude"]))
+            if self.recorder is not None:
+                self.recorder.extend({**snapshot, "registration": self.registrations},
+                                     timestamp=time.time())
+            with self.registry.timer("detect"):
+                masks, crashes = await self.detect(snapshot)
+            temporal = None
+            if self.temporal is not None:
+                with self.registry.timer("temporal"):
+                    temporal = self.temporal.update(snapshot, active=self.active)
+            conflicts = None
+            if self.proximity is not None:
+                with self.registry.timer("proximity"):
+                    conflicts = self.proximity.update(snapshot, active=self.active)
+            await dispatch_q.put((tick, snapshot, masks, crashes, detected_ns, temporal, conflicts))
+
+    async def detect(self, snapshot):
+        """Score one fleet snapshot; aircraft that already crashed are masked out"""
+        masks, crashes = detect_hazards_batch(snapshot)
+        masks[~self.active] = 0
+        crashes &= self.active
+        if self.temporal is not None:
+            bits = get_active_rules().bits
+            replaced = sum(bits.get(name, 0) for name in self.temporal.rules.replaces)
+            if replaced:
+                masks &= ~masks.dtype.type(replaced)
+        return masks, crashes
+
+    async def _dispatch_stage(self, dispatch_q):
+        while True:
+            item = await dispatch_q.get()
+            if item is None:
+                return
+            tick, snapshot, masks, crashes, detected_ns, temporal, conflicts = item
+            start = time.perf_counter_ns()
+            await self.dispatch(tick, snapshot, masks, crashes, detected_ns, temporal, conflicts)
+            self.registry.observe_ns("alert", time.perf_counter_ns() - start)
+
+    def _sample(self, snapshot, idx):
+        return {
+            "registration": self.registrations[idx],
+            "altitude": int(snapshot["altitude"][idx]),
+            "speed": int(snapshot["speed"][idx]),
+            "g_force": float(snapshot["g_force"][idx]),
+            "turbulence": bool(snapshot["turbulence"][idx]),
+            "latitude": float(snapshot["latitude"][idx]),
+            "longitude": float(snapshot["longitude"][idx]),
+        }
+
+    async def dispatch(self, tick, snapshot, masks, crashes, detected_ns=None, temporal=None,
+                       conflicts=None):
+        """
+        Raise alerts for every flagged aircraft in one scored snapshot.
+        `temporal` holds the FleetDetector hazard bitmask of each aircraft and
+        `conflicts` the ProximityDetector pairs.
+        """
+        flagged = masks | crashes
+        if temporal is not None:
+            flagged = flagged | (temporal != 0)
+        flagged = np.flatnonzero(flagged)
+        for n, idx in enumerate(flagged):
+            state = self.aircraft[self.registrations[idx]]
+            if state.crashed:
+                # Detection of this tick may have overlapped dispatch of the crash
+                continue
+            data = self._sample(snapshot, idx)
+            state.last_sample = data
+            hazards = hazard_messages(masks[idx])
+            if hazards:
+                state.hazard_count += len(hazards)
+                self.total_hazards += len(hazards)
+                self.alert_sys.raise_hazard_alerts(data, hazards, detected_ns=detected_ns)
+            if temporal is not None and temporal[idx]:
+                hazards = self.temporal.messages_for(temporal[idx])
+                state.hazard_count += len(hazards)
+                self.total_hazards += len(hazards)
+                self.alert_sys.raise_hazard_alerts(data, hazards, rules=self.temporal.rules,
+                                                   detected_ns=detected_ns)
+            if crashes[idx]:
+                state.crashed = True
+                self.active[idx] = False
+                self.crashes += 1
+                self.alert_sys.send_emergency_alert(data, detected_ns=detected_ns)
+            # Give the scheduler a chance to run during long alert bursts
+            if n % 256 == 255:
+                await asyncio.sleep(0)
+        if conflicts is not None and len(conflicts["a"]):
+            await self.dispatch_conflicts(snapshot, conflicts, detected_ns)
+        self.ticks_run = tick + 1
+        self._last_snapshot = snapshot
+        if self.verbose and tick % 5 == 0:
+            print(f"⏰ Tick {tick:3d}: {int(self.active.sum())} aircraft active, "
+                  f"{len(flagged)} flagged, {self.crashes} crashes so far")
+
+
+    async def dispatch_conflicts(self, snapshot, conflicts, detected_ns=None):
+        """Send separation alerts to both aircraft of every conflicting pair"""
+        minima = (self.proximity.lateral_nm, self.proximity.vertical_ft)
+        self.conflicts += len(conflicts["a"])
+        pairs = zip(conflicts["a"].tolist(), conflicts["b"].tolist(), conflicts["distance_nm"].tolist(),
+                    conflicts["vertical_ft"].tolist(), conflicts["closing_kt"].tolist())
+        for n, (a, b, distance, vertical, closing) in enumerate(pairs):
+            for own, intruder in ((a, b), (b, a)):
+                state = self.aircraft[self.registrations[own]]
+                if state.crashed:
+                    continue
+                state.hazard_count += 1
+                self.total_hazards += 1
+                self.alert_sys.send_separation_alert(self._sample(snapshot, own), self.registrations[intruder],
+                                                     distance, vertical, closing, minima, detected_ns)
+            if n % 256 == 255:
+                await asyncio.sleep(0)
+
+    def aircraft_index(self):
+        """
+        GridIndex of the active aircraft's positions at the last dispatched
+        tick, keyed by registration. Built on first use after each tick.
+        """
+        if self._index_tick != self.ticks_run:
+            index = GridIndex()
+            if self._last_snapshot is not None:
+                rows = np.flatnonzero(self.active)
+                for registration, lat, lon in zip(self.registrations[rows].tolist(),
+                                                  self._last_snapshot["latitude"][rows].tolist(),
+                                                  self._last_snapshot["longitude"][rows].tolist()):
+                    index.insert(registration, lat, lon)
+            self._aircraft_index, self._index_tick = index, self.ticks_run
+        return self._aircraft_index
+
+    def aircraft_within(self, lat, lon, radius_nm):
+        """Return [(registration, distance_nm)] for active aircraft within radius_nm, nearest first"""
+        return self.aircraft_index().within(lat, lon, radius_nm)
+
+
+async def monitor_fleet(n_aircraft, ticks, tick_interval=0.2, seed=None, alert_sys=None,
+                        rules_watcher=None, recorder=None, temporal=None, proximity=None):
+    """Simulate and monitor a fleet of n_aircraft for `ticks` ticks"""
+    fleet = generate_fleet_trajectories(n_aircraft, ticks, seed=seed)
+    monitor = FleetMonitor(fleet, alert_sys=alert_sys, tick_interval=tick_interval,
+                           rules_watcher=rules_watcher, recorder=recorder, temporal=temporal,
+                           proximity=proximity)
+    await monitor.run(ticks)
+    return monitor
+
+
+if __name__ == "__main__":
+    monitor = asyncio.run(monitor_fleet(200, 20, tick_interval=0.05, seed=7))
+    print(f"Ticks: {monitor.ticks_run}, hazards: {monitor.total_hazards}, crashes: {monitor.crashes}")
+    monitor.alert_sys.get_alert_summary()
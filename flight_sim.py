@@ -1,18 +1,226 @@
+import math
 import random
+import numpy as np
 
-def generate_flight_data():
+# Anomaly codes injected by generate_fleet_trajectories
+ANOMALY_NONE = 0
+ANOMALY_HIGH_G = 1
+ANOMALY_TERRAIN = 2
+ANOMALY_CRASH = 3
+
+# A simulated trajectory covers one nominal flight of this many seconds
+# whatever its number of steps; time-based rules use it to turn per-step
+# changes into rates
+FLIGHT_SECONDS = 3600.0
+
+# Simulated aircraft fly within this latitude/longitude box (the contiguous US)
+REGION = (25.0, 49.0, -124.0, -67.0)
+
+class FlightPath:
+    """
+    Position and heading of one simulated aircraft. It starts at a random
+    point in REGION and each `advance` moves it along its heading at the
+    given speed, turning gently and bouncing off the edges of the region.
+    """
+
+    def __init__(self, step_seconds=1.0):
+        lat_min, lat_max, lon_min, lon_max = REGION
+        self.step_seconds = step_seconds
+        self.latitude = random.uniform(lat_min, lat_max)
+        self.longitude = random.uniform(lon_min, lon_max)
+        self.heading = random.uniform(0.0, 360.0)
+
+    def advance(self, speed):
+        """Fly one step at `speed` knots; return (latitude, longitude)"""
+        lat_min, lat_max, lon_min, lon_max = REGION
+        self.heading = (self.heading + random.gauss(0.0, 2.0)) % 360.0
+        distance = speed * self.step_seconds / 3600.0  # nm; one minute of latitude is 1 nm
+        heading = math.radians(self.heading)
+        self.latitude += distance * math.cos(heading) / 60.0
+        self.longitude += distance * math.sin(heading) / (60.0 * math.cos(math.radians(self.latitude)))
+        if not lat_min <= self.latitude <= lat_max:
+            self.latitude = min(max(self.latitude, lat_min), lat_max)
+            self.heading = (180.0 - self.heading) % 360.0
+        if not lon_min <= self.longitude <= lon_max:
+            self.longitude = min(max(self.longitude, lon_min), lon_max)
+            self.heading = -self.heading % 360.0
+        return self.latitude, self.longitude
+
+
+def generate_flight_data(path=None):
     """
     Simulate a single set of flight data readings.
-    Returns a dictionary with altitude (ft), speed (knots), g_force, and turbulence (bool).
+    Returns a dictionary with altitude (ft), speed (knots), g_force, turbulence (bool)
+    and the aircraft's latitude/longitude in degrees. Pass the flight's
+    FlightPath to keep successive readings on one continuous track; without
+    one the position is a random point in REGION.
     """
+    speed = random.randint(200, 600)                  # in knots
+    if path is not None:
+        latitude, longitude = path.advance(speed)
+    else:
+        lat_min, lat_max, lon_min, lon_max = REGION
+        latitude, longitude = random.uniform(lat_min, lat_max), random.uniform(lon_min, lon_max)
     return {
         "altitude": random.randint(5000, 35000),      # in feet
-        "speed": random.randint(200, 600),            # in knots
+        "speed": speed,
         "g_force": round(random.uniform(0.8, 3.0), 1),# normal flight: ~1G
-        "turbulence": random.choice([True, False])
+        "turbulence": random.choice([True, False]),
+        "latitude": round(latitude, 4),
+        "longitude": round(longitude, 4),
+    }
+
+
+def _moving_average(x, width):
+    """Centered moving average along the last axis, same length as the input"""
+    pad = width // 2
+    padded = np.pad(x, [(0, 0)] * (x.ndim - 1) + [(pad, width - 1 - pad)], mode="edge")
+    csum = np.cumsum(padded, axis=-1)
+    csum = np.concatenate([np.zeros(x.shape[:-1] + (1,)), csum], axis=-1)
+    return (csum[..., width:] - csum[..., :-width]) / width
+
+
+def fleet_registrations(n_aircraft):
+    """
+    Return n stable, unique N-number style registrations.
+    Aircraft i always gets the same registration regardless of fleet size.
+    """
+    regs = []
+    for i in range(n_aircraft):
+        if i < 90000:
+            regs.append(f"N{10000 + i}")
+        else:
+            q, r = divmod(i - 90000, 676)
+            regs.append(f"N{1000 + q}{chr(65 + r // 26)}{chr(65 + r % 26)}")
+    return regs
+
+
+def generate_fleet_trajectories(n_aircraft, n_steps, seed=None, anomaly_rate=0.05,
+                                turbulence_rate=0.01, turbulence_length=20):
+    """
+    Simulate continuous climb/cruise/descent trajectories for a whole fleet.
+
+    Every aircraft draws from its own numpy.random.Generator spawned from
+    `seed`, so aircraft i produces the same flight for a given seed no matter
+    how large the fleet is. Roughly `anomaly_rate` of the aircraft get an
+    injected high-G event, low-altitude high-speed dive, or crash.
+
+    Each aircraft flies a straight line between two random points in REGION
+    and stops where it crashes.
+
+    Returns a dict of (n_aircraft, n_steps) arrays for altitude (ft), speed
+    (knots), g_force, turbulence and latitude/longitude (degrees), plus
+    per-aircraft "registration", "anomaly" (ANOMALY_* code) and
+    "anomaly_start" (step index, -1 if none).
+    """
+    n, T = n_aircraft, n_steps
+    streams = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(n)]
+
+    # One block of draws per aircraft keeps each stream independent of the others
+    params = np.empty((n, 9))
+    noise = np.empty((n, 3, T))
+    events = np.empty((n, T))
+    route = np.empty((n, 4))
+    for i, rng in enumerate(streams):
+        params[i] = rng.random(9)
+        noise[i] = rng.standard_normal((3, T))
+        events[i] = rng.random(T)
+        route[i] = rng.random(4)   # drawn last so the other draws keep their values
+
+    floor_alt = 5000 + 1000 * params[:, 0]           # handoff altitude at both ends
+    cruise_alt = 28000 + 11000 * params[:, 1]
+    cruise_speed = 420 + 100 * params[:, 2]
+    climb_end = T * (0.15 + 0.15 * params[:, 3])
+    descent_start = T * (0.70 + 0.15 * params[:, 4])
+
+    # Phase profile in [0, 1]: ramp up, hold at cruise, ramp down
+    t = np.arange(T, dtype=np.float64)
+    up = np.clip(t / climb_end[:, None], 0.0, 1.0)
+    down = np.clip((T - 1 - t) / (T - 1 - descent_start[:, None]).clip(min=1.0), 0.0, 1.0)
+    profile = np.minimum(up, down)
+
+    # Light moving-average smoothing keeps the jitter continuous between steps
+    smooth = _moving_average(noise, 5)
+
+    altitude = floor_alt[:, None] + (cruise_alt - floor_alt)[:, None] * profile + 40 * smooth[:, 0]
+    speed = 250 + (cruise_speed - 250)[:, None] * profile + 3 * smooth[:, 1]
+    g_force = 1.0 + 0.05 * noise[:, 2]
+
+    # Turbulence comes in bursts: a burst starts with probability
+    # turbulence_rate per step and lasts turbulence_length steps
+    starts = np.cumsum(events < turbulence_rate, axis=1)
+    lagged = np.zeros_like(starts)
+    lagged[:, turbulence_length:] = starts[:, :-turbulence_length]
+    turbulence = (starts - lagged) > 0
+    g_force += np.where(turbulence, 0.3 * np.abs(smooth[:, 2]), 0.0)
+
+    # Inject anomalies into a random subset of the fleet
+    anomaly = np.where(params[:, 5] < anomaly_rate,
+                       1 + (params[:, 6] * 3).astype(np.int8), ANOMALY_NONE).astype(np.int8)
+    anomaly_start = np.where(anomaly != ANOMALY_NONE,
+                             (T * (0.2 + 0.6 * params[:, 7])).astype(np.int64), -1)
+    steps_in = t[None, :] - anomaly_start[:, None]
+    active = (anomaly_start[:, None] >= 0) & (steps_in >= 0)
+
+    high_g = active & (anomaly == ANOMALY_HIGH_G)[:, None] & (steps_in < 3)
+    g_force = np.where(high_g, 2.6 + 1.2 * params[:, 8:9], g_force)
+
+    # Dive to 2500 ft over 10 steps, hold for 10, then climb back onto the
+    # profile over 30 so the trajectory stays continuous
+    dive_depth = np.clip(steps_in / 10.0, 0.0, 1.0) * np.clip((50 - steps_in) / 30.0, 0.0, 1.0)
+    dive = active & (anomaly == ANOMALY_TERRAIN)[:, None] & (dive_depth > 0)
+    altitude = np.where(dive, altitude + (2500 - altitude) * dive_depth, altitude)
+    speed = np.where(dive, np.maximum(speed, 260 + 60 * dive_depth), speed)
+
+    crash = active & (anomaly == ANOMALY_CRASH)[:, None]
+    impact = crash & (steps_in >= 10)
+    altitude = np.where(crash, altitude * np.clip(1 - steps_in / 10.0, 0.0, 1.0), altitude)
+    g_force = np.where(impact, 6.0 + params[:, 8:9], g_force)
+
+    # Straight-line routes, frozen at the point of impact
+    lat_min, lat_max, lon_min, lon_max = REGION
+    origin_lat, dest_lat = lat_min + (lat_max - lat_min) * route[:, 0:2].T
+    origin_lon, dest_lon = lon_min + (lon_max - lon_min) * route[:, 2:4].T
+    progress = np.broadcast_to(t / max(T - 1, 1), (n, T))
+    impact_step = np.where(anomaly == ANOMALY_CRASH, anomaly_start + 10, T)
+    progress = np.minimum(progress, np.minimum(impact_step, T - 1)[:, None] / max(T - 1, 1))
+    latitude = origin_lat[:, None] + (dest_lat - origin_lat)[:, None] * progress
+    longitude = origin_lon[:, None] + (dest_lon - origin_lon)[:, None] * progress
+
+    return {
+        "altitude": np.rint(altitude),
+        "speed": np.rint(speed),
+        "g_force": np.round(g_force, 1),
+        "turbulence": turbulence,
+        "latitude": np.round(latitude, 4),
+        "longitude": np.round(longitude, 4),
+        "registration": np.array(fleet_registrations(n)),
+        "anomaly": anomaly,
+        "anomaly_start": anomaly_start,
+    }
+
+
+def fleet_snapshot(fleet, step):
+    """
+    Return the fleet state at one time step as a dict of per-aircraft columns,
+    ready for detect_hazards_batch.
+    """
+    return {
+        "altitude": fleet["altitude"][:, step],
+        "speed": fleet["speed"][:, step],
+        "g_force": fleet["g_force"][:, step],
+        "turbulence": fleet["turbulence"][:, step],
+        "latitude": fleet["latitude"][:, step],
+        "longitude": fleet["longitude"][:, step],
+        "registration": fleet["registration"],
     }
 
 if __name__ == "__main__":
     # Print 5 sample data points
     for _ in range(5):
-        print(generate_flight_data()) 
\ No newline at end of file
+        print(generate_flight_data())
+
+    fleet = generate_fleet_trajectories(1000, 200, seed=42)
+    print(f"Fleet altitude array: {fleet['altitude'].shape}, "
+          f"{int((fleet['anomaly'] != ANOMALY_NONE).sum())} aircraft with injected anomalies")
+    print("First aircraft snapshot:", {k: v[0] for k, v in fleet_snapshot(fleet, 100).items()})
@@ -1,21 +1,45 @@
+from hazard_rules import get_active_rules
+
+# Bit flags used by the batch detector, one per hazard reported by detect_hazards.
+# They follow the order of hazard_rules.DEFAULT_HAZARD_RULES.
+HAZARD_HIGH_G = 1
+HAZARD_TERRAIN = 2
+HAZARD_TURBULENCE = 4
+
+
 def detect_hazards(data):
     """
     Analyze flight data and return a list of detected hazards.
+    Thresholds come from the active rule set in hazard_rules.
     """
-    hazards = []
-    if data["g_force"] > 2.5:
-        hazards.append("High G-Force! Possible collision risk.")
-    if data["altitude"] < 3000 and data["speed"] > 250:
-        hazards.append("Low Altitude & High Speed! Terrain risk.")
-    if data["turbulence"]:
-        hazards.append("Turbulence detected! Advise altitude change.")
-    return hazards
+    return get_active_rules().hazards(data)
 
 def check_crash(data):
     """
     Return True if crash conditions are detected, else False.
     """
-    return data["g_force"] > 5.0 or data["altitude"] < 1000
+    return get_active_rules().crashed(data)
+
+
+def detect_hazards_batch(columns):
+    """
+    Vectorized detect_hazards/check_crash over many samples at once.
+
+    `columns` is anything indexable by column name (a pandas DataFrame or a dict
+    of NumPy arrays) with altitude, speed, g_force and turbulence columns.
+    Returns (hazard_mask, crash_mask): an unsigned int array of HAZARD_* bits
+    and a bool array, both with one entry per sample.
+    """
+    return get_active_rules().batch(columns)
+
+
+def hazard_messages(mask):
+    """
+    Expand one hazard bitmask from detect_hazards_batch into the list of
+    messages detect_hazards would have returned for that sample.
+    """
+    return get_active_rules().messages_for(mask)
+
 
 if __name__ == "__main__":
     # Example usage with sample data
@@ -27,4 +51,8 @@ if __name__ == "__main__":
     }
     print("Sample Data:", sample_data)
     print("Hazards Detected:", detect_hazards(sample_data))
-    print("Crash Detected:", check_crash(sample_data)) 
\ No newline at end of file
+    print("Crash Detected:", check_crash(sample_data))
+
+    masks, crashes = detect_hazards_batch({k: [v] for k, v in sample_data.items()})
+    print("Batch Hazards:", hazard_messages(masks[0]))
+    print("Batch Crash:", bool(crashes[0]))
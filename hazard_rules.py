@@ -0,0 +1,310 @@
+import json
+import keyword
+import math
+import os
+import numpy as np
+
+# Threshold config shared by the data input page (which saves it), the
+# dashboard and the command line monitor (which load or watch it)
+RULES_PATH = os.environ.get("FLIGHT_RULES_PATH", "flight_rules.json")
+
+# Hazard and crash rules are plain data. Each rule has a name, a list of
+# (field, comparator, threshold) conditions joined by its combinator, the
+# cockpit severity, an optional ground-control severity and the message
+# reported when it fires.
+DEFAULT_HAZARD_RULES = [
+    {
+        "name": "high_g",
+        "conditions": [("g_force", ">", 2.5)],
+        "combinator": "all",
+        "severity": "WARNING",
+        "ground_severity": "ALERT",
+        "message": "High G-Force! Possible collision risk.",
+    },
+    {
+        "name": "terrain",
+        "conditions": [("altitude", "<", 3000), ("speed", ">", 250)],
+        "combinator": "all",
+        "severity": "CAUTION",
+        "ground_severity": "WARNING",
+        "message": "Low Altitude & High Speed! Terrain risk.",
+    },
+    {
+        "name": "turbulence",
+        "conditions": [("turbulence", "truthy", None)],
+        "combinator": "all",
+        "severity": "ADVISORY",
+        "ground_severity": None,
+        "message": "Turbulence detected! Advise altitude change.",
+    },
+]
+
+DEFAULT_CRASH_RULES = [
+    {
+        "name": "crash",
+        "conditions": [("g_force", ">", 5.0), ("altitude", "<", 1000)],
+        "combinator": "any",
+        "severity": "CRITICAL",
+        "message": "CRASH DETECTED",
+    },
+]
+
+COMPARATORS = {">", ">=", "<", "<=", "==", "!=", "truthy"}
+COMBINATORS = {"all": ("and", "&"), "any": ("or", "|")}
+ORDERING = {">", ">=", "<", "<="}
+# Threshold config keys read by rules_from_config, with their defaults
+CONFIG_DEFAULTS = {"g_force_warning": 2.5, "altitude_warning": 3000, "speed_warning": 250,
+                   "crash_threshold": 5.0, "crash_altitude": 1000}
+
+
+class CompiledRules:
+    """
+    A hazard/crash rule set compiled into one scalar and one batch predicate.
+
+    Both predicates are generated from the same rules, so scalar and batch
+    evaluation always agree. Hazard rule i sets bit 1 << i of the mask.
+    """
+
+    def __init__(self, hazard_rules, crash_rules):
+        self.hazard_rules = [dict(rule) for rule in hazard_rules]
+        self.crash_rules = [dict(rule) for rule in crash_rules]
+        self.messages = [rule["message"] for rule in self.hazard_rules]
+        self.bits = {rule["name"]: 1 << i for i, rule in enumerate(self.hazard_rules)}
+        self.by_message = {rule["message"]: rule for rule in self.hazard_rules}
+        if len(self.hazard_rules) <= 8:
+            self.mask_dtype = np.uint8
+        elif len(self.hazard_rules) <= 16:
+            self.mask_dtype = np.uint16
+        elif len(self.hazard_rules) <= 32:
+            self.mask_dtype = np.uint32
+        else:
+            self.mask_dtype = np.uint64
+        self.source = _generate_source(self.hazard_rules, self.crash_rules)
+        namespace = {"_asarray": np.asarray, "_mask_dtype": self.mask_dtype}
+        exec(compile(self.source, "<hazard_rules>", "exec"), namespace)
+        self.scalar = namespace["_scalar"]
+        self.batch = namespace["_batch"]
+
+    def hazards(self, data):
+        """Return the hazard messages for one telemetry dict"""
+        mask, _ = self.scalar(data)
+        return self.messages_for(mask) if mask else []
+
+    def crashed(self, data):
+        """Return True if any crash rule fires for one telemetry dict"""
+        return self.scalar(data)[1]
+
+    def margin(self, rule, data):
+        """
+        How far one sample is past a rule's numeric thresholds, as a fraction
+        of each threshold (the weakest condition for "all" rules, the strongest
+        for "any"). None for rules with only flag conditions.
+        """
+        margins = []
+        for field, comparator, threshold in rule["conditions"]:
+            if comparator in (">", ">="):
+                margins.append((data[field] - threshold) / (abs(threshold) or 1))
+            elif comparator in ("<", "<="):
+                margins.append((threshold - data[field]) / (abs(threshold) or 1))
+        if not margins:
+            return None
+        return min(margins) if rule.get("combinator", "all") == "all" else max(margins)
+
+    def messages_for(self, mask):
+        """Expand a hazard bitmask into its list of messages"""
+        mask = int(mask)
+        return [msg for i, msg in enumerate(self.messages) if mask >> i & 1]
+
+
+def _condition_source(field, comparator, threshold, batch):
+    if comparator not in COMPARATORS:
+        raise ValueError(f"Unknown comparator {comparator!r}")
+    if comparator == "truthy":
+        return f"_truthy_{field}" if batch else field
+    if isinstance(threshold, (bool, np.bool_)):
+        raise ValueError(f"Use the 'truthy' comparator for boolean field {field!r}")
+    if isinstance(threshold, (int, np.integer)):
+        threshold = int(threshold)
+    elif isinstance(threshold, (float, np.floating)):
+        threshold = float(threshold)
+        if not math.isfinite(threshold):
+            raise ValueError(f"Threshold for {field!r} must be finite, got {threshold!r}")
+    elif not isinstance(threshold, str):
+        raise ValueError(f"Threshold for {field!r} must be a number or string, got {threshold!r}")
+    elif comparator in ORDERING:
+        raise ValueError(f"Threshold for {field!r} {comparator} must be a number, got {threshold!r}")
+    return f"({field} {comparator} {threshold!r})"
+
+
+def _rule_source(rule, batch):
+    conditions = rule["conditions"]
+    if not conditions:
+        raise ValueError(f"Rule {rule['name']!r} has no conditions")
+    combinator = rule.get("combinator", "all")
+    if combinator not in COMBINATORS:
+        raise ValueError(f"Unknown combinator {combinator!r} in rule {rule['name']!r}")
+    joiner = COMBINATORS[combinator][1 if batch else 0]
+    parts = [_condition_source(f, c, t, batch) for f, c, t in conditions]
+    return "(" + f" {joiner} ".join(parts) + ")"
+
+
+def _generate_source(hazard_rules, crash_rules):
+    """Generate the Python source for the _scalar and _batch predicates"""
+    fields, truthy = [], []
+    for rule in hazard_rules + crash_rules:
+        for field, comparator, _ in rule["conditions"]:
+            if not field.isidentifier() or keyword.iskeyword(field) or field.startswith("_"):
+                raise ValueError(f"Invalid field name {field!r}")
+            if field not in fields:
+                fields.append(field)
+            if comparator == "truthy" and field not in truthy:
+                truthy.append(field)
+
+    lines = ["def _scalar(d):"]
+    lines += [f"    {f} = d[{f!r}]" for f in fields]
+    lines.append("    mask = 0")
+    for i, rule in enumerate(hazard_rules):
+        lines.append(f"    if {_rule_source(rule, False)}:")
+        lines.append(f"        mask |= {1 << i}")
+    crash = " or ".join(_rule_source(rule, False) for rule in crash_rules) or "False"
+    lines.append(f"    return mask, bool({crash})")
+    lines.append("")
+
+    lines.append("def _batch(c):")
+    lines += [f"    {f} = _asarray(c[{f!r}])" for f in fields]
+    lines += [f"    _truthy_{f} = {f}.astype(bool, copy=False)" for f in truthy]
+    size = fields[0] if fields else None
+    if hazard_rules:
+        terms = [f"({_rule_source(rule, True)}.astype(_mask_dtype) << {i})"
+                 for i, rule in enumerate(hazard_rules)]
+        lines.append("    mask = " + " | ".join(terms))
+    else:
+        lines.append(f"    mask = _asarray([0] * len({size}), dtype=_mask_dtype)")
+    if crash_rules:
+        lines.append("    crash = " + " | ".join(_rule_source(rule, True) for rule in crash_rules))
+    else:
+        lines.append(f"    crash = _asarray([False] * len({size}), dtype=bool)")
+    lines.append("    return _asarray(mask, dtype=_mask_dtype), _asarray(crash, dtype=bool)")
+    return "\n".join(lines) + "\n"
+
+
+_compiled_cache = {}
+
+def compile_rules(hazard_rules=None, crash_rules=None):
+    """
+    Compile rule definitions into a CompiledRules object. Identical rule sets
+    are compiled once and shared.
+    """
+    hazard_rules = DEFAULT_HAZARD_RULES if hazard_rules is None else hazard_rules
+    crash_rules = DEFAULT_CRASH_RULES if crash_rules is None else crash_rules
+    key = json.dumps([hazard_rules, crash_rules], sort_keys=True, default=str)
+    compiled = _compiled_cache.get(key)
+    if compiled is None:
+        compiled = _compiled_cache[key] = CompiledRules(hazard_rules, crash_rules)
+    return compiled
+
+
+def rules_from_config(config):
+    """
+    Build a CompiledRules from the threshold config saved by the data input
+    page (g_force_warning, altitude_warning, speed_warning, crash_threshold).
+    Missing keys keep their default thresholds; a config that is not an
+    object, or a threshold that is not a finite number, raises ValueError.
+    """
+    if not isinstance(config, dict):
+        raise ValueError(f"Threshold config must be a JSON object, got {type(config).__name__}")
+    values = dict(CONFIG_DEFAULTS)
+    for key in CONFIG_DEFAULTS:
+        value = config.get(key, values[key])
+        if (isinstance(value, (bool, np.bool_)) or not isinstance(value, (int, float, np.integer, np.floating))
+                or not math.isfinite(value)):
+            raise ValueError(f"Threshold {key!r} must be a finite number, got {value!r}")
+        values[key] = value
+    high_g, terrain, turbulence = (dict(rule) for rule in DEFAULT_HAZARD_RULES)
+    high_g["conditions"] = [("g_force", ">", values["g_force_warning"])]
+    terrain["conditions"] = [
+        ("altitude", "<", values["altitude_warning"]),
+        ("speed", ">", values["speed_warning"]),
+    ]
+    crash = dict(DEFAULT_CRASH_RULES[0])
+    crash["conditions"] = [
+        ("g_force", ">", values["crash_threshold"]),
+        ("altitude", "<", values["crash_altitude"]),
+    ]
+    return compile_rules([high_g, terrain, turbulence], [crash])
+
+
+_active_rules = compile_rules()
+
+def get_active_rules():
+    """Return the rule set currently used by hazard_detection"""
+    return _active_rules
+
+def configure(config=None):
+    """
+    Recompile the process-wide rule set from a threshold config; None restores
+    the defaults. Takes effect on the next detection call, no restart needed.
+    """
+    global _active_rules
+    _active_rules = compile_rules() if config is None else rules_from_config(config)
+    return _active_rules
+
+
+def load_config(path=RULES_PATH):
+    """Return the saved threshold config, or {} when none has been saved"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_config(config, path=RULES_PATH):
+    """
+    Write a threshold config where load_config and ConfigFileWatcher find it.
+    The file is replaced atomically so a watcher never reads it half written.
+    """
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(config, f, indent=2)
+    os.replace(tmp, path)
+
+
+class ConfigFileWatcher:
+    """Reconfigure the active rules whenever a JSON threshold file changes"""
+
+    def __init__(self, path):
+        self.path = path
+        self._mtime = None
+
+    def poll(self):
+        """
+        Reload the file if it changed since the last poll; return True if
+        reloaded. A file that cannot be read or compiled is reported once and
+        the rules in force are kept until it changes again.
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            with open(self.path) as f:
+                configure(json.load(f))
+        except (ValueError, TypeError, OSError) as e:
+            print(f"⚠️  Ignoring {self.path}, keeping the current thresholds: {e}")
+            return False
+        return True
+
+
+if __name__ == "__main__":
+    rules = get_active_rules()
+    print("Generated predicates:")
+    print(rules.source)
+    sample = {"altitude": 900, "speed": 300, "g_force": 5.5, "turbulence": True}
+    print("Hazards:", rules.hazards(sample))
+    print("Crash:", rules.crashed(sample))
+    strict = rules_from_config({"g_force_warning": 1.5, "crash_threshold": 4.0})
+    print("Strict config hazards for 2G:", strict.hazards({**sample, "altitude": 20000, "g_force": 2.0}))
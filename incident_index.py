@@ -0,0 +1,247 @@
+import functools
+import json
+import os
+import numpy as np
+from data_import import faa_cache_path, load_faa_ntsb_data, resolve_faa_source, source_fingerprint
+
+INDEX_VERSION = 1
+INDEX_DIR = "incidents"
+INDEX_COLUMNS = ["REGIST_NBR", "ACFT_MAKE_NAME", "ACFT_MODEL_NAME", "LOC_STATE_NAME",
+                 "LOC_CITY_NAME", "EVENT_TYPE_DESC", "EVENT_LCL_DATE"]
+# Lookups by registration, make/model and state
+GROUPS = ["registration", "make_model", "state"]
+# Per-incident text kept as codes into small tables, enough to describe an event
+DETAILS = ["event_type", "city", "state"]
+NAT = np.iinfo(np.int64).min
+# Histories are immutable, so recent lookups are memoized per registration
+HISTORY_CACHE_SIZE = 65536
+
+
+def normalize_registration(registration):
+    """
+    Canonical form of a registration: upper case without spaces or dashes,
+    and without the "N" prefix of US registrations, which the FAA data
+    sometimes leaves out.
+    """
+    if registration is None:
+        return ""
+    reg = str(registration).strip().upper().replace(" ", "").replace("-", "")
+    if reg in ("", "NAN", "NONE"):
+        return ""
+    if len(reg) > 1 and reg[0] == "N" and reg[1].isdigit():
+        reg = reg[1:]
+    return reg
+
+
+def _text(values):
+    return ["" if v is None or v != v else str(v).strip().upper() for v in values]
+
+
+def _encode(labels):
+    """Return (codes, table) for a list of strings"""
+    table, codes = np.unique(np.array(labels, dtype=str), return_inverse=True)
+    return codes.astype(np.int32), table
+
+
+def _group(labels, dates):
+    """
+    Group row offsets by label. Returns (keys, starts, rows): the rows of
+    keys[i] are rows[starts[i]:starts[i + 1]], most recent first. Rows with
+    an empty label are left out.
+    """
+    labels = np.array(labels, dtype=str)
+    valid = np.flatnonzero(labels != "")
+    keys, codes = np.unique(labels[valid], return_inverse=True)
+    dated = dates[valid]
+    # Newest first; undated incidents go last
+    recency = np.where(dated == NAT, np.iinfo(np.int64).max, -dated)
+    rows = valid[np.lexsort((recency, codes))].astype(np.int32)
+    starts = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=len(keys)), out=starts[1:])
+    return keys, starts, rows
+
+
+def _read_meta(path):
+    try:
+        with open(os.path.join(path, "meta.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class IncidentHistory:
+    """Prior incidents of one aircraft, as returned by IncidentIndex.history"""
+    __slots__ = ("registration", "count", "date", "event_type", "city", "state")
+
+    def __init__(self, registration, count, date, event_type, city, state):
+        self.registration = registration
+        self.count = count
+        self.date = date  # "YYYY-MM-DD" of the most recent incident, None if undated
+        self.event_type = event_type
+        self.city = city
+        self.state = state
+
+    @property
+    def latest(self):
+        """The most recent incident as display text"""
+        place = ", ".join(part for part in (self.city, self.state) if part)
+        return " ".join(part for part in (self.date or "undated", self.event_type.title(),
+                                          f"in {place.title()}" if place else "") if part)
+
+    def __str__(self):
+        plural = "" if self.count == 1 else "s"
+        return f"{self.count} prior FAA incident{plural}, latest {self.latest}"
+
+
+class IncidentIndex:
+    """
+    Prebuilt lookups into the FAA incident history.
+
+    Registrations, make/model pairs and states each map to a compact run of
+    incident-row offsets (rows of the frame from load_faa_ntsb_data, most
+    recent first) through a dict, so a lookup is a hash probe and a slice
+    rather than a scan of the frame. The arrays live in .npy files next to
+    the FAA cache and are memory-mapped on load; only the key dicts are
+    built in memory.
+    """
+
+    def __init__(self, rows, groups, details, dates, fingerprint=None):
+        self.rows = rows                # incidents in the source frame
+        self.fingerprint = fingerprint
+        self._groups = {name: ({key: i for i, key in enumerate(keys.tolist())}, starts, offsets)
+                        for name, (keys, starts, offsets) in groups.items()}
+        self._arrays = groups
+        self._details = details         # name -> (codes per incident, table)
+        self._tables = {name: table.tolist() for name, (_, table) in details.items()}
+        self._dates = dates             # int64 nanoseconds per incident, NAT if unknown
+        self._history = functools.lru_cache(maxsize=HISTORY_CACHE_SIZE)(self._history)
+
+    def __len__(self):
+        return self.rows
+
+    def _lookup(self, group, key):
+        index, starts, offsets = self._groups[group]
+        i = index.get(key)
+        if i is None:
+            return offsets[:0]
+        return offsets[starts[i]:starts[i + 1]]
+
+    def rows_for_registration(self, registration):
+        """Frame rows of every incident of one aircraft, most recent first"""
+        return self._lookup("registration", normalize_registration(registration))
+
+    def rows_for_model(self, make, model):
+        return self._lookup("make_model", f"{make} {model}".strip().upper())
+
+    def rows_for_state(self, state):
+        return self._lookup("state", str(state).strip().upper())
+
+    def history(self, registration):
+        """Return the IncidentHistory of an aircraft, or None when it has no incidents"""
+        return self._history(registration)
+
+    def _history(self, registration):
+        rows = self.rows_for_registration(registration)
+        if not len(rows):
+            return None
+        latest = rows[0]
+        date = self._dates[latest]
+        details = {name: self._tables[name][codes[latest]] for name, (codes, _) in self._details.items()}
+        return IncidentHistory(registration, len(rows),
+                               None if date == NAT else str(np.datetime64(int(date), "ns"))[:10],
+                               details["event_type"], details["city"], details["state"])
+
+    def save(self, path):
+        """Write the index as .npy files plus meta.json (written last, as in the FAA cache)"""
+        os.makedirs(path, exist_ok=True)
+        for name, (keys, starts, offsets) in self._arrays.items():
+            np.save(os.path.join(path, f"{name}_keys.npy"), keys)
+            np.save(os.path.join(path, f"{name}_starts.npy"), starts)
+            np.save(os.path.join(path, f"{name}_rows.npy"), offsets)
+        for name, (codes, table) in self._details.items():
+            np.save(os.path.join(path, f"{name}_codes.npy"), codes)
+            np.save(os.path.join(path, f"{name}_table.npy"), table)
+        np.save(os.path.join(path, "dates.npy"), self._dates)
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"version": INDEX_VERSION, "fingerprint": self.fingerprint, "rows": self.rows}, f)
+
+    @classmethod
+    def load(cls, path, meta=None):
+        """Load a saved index, memory-mapping its arrays"""
+        if meta is None:
+            meta = _read_meta(path)
+        def array(name):
+            # Plain ndarray views of the mapping: slicing a memmap is several times slower
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r").view(np.ndarray)
+        groups = {name: (np.load(os.path.join(path, f"{name}_keys.npy")), array(f"{name}_starts"),
+                         array(f"{name}_rows")) for name in GROUPS}
+        details = {name: (array(f"{name}_codes"), np.load(os.path.join(path, f"{name}_table.npy")))
+                   for name in DETAILS}
+        return cls(meta["rows"], groups, details, array("dates"), meta.get("fingerprint"))
+
+
+def build_incident_index(df, fingerprint=None):
+    """Build an IncidentIndex from an FAA frame (any subset of INDEX_COLUMNS)"""
+    n = len(df)
+    def column(name):
+        return _text(df[name].tolist()) if name in df.columns else [""] * n
+    if "EVENT_LCL_DATE" in df.columns:
+        dates = df["EVENT_LCL_DATE"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+    else:
+        dates = np.full(n, NAT, dtype=np.int64)
+    dates = np.ascontiguousarray(dates)
+    make, model, state = column("ACFT_MAKE_NAME"), column("ACFT_MODEL_NAME"), column("LOC_STATE_NAME")
+    registrations = [normalize_registration(r) for r in
+                     (df["REGIST_NBR"].tolist() if "REGIST_NBR" in df.columns else [None] * n)]
+    groups = {
+        "registration": _group(registrations, dates),
+        "make_model": _group([f"{a} {b}".strip() if a else "" for a, b in zip(make, model)], dates),
+        "state": _group(state, dates),
+    }
+    details = {
+        "event_type": _encode(column("EVENT_TYPE_DESC")),
+        "city": _encode(column("LOC_CITY_NAME")),
+        "state": _encode(state),
+    }
+    return IncidentIndex(n, groups, details, dates, fingerprint)
+
+
+def load_incident_index(source=None, cache_dir=None, refresh=False, offline=None):
+    """
+    Return the IncidentIndex of an FAA source, building and saving it next to
+    the source's columnar cache the first time, or when the source changed or
+    `refresh` is set. Loading a saved index needs neither pandas nor the FAA
+    frame. Raises FileNotFoundError like load_faa_ntsb_data when a build is
+    needed but the data is unavailable offline.
+    """
+    source = resolve_faa_source(source)
+    path = os.path.join(faa_cache_path(source, cache_dir), INDEX_DIR)
+    fingerprint = source_fingerprint(source)
+    meta = _read_meta(path)
+    if (not refresh and meta is not None and meta.get("version") == INDEX_VERSION
+            and meta.get("fingerprint") == fingerprint):
+        return IncidentIndex.load(path, meta)
+    df = load_faa_ntsb_data(source, columns=INDEX_COLUMNS, cache_dir=cache_dir, refresh=refresh,
+                            offline=offline, verbose=False)
+    index = build_incident_index(df, fingerprint)
+    index.save(path)
+    return index
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    try:
+        index = load_incident_index()
+    except (OSError, ValueError) as e:
+        print(f"❌ FAA data unavailable: {e}")
+        raise SystemExit(0)
+    print(f"📁 Incident index: {len(index)} incidents loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+    registrations, _, _ = index._arrays["registration"]
+    queries = [str(r) for r in registrations[:1000]] or ["N12345"]
+    start = time.perf_counter()
+    for reg in queries:
+        index.history(reg)
+    print(f"🔎 history() {(time.perf_counter() - start) / len(queries) * 1e6:.1f} µs/lookup")
+    print(f"   {queries[0]}: {index.history(queries[0])}")
@@ -1,56 +1,97 @@
+import argparse
+import asyncio
 import time
 import random
-from flight_sim import generate_flight_data
+from flight_sim import FLIGHT_SECONDS, FlightPath, generate_flight_data
 from hazard_detection import detect_hazards, check_crash
-from visualization import plot_flight
 from alert_system import AlertSystem
+from alert_dispatch import AlertDispatcher, ConsoleSink, FileSink
+from telemetry_buffer import TelemetryBuffer
+from fleet_monitor import monitor_fleet
+from sharded_monitor import monitor_fleet_sharded
+from telemetry_format import TelemetryWriter
+from hazard_rules import RULES_PATH, ConfigFileWatcher
+from temporal_detection import FleetDetector
+from proximity import ProximityDetector
+from incident_index import load_incident_index
+from metrics import get_registry, serve_metrics
 
-def main():
+def build_alert_system(alert_log=None, incident_history=False):
+    """
+    Create an AlertSystem printing to the console and optionally logging to a
+    file, with the FAA incident history of each aircraft if asked for.
+    """
+    sinks = [ConsoleSink()]
+    if alert_log:
+        sinks.append(FileSink(alert_log))
+    incidents = None
+    if incident_history:
+        try:
+            incidents = load_incident_index()
+            print(f"📁 FAA incident history: {len(incidents)} incidents indexed")
+        except (OSError, ValueError) as e:
+            print(f"⚠️  FAA incident history unavailable: {e}")
+    return AlertSystem(dispatcher=AlertDispatcher(sinks), incidents=incidents)
+
+def main(rules_watcher=None, alert_sys=None, recorder=None):
     print("🛩️  Flight Hazard Alert and Crash Response System")
     print("=" * 60)
     print("Real-Time Flight Hazard Detection and Automated Emergency Response")
     print("=" * 60)
     
     # Initialize alert system
-    alert_sys = AlertSystem()
+    if alert_sys is None:
+        alert_sys = AlertSystem()
     
     # Simulation parameters
     flight_duration = 25  # time steps
-    flight_data = []
+    flight_data = TelemetryBuffer(capacity=flight_duration)
     hazard_indices = []
     hazard_msgs = []
     
+    registration = f"N{random.randint(10000, 99999)}"
+    # One continuous track, the run counting as one FLIGHT_SECONDS flight
+    path = FlightPath(FLIGHT_SECONDS / max(flight_duration, 1))
+    registry = get_registry()
+    
     print(f"Starting flight simulation for {flight_duration} time steps...")
     print("Monitoring: Altitude, Speed, G-Force, Turbulence")
     print("-" * 60)
     
     for t in range(flight_duration):
+        # Pick up edited hazard thresholds without restarting
+        if rules_watcher is not None and rules_watcher.poll():
+            print(f"🔧 Hazard thresholds reloaded from {rules_watcher.path}")
+        
         # Generate flight data with aircraft registration
-        data = generate_flight_data()
-        data['registration'] = f"N{random.randint(10000, 99999)}"
+        with registry.timer("generate"):
+            data = generate_flight_data(path)
+            data['registration'] = registration
+            data['timestamp'] = time.time()
+        # Hazard-to-alert latency is measured from here to delivery
+        detected_ns = time.perf_counter_ns()
+        registry.inc("samples")
         flight_data.append(data)
+        if recorder is not None:
+            recorder.append(data)
         
         # Detect hazards
-        hazards = detect_hazards(data)
+        with registry.timer("detect"):
+            hazards = detect_hazards(data)
         if hazards:
             hazard_indices.append(t)
             hazard_msgs.append('; '.join(hazards))
             
             # Send appropriate alerts based on hazard severity
-            for hazard in hazards:
-                if "High G-Force" in hazard:
-                    alert_sys.send_cockpit_warning(hazard, "WARNING")
-                    alert_sys.send_ground_alert(data, hazard, "ALERT")
-                elif "Low Altitude" in hazard:
-                    alert_sys.send_cockpit_warning(hazard, "CAUTION")
-                    alert_sys.send_ground_alert(data, hazard, "WARNING")
-                elif "Turbulence" in hazard:
-                    alert_sys.send_cockpit_warning(hazard, "ADVISORY")
+            with registry.timer("alert"):
+                alert_sys.raise_hazard_alerts(data, hazards, detected_ns=detected_ns)
         
         # Check for crash
-        if check_crash(data):
+        with registry.timer("crash_check"):
+            crashed = check_crash(data)
+        if crashed:
             print(f"\n💥 CRASH DETECTED at time {t}!")
-            alert_sys.send_emergency_alert(data)
+            alert_sys.send_emergency_alert(data, detected_ns=detected_ns)
             break
         
         # Print status every 5 time steps
@@ -65,10 +106,16 @@ def main():
     
     # Show alert summary
     alert_sys.get_alert_summary()
+    alert_sys.close()
     
     # Generate visualization
     print("\n📊 Generating flight monitoring visualization...")
-    plot_flight(flight_data, hazard_indices, hazard_msgs)
+    # matplotlib is only loaded once there is something to plot, so a restarted
+    # monitor starts detecting hazards without waiting for it
+    from visualization import plot_flight
+    with registry.timer("render"):
+        plot_flight(flight_data, hazard_indices, hazard_msgs)
+    registry.print_summary()
     print("✅ System demonstration complete!")
     print("\n🎯 Key Features Demonstrated:")
     print("   • Real-time flight data monitoring")
@@ -78,5 +125,132 @@ def main():
     print("   • Visual flight monitoring dashboard")
     print("   • Integration with real FAA accident data")
 
+def main_fleet(n_aircraft, ticks, tick_interval, seed=None, rules_watcher=None, alert_sys=None,
+               recorder=None, temporal=None, proximity=None):
+    """Monitor a whole simulated fleet with the asyncio engine"""
+    print("🛩️  Flight Hazard Alert and Crash Response System - Fleet Mode")
+    print("=" * 60)
+    print(f"Monitoring {n_aircraft} aircraft for {ticks} ticks ({tick_interval}s per tick)")
+    print("-" * 60)
+    
+    monitor = asyncio.run(monitor_fleet(n_aircraft, ticks, tick_interval=tick_interval, seed=seed,
+                                        alert_sys=alert_sys, rules_watcher=rules_watcher,
+                                        recorder=recorder, temporal=temporal, proximity=proximity))
+    
+    print("-" * 60)
+    print("Fleet monitoring completed!")
+    print(f"Ticks monitored: {monitor.ticks_run} ({monitor.late_ticks} late)")
+    print(f"Total hazards detected: {monitor.total_hazards}")
+    print(f"Crashes detected: {monitor.crashes}")
+    if proximity is not None:
+        print(f"Separation conflicts: {monitor.conflicts}")
+    monitor.alert_sys.get_alert_summary()
+    monitor.alert_sys.close()
+    get_registry().print_summary()
+
+def main_sharded(n_aircraft, ticks, tick_interval, n_shards=None, seed=None, rules_watcher=None,
+                 alert_sys=None, incident_history=False):
+    """Monitor a whole simulated fleet across worker processes"""
+    print("🛩️  Flight Hazard Alert and Crash Response System - Sharded Fleet Mode")
+    print("=" * 60)
+    print(f"Monitoring {n_aircraft} aircraft for {ticks} ticks ({tick_interval}s per tick) "
+          f"on {n_shards or 'one per core'} shards")
+    print("-" * 60)
+    
+    monitor = monitor_fleet_sharded(n_aircraft, ticks, n_shards=n_shards, tick_interval=tick_interval,
+                                    seed=seed, alert_sys=alert_sys, rules_watcher=rules_watcher,
+                                    incident_history=incident_history)
+    
+    print("-" * 60)
+    print("Fleet monitoring completed!")
+    print(f"Ticks monitored: {monitor.ticks_run} ({monitor.late_ticks} late)")
+    print(f"Shard sizes: {monitor.shard_sizes()}")
+    print(f"Total hazards detected: {monitor.total_hazards}")
+    print(f"Crashes detected: {monitor.crashes}")
+    monitor.alert_sys.get_alert_summary()
+    monitor.alert_sys.close()
+    get_registry().print_summary()
+
+def main_replay(path, speed=None, alert_sys=None):
+    """Re-run a recorded telemetry file through hazard detection and alerting"""
+    from telemetry_replay import TelemetryReplay
+    print("🛩️  Flight Hazard Alert and Crash Response System - Replay Mode")
+    print("=" * 60)
+    pace = f"{speed}x real time" if speed else "as fast as possible"
+    print(f"Replaying {path} ({pace})")
+    print("-" * 60)
+    
+    # Replay keeps its own throttle on the recorded clock but shares delivery
+    # and the incident index with the rest of the run
+    replay = TelemetryReplay(dispatcher=alert_sys.dispatcher if alert_sys is not None else None,
+                             incidents=alert_sys.incidents if alert_sys is not None else None)
+    stats = replay.run(path, speed=speed).stats()
+    
+    print("-" * 60)
+    print("Replay completed!")
+    print(f"Samples replayed: {stats['samples']} in {stats['elapsed']:.1f}s "
+          f"({stats['samples_per_sec']:,.0f} samples/s)")
+    print(f"Total hazards detected: {stats['hazards']}")
+    print(f"Crashes detected: {stats['crashes']}")
+    replay.alert_sys.get_alert_summary()
+    replay.alert_sys.close()
+    get_registry().print_summary()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Flight Hazard Alert and Crash Response System")
+    parser.add_argument("--aircraft", type=int, default=1,
+                        help="number of aircraft to monitor; more than 1 runs the asyncio fleet engine")
+    parser.add_argument("--ticks", type=int, default=25, help="ticks to monitor in fleet mode")
+    parser.add_argument("--interval", type=float, default=0.2, help="seconds per tick in fleet mode")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for the simulated fleet")
+    parser.add_argument("--rules", default=RULES_PATH,
+                        help="JSON threshold config saved by the dashboard's data input page; reloaded when edited")
+    parser.add_argument("--alert-log", default=None, help="also append alerts to this JSON-lines file")
+    parser.add_argument("--replay", default=None,
+                        help="replay a recorded telemetry file (.ftlm, .csv, .jsonl or .npy) instead of simulating")
+    parser.add_argument("--speed", type=float, default=0,
+                        help="replay speed as a multiple of real time; 0 replays as fast as possible")
+    parser.add_argument("--record", default=None,
+                        help="append every simulated sample to this .ftlm telemetry recording")
+    parser.add_argument("--temporal", action="store_true",
+                        help="also run the sliding-window rules (rapid descent, sustained G, ...) in fleet mode")
+    parser.add_argument("--proximity", action="store_true",
+                        help="also check every pair of aircraft against the separation minima in fleet mode")
+    parser.add_argument("--incident-history", action="store_true",
+                        help="add each aircraft's prior FAA incidents to ground and crash alerts")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="split fleet monitoring across this many worker processes (0: one per core)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="serve Prometheus metrics at http://127.0.0.1:PORT/metrics during the run")
+    args = parser.parse_args(argv)
+    if args.shards != 1 and (args.temporal or args.proximity or args.record):
+        parser.error("--temporal, --proximity and --record need the single-process fleet engine (--shards 1)")
+    return args
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    args = parse_args()
+    watcher = ConfigFileWatcher(args.rules) if args.rules else None
+    alert_sys = build_alert_system(args.alert_log, incident_history=args.incident_history)
+    if args.metrics_port is not None:
+        print(f"📡 Metrics at {serve_metrics(args.metrics_port).url}")
+    recorder = TelemetryWriter(args.record) if args.record and not args.replay else None
+    try:
+        if args.replay:
+            main_replay(args.replay, speed=args.speed, alert_sys=alert_sys)
+        elif args.aircraft > 1 and args.shards != 1:
+            main_sharded(args.aircraft, args.ticks, args.interval, n_shards=args.shards or None,
+                         seed=args.seed, rules_watcher=watcher, alert_sys=alert_sys,
+                         incident_history=args.incident_history)
+        elif args.aircraft > 1:
+            main_fleet(args.aircraft, args.ticks, args.interval, seed=args.seed,
+                       rules_watcher=watcher, alert_sys=alert_sys, recorder=recorder,
+                       temporal=FleetDetector(args.aircraft, sample_interval=FLIGHT_SECONDS / args.ticks)
+                       if args.temporal else None,
+                       proximity=ProximityDetector(sample_interval=FLIGHT_SECONDS / args.ticks)
+                       if args.proximity else None)
+        else:
+            main(rules_watcher=watcher, alert_sys=alert_sys, recorder=recorder)
+    finally:
+        if recorder is not None:
+            recorder.close()
+            print(f"📼 Recorded {recorder.written} samples to {args.record}") 
\ No newline at end of file
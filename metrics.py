@@ -0,0 +1,265 @@
+import threading
+import time
+
+# Histogram resolution: 2**SUB_BUCKET_BITS linear sub-buckets per power of two,
+# i.e. every recorded value is kept to within 1/64 (~1.6%) of itself
+SUB_BUCKET_BITS = 7
+_SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_HALF = _SUB_BUCKETS >> 1
+_BUCKETS = _SUB_BUCKETS + _HALF * (64 - SUB_BUCKET_BITS)
+
+SUMMARY_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+PROMETHEUS_PREFIX = "flight_"
+
+
+def _bucket_index(value):
+    shift = max(0, value.bit_length() - SUB_BUCKET_BITS)
+    return (value >> shift) + _HALF * shift
+
+
+def _bucket_bounds(index):
+    """Return the [low, high) range of values counted in bucket `index`"""
+    if index < _SUB_BUCKETS:
+        return index, index + 1
+    shift = index // _HALF - 1
+    low = (index - _HALF * shift) << shift
+    return low, low + (1 << shift)
+
+
+class LatencyHistogram:
+    """
+    HDR-style latency histogram over integer nanoseconds.
+
+    Buckets are log-linear: exact below 128ns, then 64 equal sub-buckets per
+    power of two, so any quantile is reported within ~1.6% of the true value
+    from 1ns to centuries with a fixed 3.7k-slot table. Recording is a
+    handful of integer operations.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * _BUCKETS
+            self.count = 0
+            self.sum_ns = 0
+            self.min_ns = None
+            self.max_ns = 0
+
+    def record(self, ns):
+        ns = max(0, int(ns))
+        index = _bucket_index(ns)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum_ns += ns
+            if self.min_ns is None or ns < self.min_ns:
+                self.min_ns = ns
+            if ns > self.max_ns:
+                self.max_ns = ns
+
+    def quantile(self, q):
+        """Return the value at quantile q (0-1) in nanoseconds, 0 when empty"""
+        with self._lock:
+            if not self.count:
+                return 0
+            rank = max(1, round(q * self.count))
+            seen = 0
+            for index, n in enumerate(self._counts):
+                seen += n
+                if seen >= rank:
+                    low, high = _bucket_bounds(index)
+                    return min(self.max_ns, max(self.min_ns, (low + high - 1) // 2))
+        return self.max_ns
+
+    @property
+    def mean_ns(self):
+        return self.sum_ns / self.count if self.count else 0.0
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.record(time.perf_counter_ns() - self.start)
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters and per-stage latency histograms.
+
+    Counters are identified by name plus labels, e.g.
+    inc("hazards", type="high_g"). Stages are timed with
+    `with registry.timer("detect"):` or recorded directly in nanoseconds.
+    Everything renders as Prometheus text or a console summary.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def counter(self, name, **labels):
+        return self.counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def histogram(self, stage):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, LatencyHistogram())
+        return histogram
+
+    def timer(self, stage):
+        """Context manager recording the time spent inside it under `stage`"""
+        return _Timer(self.histogram(stage))
+
+    def observe_ns(self, stage, ns):
+        self.histogram(stage).record(ns)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def prometheus(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items())
+        typed = set()
+        for (name, labels), value in counters:
+            metric = f"{PROMETHEUS_PREFIX}{name}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_labels(labels)} {value}")
+        if histograms:
+            metric = f"{PROMETHEUS_PREFIX}latency_seconds"
+            lines.append(f"# HELP {metric} Latency per pipeline stage")
+            lines.append(f"# TYPE {metric} summary")
+            for stage, histogram in histograms:
+                for q in SUMMARY_QUANTILES:
+                    labels = _labels((("quantile", str(q)), ("stage", stage)))
+                    lines.append(f"{metric}{labels} {histogram.quantile(q) / 1e9:.9f}")
+                labels = _labels((("stage", stage),))
+                lines.append(f"{metric}_sum{labels} {histogram.sum_ns / 1e9:.9f}")
+                lines.append(f"{metric}_count{labels} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """Return counters and per-stage latency quantiles (in milliseconds)"""
+        stages = {}
+        for stage, histogram in sorted(self.histograms.items()):
+            stages[stage] = {
+                "count": histogram.count,
+                "mean_ms": histogram.mean_ns / 1e6,
+                "p50_ms": histogram.quantile(0.5) / 1e6,
+                "p99_ms": histogram.quantile(0.99) / 1e6,
+                "max_ms": histogram.max_ns / 1e6,
+            }
+        counters = {name + _labels(labels): value for (name, labels), value in sorted(self.counters.items())}
+        return {"counters": counters, "stages": stages}
+
+    def print_summary(self):
+        summary = self.summary()
+        print("\n⏱️  Stage Latency:")
+        print(f"   {'stage':<16}{'count':>9}{'mean ms':>11}{'p50 ms':>11}{'p99 ms':>11}{'max ms':>11}")
+        for stage, s in summary["stages"].items():
+            print(f"   {stage:<16}{s['count']:>9}{s['mean_ms']:>11.3f}{s['p50_ms']:>11.3f}"
+                  f"{s['p99_ms']:>11.3f}{s['max_ms']:>11.3f}")
+        print("📈 Counters:")
+        for name, value in summary["counters"].items():
+            print(f"   {name}: {value}")
+        return summary
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry():
+    """Return the process-wide MetricsRegistry"""
+    return _registry
+
+
+class MetricsServer:
+    """Serve a registry in Prometheus text format at http://host:port/metrics"""
+
+    def __init__(self, registry=None, host="127.0.0.1", port=9108):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry = registry if registry is not None else get_registry()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.url = f"http://{host}:{self.server.server_address[1]}/metrics"
+        self._thread = threading.Thread(target=self.server.serve_forever, name="metrics-server",
+                                        daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def serve_metrics(port=9108, host="127.0.0.1"):
+    """Start the process-wide metrics endpoint once; later calls return the same server"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = MetricsServer(host=host, port=port)
+        return _server
+
+
+if __name__ == "__main__":
+    import random
+    import urllib.request
+
+    registry = get_registry()
+    for _ in range(10000):
+        with registry.timer("detect"):
+            sum(range(random.randint(10, 200)))
+        registry.inc("samples")
+    registry.inc("hazards", 3, type="high_g")
+    server = MetricsServer(port=0)
+    with urllib.request.urlopen(server.url) as response:
+        print(response.read().decode())
+    registry.print_summary()
+    server.close()
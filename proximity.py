@@ -0,0 +1,187 @@
+import numpy as np
+from spatial_index import EARTH_RADIUS_NM, NM_PER_DEGREE
+
+# En-route radar separation minima
+LATERAL_MINIMUM_NM = 5.0
+VERTICAL_MINIMUM_FT = 1000.0
+
+# Half of the 27-cell neighbourhood: each unordered pair of neighbouring
+# cells is visited once, and pairs inside one cell are taken with i < j
+_HALF_NEIGHBOURS = [(dr, dc, dz)
+                    for dr in (-1, 0, 1) for dc in (-1, 0, 1) for dz in (-1, 0, 1)
+                    if (dr, dc, dz) > (0, 0, 0)]
+
+
+def haversine_nm(lat1, lon1, lat2, lon2):
+    """Vectorized great-circle distance in nautical miles"""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    a = (np.sin((phi2 - phi1) / 2) ** 2
+         + np.cos(phi1) * np.cos(phi2) * np.sin(np.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_NM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _expand_ranges(starts, stops):
+    """Concatenate arange(start, stop) for every pair, plus the owner of each element"""
+    counts = stops - starts
+    owners = np.repeat(np.arange(len(starts)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owners, starts[owners] + offsets
+
+
+def candidate_pairs(lat, lon, alt, lateral_nm=LATERAL_MINIMUM_NM, vertical_ft=VERTICAL_MINIMUM_FT):
+    """
+    Return index arrays (a, b) of every pair of aircraft in the same or
+    neighbouring cells of a 3-D hash grid, each pair once.
+
+    Cells are `lateral_nm` high, at least `lateral_nm` wide at every latitude
+    in the fleet, and `vertical_ft` deep, so every pair inside the minima is
+    among the candidates. Aircraft are sorted by cell key once; each of the
+    13 neighbour offsets is then one vectorized search over occupied cells.
+    """
+    n = len(lat)
+    if n < 2:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    lat_cell = lateral_nm / NM_PER_DEGREE
+    max_lat = min(float(np.abs(lat).max()) + lat_cell, 89.9)
+    # Columns divide 360 degrees evenly so neighbours wrap across the
+    # antimeridian, and there are at least three so wrapped neighbours differ
+    n_cols = max(3, int(360.0 // (lat_cell / np.cos(np.radians(max_lat)))))
+    lon_cell = 360.0 / n_cols
+    row = np.floor((lat + 90.0) / lat_cell).astype(np.int64)
+    col = np.floor((lon + 180.0) / lon_cell).astype(np.int64) % n_cols
+    level = np.floor(np.maximum(alt, 0.0) / vertical_ft).astype(np.int64) + 1
+    n_levels = int(level.max()) + 2
+
+    keys = (row * n_cols + col) * n_levels + level
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    first = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+    cells = sorted_keys[first]
+    counts = np.diff(np.append(first, n))
+
+    # Same cell: pairs (i, j) with i before j in the sorted order
+    owners, others = _expand_ranges(np.arange(n) + 1, np.repeat(first + counts, counts))
+    a_parts, b_parts = [order[owners]], [order[others]]
+
+    # Neighbouring cells: look up each occupied cell's neighbour among the
+    # occupied cells (the targets come out nearly sorted, which keeps the
+    # search cache friendly), then pair every member of one with every
+    # member of the other
+    cell_row = cells // (n_cols * n_levels)
+    cell_col = cells // n_levels % n_cols
+    cell_level = cells % n_levels
+    last = len(cells) - 1
+    for dr, dc, dz in _HALF_NEIGHBOURS:
+        target = ((cell_row + dr) * n_cols + (cell_col + dc) % n_cols) * n_levels + cell_level + dz
+        pos = np.minimum(np.searchsorted(cells, target), last)
+        src = np.flatnonzero(cells[pos] == target)
+        if not len(src):
+            continue
+        dst = pos[src]
+        pair, member = _expand_ranges(first[src], first[src] + counts[src])
+        dst = dst[pair]
+        owner, other = _expand_ranges(first[dst], first[dst] + counts[dst])
+        a_parts.append(order[member[owner]])
+        b_parts.append(order[other])
+    return np.concatenate(a_parts), np.concatenate(b_parts)
+
+
+def find_conflicts(lat, lon, alt, lateral_nm=LATERAL_MINIMUM_NM, vertical_ft=VERTICAL_MINIMUM_FT):
+    """
+    Return every pair of aircraft closer than both minima as a dict of
+    columns: a, b (indices, a < b), distance_nm and vertical_ft.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    alt = np.asarray(alt, dtype=np.float64)
+    a, b = candidate_pairs(lat, lon, alt, lateral_nm, vertical_ft)
+    vertical = np.abs(alt[a] - alt[b])
+    close = vertical < vertical_ft
+    a, b, vertical = a[close], b[close], vertical[close]
+    distance = haversine_nm(lat[a], lon[a], lat[b], lon[b])
+    close = distance < lateral_nm
+    a, b = a[close], b[close]
+    swap = a > b
+    a, b = np.where(swap, b, a), np.where(swap, a, b)
+    order = np.lexsort((b, a))
+    return {
+        "a": a[order],
+        "b": b[order],
+        "distance_nm": distance[close][order],
+        "vertical_ft": vertical[close][order],
+    }
+
+
+class ProximityDetector:
+    """
+    Loss-of-separation detector for a fixed fleet.
+
+    Each update takes one fleet snapshot (columns with latitude, longitude
+    and altitude, one row per aircraft) and returns the conflicting pairs
+    with their closing rates. Closing rates compare each pair with its
+    positions at the previous update, taken `sample_interval` seconds
+    earlier unless a time is given; they are NaN on the first update.
+    """
+
+    def __init__(self, lateral_nm=LATERAL_MINIMUM_NM, vertical_ft=VERTICAL_MINIMUM_FT, sample_interval=1.0):
+        self.lateral_nm = lateral_nm
+        self.vertical_ft = vertical_ft
+        self.sample_interval = sample_interval
+        self.samples = 0
+        self._previous = None
+
+    def update(self, columns, t=None, active=None):
+        """
+        Find the conflicts in one snapshot. Rows where `active` is False are
+        ignored. Returns find_conflicts' columns plus closing_kt (positive
+        when converging) and vertical_rate_fpm (positive when the vertical
+        gap shrinks), indexed by fleet row.
+        """
+        if t is None:
+            t = self.samples * self.sample_interval
+        self.samples += 1
+        lat = np.asarray(columns["latitude"], dtype=np.float64)
+        lon = np.asarray(columns["longitude"], dtype=np.float64)
+        alt = np.asarray(columns["altitude"], dtype=np.float64)
+        rows = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon)
+                              & (True if active is None else np.asarray(active)))
+        conflicts = find_conflicts(lat[rows], lon[rows], alt[rows], self.lateral_nm, self.vertical_ft)
+        a, b = rows[conflicts["a"]], rows[conflicts["b"]]
+        conflicts["a"], conflicts["b"] = a, b
+
+        closing = np.full(len(a), np.nan)
+        vertical_rate = np.full(len(a), np.nan)
+        if self._previous is not None:
+            prev_t, prev_lat, prev_lon, prev_alt = self._previous
+            elapsed = t - prev_t
+            if elapsed > 0:
+                before = haversine_nm(prev_lat[a], prev_lon[a], prev_lat[b], prev_lon[b])
+                closing = (before - conflicts["distance_nm"]) / (elapsed / 3600.0)
+                vertical_rate = (np.abs(prev_alt[a] - prev_alt[b]) - conflicts["vertical_ft"]) / (elapsed / 60.0)
+        conflicts["closing_kt"] = closing
+        conflicts["vertical_rate_fpm"] = vertical_rate
+        self._previous = (t, lat.copy(), lon.copy(), alt.copy())
+        return conflicts
+
+
+if __name__ == "__main__":
+    import time
+    from flight_sim import FLIGHT_SECONDS, generate_fleet_trajectories, fleet_snapshot
+
+    ticks = 100
+    fleet = generate_fleet_trajectories(10000, ticks, seed=11)
+    detector = ProximityDetector(sample_interval=FLIGHT_SECONDS / ticks)
+    pairs, elapsed = 0, []
+    for tick in range(ticks):
+        start = time.perf_counter()
+        conflicts = detector.update(fleet_snapshot(fleet, tick))
+        elapsed.append(time.perf_counter() - start)
+        pairs += len(conflicts["a"])
+    print(f"✈️  10000 aircraft, {ticks} ticks: {pairs} conflict pairs, "
+          f"{np.median(elapsed) * 1000:.1f} ms median per tick")
+    if len(conflicts["a"]):
+        i = 0
+        print(f"   {fleet['registration'][conflicts['a'][i]]} / {fleet['registration'][conflicts['b'][i]]}: "
+              f"{conflicts['distance_nm'][i]:.2f} nm, {conflicts['vertical_ft'][i]:.0f} ft apart, "
+              f"closing at {conflicts['closing_kt'][i]:.0f} kt")
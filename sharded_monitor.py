@@ -0,0 +1,341 @@
+import multiprocessing as mp
+import queue
+import time
+import zlib
+from multiprocessing import shared_memory
+import numpy as np
+from flight_sim import generate_fleet_trajectories
+from hazard_detection import detect_hazards_batch, hazard_messages
+from hazard_rules import ConfigFileWatcher
+from alert_system import AlertSystem
+from metrics import MetricsRegistry, get_registry
+
+# Telemetry columns held in shared memory, widest first so every column stays aligned
+SHARD_COLUMNS = [("altitude", np.float64), ("speed", np.float64), ("g_force", np.float64),
+                 ("latitude", np.float64), ("longitude", np.float64), ("turbulence", np.bool_)]
+# Ticks each shard may have in flight; the coordinator waits when a shard falls this far behind
+DEFAULT_SLOTS = 4
+# How often the coordinator checks that workers are still alive while waiting
+WORKER_POLL_SECONDS = 1.0
+# Workers start from a fresh interpreter instead of forking the coordinator
+# with its alert-dispatch threads running
+START_METHOD = "spawn"
+
+
+def shard_of(registration, n_shards):
+    """Shard of an aircraft; crc32 rather than hash() so it is stable across processes"""
+    return zlib.crc32(str(registration).encode("utf-8")) % n_shards
+
+
+class SharedColumns:
+    """
+    One shard's telemetry in a single shared-memory block: `slots` rows of
+    `size` samples per column, so the coordinator can fill the next tick
+    while the worker still reads the previous one. Created by the
+    coordinator, attached by name in the worker.
+    """
+
+    def __init__(self, size, slots=DEFAULT_SLOTS, name=None):
+        nbytes = sum(np.dtype(dtype).itemsize for _, dtype in SHARD_COLUMNS) * size * slots
+        self.size = size
+        self.slots = slots
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=max(nbytes, 1))
+        self.name = self.shm.name
+        self.columns = {}
+        offset = 0
+        for column, dtype in SHARD_COLUMNS:
+            array = np.ndarray((slots, size), dtype=dtype, buffer=self.shm.buf, offset=offset)
+            self.columns[column] = array
+            offset += array.nbytes
+
+    def write(self, slot, columns):
+        for name, array in self.columns.items():
+            array[slot] = columns[name]
+
+    def snapshot(self, slot):
+        """One tick of the shard as columns for detect_hazards_batch (views, not copies)"""
+        return {name: array[slot] for name, array in self.columns.items()}
+
+    def close(self):
+        # The views must go before the mapping can be closed
+        self.columns = {}
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+class _Collector:
+    """Stands in for AlertDispatcher in a worker: keeps admitted alerts for the coordinator"""
+
+    def __init__(self):
+        self.records = []
+
+    def submit(self, record, critical=False):
+        self.records.append(record)
+        return True
+
+    def drain(self):
+        records, self.records = self.records, []
+        return records
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _shard_worker(shard, registrations, buffer_name, slots, tasks, results, rules_path=None,
+                  incident_history=False):
+    """
+    Detection loop of one shard. Each task names a tick and the buffer slot
+    holding it; the worker scores the slot, raises alerts through its own
+    AlertSystem (throttle state is per registration, so it shards exactly)
+    and returns the admitted AlertRecords with the counters they produced.
+    """
+    buffers = SharedColumns(len(registrations), slots, name=buffer_name)
+    registry = MetricsRegistry()
+    incidents = None
+    if incident_history:
+        from incident_index import load_incident_index
+        try:
+            incidents = load_incident_index()
+        except (OSError, ValueError):
+            pass
+    collector = _Collector()
+    alert_sys = AlertSystem(dispatcher=collector, registry=registry, incidents=incidents)
+    watcher = ConfigFileWatcher(rules_path) if rules_path else None
+    active = np.ones(len(registrations), dtype=bool)
+    registrations = registrations.tolist()
+    results.put(shard)  # ready
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            tick, slot, detected_ns = task
+            if watcher is not None:
+                watcher.poll()
+            start = time.perf_counter_ns()
+            snapshot = buffers.snapshot(slot)
+            masks, crashes = detect_hazards_batch(snapshot)
+            masks[~active] = 0
+            crashes &= active
+            flagged = np.flatnonzero(masks | crashes)
+            hazards = 0
+            for idx in flagged.tolist():
+                data = {
+                    "registration": registrations[idx],
+                    "altitude": int(snapshot["altitude"][idx]),
+                    "speed": int(snapshot["speed"][idx]),
+                    "g_force": float(snapshot["g_force"][idx]),
+                    "turbulence": bool(snapshot["turbulence"][idx]),
+                    "latitude": float(snapshot["latitude"][idx]),
+                    "longitude": float(snapshot["longitude"][idx]),
+                }
+                messages = hazard_messages(masks[idx])
+                if messages:
+                    hazards += len(messages)
+                    alert_sys.raise_hazard_alerts(data, messages, detected_ns=detected_ns)
+                if crashes[idx]:
+                    active[idx] = False
+                    alert_sys.send_emergency_alert(data, detected_ns=detected_ns)
+            del snapshot
+            counters, registry.counters = registry.counters, {}
+            escalated, alert_sys.throttle.escalated = alert_sys.throttle.escalated, 0
+            results.put((shard, tick, collector.drain(), counters, escalated, len(flagged), hazards,
+                         int(crashes.sum()), int(active.sum()), time.perf_counter_ns() - start))
+    finally:
+        buffers.close()
+
+
+class ShardedMonitor:
+    """
+    Fleet monitoring spread over worker processes.
+
+    Aircraft are partitioned by a stable hash of their registration into
+    `n_shards` shards, each with its own worker process and shared-memory
+    telemetry buffers. The coordinator copies each tick of a shard into a
+    free buffer slot (a contiguous copy: the fleet is laid out in shard
+    order once) and hands the slot to the worker, which runs hazard and
+    crash detection and the alert throttle for its aircraft. Only the alerts
+    that survive throttling come back, and the coordinator stores and
+    delivers them through the AlertSystem it owns. Detection and throttling
+    therefore scale with the number of workers; the coordinator's share is
+    the memcpy per tick plus delivery.
+    """
+
+    def __init__(self, fleet, n_shards=None, alert_sys=None, tick_interval=0.2, slots=DEFAULT_SLOTS,
+                 verbose=True, rules_watcher=None, incident_history=False):
+        self.n_shards = n_shards or mp.cpu_count()
+        self.rules_watcher = rules_watcher
+        self.alert_sys = alert_sys if alert_sys is not None else AlertSystem()
+        self.registry = get_registry()
+        self.tick_interval = tick_interval
+        self.slots = slots
+        self.verbose = verbose
+        self.incident_history = incident_history
+        self.n_aircraft = len(fleet["registration"])
+        self.n_ticks = fleet["altitude"].shape[1]
+
+        shards = np.array([shard_of(reg, self.n_shards) for reg in fleet["registration"].tolist()],
+                          dtype=np.int64)
+        order = np.argsort(shards, kind="stable")
+        self.bounds = np.searchsorted(shards[order], np.arange(self.n_shards + 1))
+        self.registrations = fleet["registration"][order]
+        # (ticks, aircraft) in shard order, so one tick of one shard is a contiguous run
+        self.columns = {name: np.ascontiguousarray(fleet[name][order].T) for name, _ in SHARD_COLUMNS}
+
+        self.ticks_run = 0
+        self.total_hazards = 0
+        self.crashes = 0
+        self.late_ticks = 0
+        self._flagged = 0
+        self._active = [int(hi - lo) for lo, hi in zip(self.bounds[:-1], self.bounds[1:])]
+        self._completed = [0] * self.n_shards
+        self._in_flight = [0] * self.n_shards
+        self._buffers = []
+        self._tasks = []
+        self._workers = []
+        self._results = None
+
+    def shard_sizes(self):
+        return np.diff(self.bounds).tolist()
+
+    def _start(self):
+        context = mp.get_context(START_METHOD)
+        rules_path = self.rules_watcher.path if self.rules_watcher is not None else None
+        self._results = context.Queue()
+        for shard in range(self.n_shards):
+            lo, hi = self.bounds[shard], self.bounds[shard + 1]
+            # Track each resource as soon as it exists so _stop can release it
+            buffers = SharedColumns(int(hi - lo), self.slots)
+            self._buffers.append(buffers)
+            tasks = context.Queue()
+            self._tasks.append(tasks)
+            worker = context.Process(target=_shard_worker, name=f"shard-{shard}", daemon=True,
+                                     args=(shard, self.registrations[lo:hi], buffers.name, self.slots,
+                                           tasks, self._results, rules_path, self.incident_history))
+            worker.start()
+            self._workers.append(worker)
+        # Start the tick clock only once every worker has attached its buffers
+        for _ in range(self.n_shards):
+            self._next_result()
+
+    def _stop(self):
+        for tasks in self._tasks:
+            tasks.put(None)
+        for worker in self._workers:
+            worker.join(timeout=10)
+            if worker.is_alive():
+                worker.terminate()
+        for buffers in self._buffers:
+            buffers.close()
+            buffers.unlink()
+        self._buffers, self._tasks, self._workers = [], [], []
+
+    def _next_result(self, block=True):
+        """Next message from the workers, or None if none is ready and block is False"""
+        while True:
+            try:
+                return self._results.get(timeout=WORKER_POLL_SECONDS) if block else self._results.get_nowait()
+            except queue.Empty:
+                if not block:
+                    return None
+                dead = [w.name for w in self._workers if not w.is_alive()]
+                if dead:
+                    raise RuntimeError(f"Shard worker exited unexpectedly: {', '.join(dead)}")
+
+    def _collect(self, block=True):
+        """Merge one worker result into the coordinator; False if none was ready"""
+        result = self._next_result(block)
+        if result is None:
+            return False
+        shard, tick, records, counters, escalated, flagged, hazards, crashes, active, detect_ns = result
+        self._in_flight[shard] -= 1
+        self._completed[shard] = tick + 1
+        self._active[shard] = active
+        self._flagged += flagged
+        self.total_hazards += hazards
+        self.crashes += crashes
+        self.registry.observe_ns("detect", detect_ns)
+        for (name, labels), value in counters.items():
+            self.registry.inc(name, value, **dict(labels))
+            if name == "alerts_suppressed":
+                self.alert_sys.alert_history.suppressed[dict(labels)["sink"]] += value
+        self.alert_sys.throttle.escalated += escalated
+        start = time.perf_counter_ns()
+        for record in records:
+            self.alert_sys.accept_alert(record)
+        self.registry.observe_ns("alert", time.perf_counter_ns() - start)
+        return True
+
+    def run(self, ticks=None):
+        """Monitor the fleet for `ticks` ticks (default: the whole recorded fleet)"""
+        ticks = self.n_ticks if ticks is None else min(ticks, self.n_ticks)
+        try:
+            # Inside the try: a worker dying during startup must still free the shared memory
+            self._start()
+            start = time.monotonic()
+            for tick in range(ticks):
+                if not any(self._active):
+                    break
+                delay = start + tick * self.tick_interval - time.monotonic()
+                if delay > 0:
+                    # Merge results while waiting for the next tick
+                    while delay > 0 and self._collect(block=False):
+                        delay = start + tick * self.tick_interval - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                elif tick and self.tick_interval > 0:
+                    self.late_ticks += 1
+                # Every worker polls the same file; this only reports the reload
+                if self.rules_watcher is not None and self.rules_watcher.poll():
+                    print(f"🔧 Hazard thresholds reloaded from {self.rules_watcher.path}")
+                detected_ns = time.perf_counter_ns()
+                for shard in range(self.n_shards):
+                    while self._in_flight[shard] >= self.slots:
+                        self._collect()
+                    lo, hi = self.bounds[shard], self.bounds[shard + 1]
+                    self._buffers[shard].write(tick % self.slots,
+                                               {name: column[tick, lo:hi] for name, column in self.columns.items()})
+                    self._tasks[shard].put((tick, tick % self.slots, detected_ns))
+                    self._in_flight[shard] += 1
+                while self._collect(block=False):
+                    pass
+                if self.verbose and tick % 5 == 0:
+                    print(f"⏰ Tick {tick:3d}: {sum(self._active)} aircraft active, "
+                          f"{self._flagged} flagged, {self.crashes} crashes so far")
+            while any(self._in_flight):
+                self._collect()
+        finally:
+            self._stop()
+        self.ticks_run = min(self._completed)
+        return self
+
+
+def monitor_fleet_sharded(n_aircraft, ticks, n_shards=None, tick_interval=0.2, seed=None, alert_sys=None,
+                          rules_watcher=None, incident_history=False, verbose=True):
+    """Simulate a fleet of n_aircraft and monitor it for `ticks` ticks across n_shards processes"""
+    fleet = generate_fleet_trajectories(n_aircraft, ticks, seed=seed)
+    monitor = ShardedMonitor(fleet, n_shards=n_shards, alert_sys=alert_sys, tick_interval=tick_interval,
+                             verbose=verbose, rules_watcher=rules_watcher, incident_history=incident_history)
+    return monitor.run(ticks)
+
+
+if __name__ == "__main__":
+    from alert_dispatch import AlertDispatcher
+
+    fleet = generate_fleet_trajectories(20000, 50, seed=7)
+    for n_shards in sorted({1, 2, mp.cpu_count()}):
+        alert_sys = AlertSystem(dispatcher=AlertDispatcher(sinks=[]))
+        monitor = ShardedMonitor(fleet, n_shards=n_shards, alert_sys=alert_sys, tick_interval=0, verbose=False)
+        start = time.perf_counter()
+        monitor.run()
+        elapsed = time.perf_counter() - start
+        alert_sys.close()
+        print(f"🧩 {n_shards:2d} shards: {monitor.ticks_run} ticks of {monitor.n_aircraft} aircraft in "
+              f"{elapsed:.2f}s ({monitor.ticks_run * monitor.n_aircraft / elapsed:,.0f} samples/s), "
+              f"{monitor.total_hazards} hazards, {monitor.crashes} crashes, "
+              f"{alert_sys.alert_history.total} alerts")
@@ -0,0 +1,154 @@
+import random
+import threading
+import time
+from collections import deque
+from itertools import islice
+from alert_system import AlertSystem
+from flight_sim import FLIGHT_SECONDS, FlightPath, generate_flight_data
+from hazard_rules import get_active_rules
+from metrics import get_registry
+from telemetry_buffer import TelemetryBuffer
+
+
+class SimulationEngine:
+    """
+    One flight simulation shared by every viewer in the process.
+
+    Runs on a background thread and writes telemetry, hazards and alerts into
+    shared buffers. Viewers never drive the simulation; they call view() with
+    the hazard sequence number they saw last and get back only what is new,
+    so each extra viewer costs a read rather than another simulation.
+    """
+
+    def __init__(self, capacity=1000, alert_sys=None):
+        self.lock = threading.Lock()
+        self.telemetry = TelemetryBuffer(capacity)
+        # Hazard records carry a run-wide sequence number so viewers can ask for deltas
+        self.hazards = deque(maxlen=capacity)
+        self.hazard_total = 0
+        self.alert_system = alert_sys if alert_sys is not None else AlertSystem()
+        self.run_id = 0
+        self.duration = 0
+        self.steps = 0
+        self.crashed_at = None
+        self.running = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, duration, step_interval=0.5, rules=None):
+        """Start a new run unless one is in progress; return whether it started"""
+        with self.lock:
+            if self.running:
+                return False
+            self.telemetry.clear()
+            self.hazards.clear()
+            self.hazard_total = 0
+            self.run_id += 1
+            self.duration = duration
+            self.steps = 0
+            self.crashed_at = None
+            self.running = True
+            self._stop.clear()
+        rules = rules if rules is not None else get_active_rules()
+        self._thread = threading.Thread(target=self._run, args=(duration, step_interval, rules),
+                                        name="sim-engine", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout=None):
+        """Stop the current run and wait for the thread to exit"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, duration, step_interval, rules):
+        # One aircraft per run, so alerts are throttled per registration
+        registration = f"N{random.randint(10000, 99999)}"
+        path = FlightPath(FLIGHT_SECONDS / max(duration, 1))
+        registry = get_registry()
+        try:
+            for t in range(duration):
+                with registry.timer("generate"):
+                    data = generate_flight_data(path)
+                    data['registration'] = registration
+                    data['timestamp'] = time.time()
+                detected_ns = time.perf_counter_ns()
+                registry.inc("samples")
+                with registry.timer("detect"):
+                    hazards = rules.hazards(data)
+                with registry.timer("crash_check"):
+                    crashed = rules.crashed(data)
+                with self.lock:
+                    self.telemetry.append(data)
+                    if hazards:
+                        self.hazards.append({'seq': self.hazard_total, 'time': t,
+                                             'hazards': hazards, 'data': data})
+                        self.hazard_total += 1
+                    self.steps = t + 1
+                    if crashed:
+                        self.crashed_at = t
+                # Alerts are raised outside the lock; viewers never wait on delivery
+                if hazards:
+                    with registry.timer("alert"):
+                        self.alert_system.raise_hazard_alerts(data, hazards, rules, detected_ns)
+                if crashed:
+                    self.alert_system.send_emergency_alert(data, detected_ns)
+                    break
+                if self._stop.wait(step_interval):
+                    break
+        finally:
+            with self.lock:
+                self.running = False
+
+    def view(self, hazard_seq=0):
+        """
+        Return the engine state plus the hazards with seq >= `hazard_seq`.
+        Hold `lock` while reading `telemetry` alongside it.
+        """
+        with self.lock:
+            first = self.hazard_total - len(self.hazards)
+            new = list(islice(self.hazards, max(0, hazard_seq - first), None))
+            return {
+                'run_id': self.run_id,
+                'running': self.running,
+                'steps': self.steps,
+                'duration': self.duration,
+                'crashed_at': self.crashed_at,
+                'hazard_total': self.hazard_total,
+                'new_hazards': new,
+            }
+
+    def hazard_history(self):
+        """Return the retained hazard records for the current run, oldest first"""
+        with self.lock:
+            return list(self.hazards)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine(capacity=1000):
+    """Return the process-wide SimulationEngine, creating it on first use"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SimulationEngine(capacity)
+        return _engine
+
+
+if __name__ == "__main__":
+    engine = get_engine()
+    engine.start(duration=25, step_interval=0.05)
+    seen = 0
+    while True:
+        state = engine.view(seen)
+        for hazard in state['new_hazards']:
+            print(f"⚠️ Step {hazard['time']}: {', '.join(hazard['hazards'])}")
+        seen = state['hazard_total']
+        if not state['running']:
+            break
+        time.sleep(0.1)
+    print(f"✅ Run {state['run_id']} finished after {state['steps']} steps"
+          + (f", crash at step {state['crashed_at']}" if state['crashed_at'] is not None else ""))
+    engine.alert_system.get_alert_summary()
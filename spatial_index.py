@@ -0,0 +1,204 @@
+import csv
+import math
+
+EARTH_RADIUS_NM = 3440.065
+NM_PER_DEGREE = 60.0           # one degree of latitude
+DEFAULT_CELL_DEG = 1.0
+
+# Local table of search-and-rescue bases: US Coast Guard air stations and
+# USAF rescue wings, at approximate airfield coordinates. Replace or extend
+# it with load_rescue_bases for other regions.
+RESCUE_BASES = [
+    ("USCG Air Station Cape Cod", 41.66, -70.52),
+    ("USCG Air Station Atlantic City", 39.46, -74.58),
+    ("USCG Air Station Elizabeth City", 36.26, -76.17),
+    ("USCG Air Station Savannah", 32.01, -81.15),
+    ("USCG Air Station Clearwater", 27.91, -82.69),
+    ("USCG Air Station Miami", 25.91, -80.28),
+    ("USCG Air Station Borinquen", 18.50, -67.13),
+    ("USCG Aviation Training Center Mobile", 30.63, -88.07),
+    ("USCG Air Station New Orleans", 29.83, -90.03),
+    ("USCG Air Station Houston", 29.65, -95.28),
+    ("USCG Air Station Corpus Christi", 27.69, -97.29),
+    ("USCG Air Station Traverse City", 44.74, -85.58),
+    ("USCG Air Station Detroit", 42.61, -82.83),
+    ("USCG Air Station San Diego", 32.73, -117.18),
+    ("USCG Air Station Los Angeles", 33.94, -118.41),
+    ("USCG Air Station San Francisco", 37.63, -122.39),
+    ("USCG Air Station Sacramento", 38.67, -121.40),
+    ("USCG Air Station Humboldt Bay", 40.98, -124.11),
+    ("USCG Air Station North Bend", 43.41, -124.24),
+    ("USCG Air Station Astoria", 46.16, -123.88),
+    ("USCG Air Station Port Angeles", 48.14, -123.41),
+    ("USCG Air Station Sitka", 57.05, -135.36),
+    ("USCG Air Station Kodiak", 57.75, -152.49),
+    ("USCG Air Station Barbers Point", 21.31, -158.07),
+    ("USAF 920th Rescue Wing, Patrick SFB", 28.23, -80.61),
+    ("USAF 347th Rescue Group, Moody AFB", 30.97, -83.19),
+    ("USAF 563rd Rescue Group, Davis-Monthan AFB", 32.17, -110.88),
+    ("USAF 58th Rescue Squadron, Nellis AFB", 36.24, -115.03),
+    ("USAF 129th Rescue Wing, Moffett Field", 37.42, -122.05),
+    ("USAF 106th Rescue Wing, Gabreski Airport", 40.84, -72.63),
+    ("USAF 176th Wing, Joint Base Elmendorf-Richardson", 61.25, -149.81),
+]
+
+
+def haversine_nm(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in nautical miles"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_NM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """
+    Uniform latitude/longitude grid over points.
+
+    Each point is stored under a hashable key (a registration, an
+    AlertRecord, a base name) in the cell holding its position. Radius and
+    nearest-neighbour queries only visit the cells a search circle can
+    reach, so they cost in proportion to the points nearby rather than the
+    points indexed. Longitude wraps at the antimeridian; distances are
+    great-circle nautical miles.
+    """
+
+    def __init__(self, cell_deg=DEFAULT_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.n_rows = math.ceil(180 / cell_deg)
+        self.n_cols = math.ceil(360 / cell_deg)
+        self.cells = {}      # (row, col) -> {key: (lat, lon)}
+        self.points = {}     # key -> (lat, lon, cell)
+
+    def __len__(self):
+        return len(self.points)
+
+    def __contains__(self, key):
+        return key in self.points
+
+    def _row(self, lat):
+        return min(self.n_rows - 1, max(0, int((lat + 90.0) // self.cell_deg)))
+
+    def _col(self, lon):
+        return int((lon + 180.0) // self.cell_deg) % self.n_cols
+
+    def insert(self, key, lat, lon):
+        """Add a point, or move it if the key is already indexed"""
+        if key in self.points:
+            self.remove(key)
+        cell = (self._row(lat), self._col(lon))
+        self.cells.setdefault(cell, {})[key] = (lat, lon)
+        self.points[key] = (lat, lon, cell)
+
+    def remove(self, key):
+        """Drop a point; unknown keys are ignored"""
+        entry = self.points.pop(key, None)
+        if entry is None:
+            return
+        bucket = self.cells[entry[2]]
+        del bucket[key]
+        if not bucket:
+            del self.cells[entry[2]]
+
+    def position(self, key):
+        lat, lon, _ = self.points[key]
+        return lat, lon
+
+    def _candidate_cells(self, lat, lon, radius_nm):
+        dlat = radius_nm / NM_PER_DEGREE
+        row_lo, row_hi = self._row(lat - dlat), self._row(lat + dlat)
+        # Longitude degrees shrink toward the poles; size the search for the
+        # most poleward row it touches
+        edge = min(90.0, max(abs(lat - dlat), abs(lat + dlat)))
+        cos_edge = math.cos(math.radians(edge))
+        if cos_edge < 1e-9 or dlat / cos_edge >= 180.0:
+            cols = range(self.n_cols)
+        else:
+            dlon = dlat / cos_edge
+            col_lo = int((lon - dlon + 180.0) // self.cell_deg)
+            col_hi = int((lon + dlon + 180.0) // self.cell_deg)
+            cols = range(col_lo, min(col_hi, col_lo + self.n_cols - 1) + 1)
+        for row in range(row_lo, row_hi + 1):
+            for col in cols:
+                bucket = self.cells.get((row, col % self.n_cols))
+                if bucket:
+                    yield bucket
+
+    def within(self, lat, lon, radius_nm):
+        """Return [(key, distance_nm)] for every point within `radius_nm`, nearest first"""
+        found = []
+        for bucket in self._candidate_cells(lat, lon, radius_nm):
+            for key, (plat, plon) in bucket.items():
+                distance = haversine_nm(lat, lon, plat, plon)
+                if distance <= radius_nm:
+                    found.append((key, distance))
+        found.sort(key=lambda item: item[1])
+        return found
+
+    def nearest(self, lat, lon, n=1, max_radius_nm=None):
+        """
+        Return the n points nearest to (lat, lon) as [(key, distance_nm)],
+        nearest first. The search radius starts at one cell and doubles
+        until it holds n points, so sparse tables cost a few extra rounds
+        rather than a full scan.
+        """
+        limit = math.pi * EARTH_RADIUS_NM if max_radius_nm is None else max_radius_nm
+        radius = min(limit, self.cell_deg * NM_PER_DEGREE)
+        while True:
+            found = self.within(lat, lon, radius)
+            if len(found) >= n or radius >= limit:
+                return found[:n]
+            radius = min(limit, radius * 2)
+
+
+def aircraft_position(data):
+    """Return (latitude, longitude) from a telemetry dict, or None when it has no position"""
+    lat, lon = data.get("latitude"), data.get("longitude")
+    if lat is None or lon is None or math.isnan(lat) or math.isnan(lon):
+        return None
+    return float(lat), float(lon)
+
+
+def load_rescue_bases(path=None):
+    """
+    Return rescue bases as (name, latitude, longitude) tuples, from a CSV
+    with name, latitude and longitude columns, or the built-in table.
+    """
+    if path is None:
+        return list(RESCUE_BASES)
+    with open(path, newline="", encoding="utf-8") as f:
+        return [(row["name"], float(row["latitude"]), float(row["longitude"]))
+                for row in csv.DictReader(f)]
+
+
+def rescue_base_index(bases=None, cell_deg=DEFAULT_CELL_DEG):
+    """Build a GridIndex keyed by base name"""
+    index = GridIndex(cell_deg)
+    for name, lat, lon in (RESCUE_BASES if bases is None else bases):
+        index.insert(name, lat, lon)
+    return index
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    bases = rescue_base_index()
+    crash = (30.5, -88.2)
+    print(f"🚁 Nearest rescue bases to a crash at {crash}:")
+    for name, distance in bases.nearest(*crash, n=3):
+        print(f"   {name}: {distance:.0f} nm")
+
+    alerts = GridIndex()
+    for i in range(10000):
+        alerts.insert(i, random.uniform(25.0, 49.0), random.uniform(-124.0, -67.0))
+    queries = [(random.uniform(25.0, 49.0), random.uniform(-124.0, -67.0)) for _ in range(1000)]
+    start = time.perf_counter()
+    found = sum(len(alerts.within(lat, lon, 50)) for lat, lon in queries)
+    within_us = (time.perf_counter() - start) / len(queries) * 1e6
+    start = time.perf_counter()
+    for lat, lon in queries:
+        bases.nearest(lat, lon, n=3)
+    nearest_us = (time.perf_counter() - start) / len(queries) * 1e6
+    print(f"📍 {len(alerts)} alerts: within 50 nm {within_us:.0f} µs/query ({found / len(queries):.1f} hits), "
+          f"nearest 3 bases {nearest_us:.0f} µs/query")
@@ -1,13 +1,20 @@
+import os
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import time
-import random
 from datetime import datetime
-from flight_sim import generate_flight_data
-from hazard_detection import detect_hazards, check_crash
-from alert_system import AlertSystem
+from hazard_rules import load_config, rules_from_config
+from sim_engine import get_engine
+from dashboard_charts import FlightChart
+from metrics import get_registry, serve_metrics
+from alert_dispatch import format_location
+from spatial_index import aircraft_position
+
+# Samples kept for the dashboard; older samples are overwritten in place
+TELEMETRY_CAPACITY = 1000
+# Seconds between refreshes of the live panel while the page is open
+REFRESH_INTERVAL = 0.5
+# Set FLIGHT_METRICS_PORT to serve Prometheus metrics from the Streamlit process
+METRICS_PORT = os.environ.get("FLIGHT_METRICS_PORT")
 
 # Page configuration
 st.set_page_config(
@@ -219,7 +226,14 @@ def display_features():
         </div>
         """, unsafe_allow_html=True)
 
+def _saved(config, key, default, low, high):
+    """A saved threshold as a slider default, kept within the slider's range"""
+    return type(default)(min(max(config.get(key, default), low), high))
+
 def main():
+    if METRICS_PORT:
+        serve_metrics(int(METRICS_PORT))
+    
     # Display clean header
     display_header()
     
@@ -244,9 +258,14 @@ def main():
         
         # Hazard detection sensitivity
         st.markdown('<div class="section-header"><h4>⚠️ Hazard Detection</h4></div>', unsafe_allow_html=True)
-        g_force_threshold = st.slider("G-Force Warning Threshold", 1.5, 4.0, 2.5)
-        altitude_threshold = st.slider("Low Altitude Threshold (ft)", 1000, 5000, 3000)
-        speed_threshold = st.slider("High Speed Threshold (knots)", 200, 400, 250)
+        # Start from the thresholds saved on the data input page
+        saved_config = load_config()
+        g_force_threshold = st.slider("G-Force Warning Threshold", 1.5, 4.0,
+                                      _saved(saved_config, "g_force_warning", 2.5, 1.5, 4.0))
+        altitude_threshold = st.slider("Low Altitude Threshold (ft)", 1000, 5000,
+                                       _saved(saved_config, "altitude_warning", 3000, 1000, 5000))
+        speed_threshold = st.slider("High Speed Threshold (knots)", 200, 400,
+                                    _saved(saved_config, "speed_warning", 250, 200, 400))
         
         # Safety tips
         st.markdown('<div class="section-header"><h4>💡 Safety Tips</h4></div>', unsafe_allow_html=True)
@@ -257,19 +276,62 @@ def main():
         • Follow standard operating procedures
         """)
     
+    # Start simulation button with clean styling
+    engine = get_engine(TELEMETRY_CAPACITY)
+    if st.button("🚀 Start Flight Simulation", type="primary", use_container_width=True):
+        # Compile the sidebar thresholds, plus the crash threshold saved on the
+        # data input page, into one rule set for this run
+        rules = rules_from_config({
+            "g_force_warning": g_force_threshold,
+            "altitude_warning": altitude_threshold,
+            "speed_warning": speed_threshold,
+            "crash_threshold": saved_config.get("crash_threshold", 5.0),
+        })
+        if not engine.start(flight_duration, simulation_speed, rules):
+            st.info("ℹ️ A flight simulation is already running; showing it live.")
+    
+    live_dashboard()
+
+# Every session attaches to the one process-wide engine; this fragment reruns on
+# its own every REFRESH_INTERVAL seconds and only pulls what changed since the
+# session's last view, so the rest of the page stays responsive
+@st.fragment(run_every=REFRESH_INTERVAL)
+def live_dashboard():
+    """Show the shared simulation's current state"""
+    engine = get_engine(TELEMETRY_CAPACITY)
+    view = st.session_state.get('engine_view')
+    if view is None:
+        view = st.session_state.engine_view = {'run_id': None, 'hazard_seq': 0,
+                                               'chart': FlightChart(), 'latest_hazards': []}
+    state = engine.view(view['hazard_seq'] if view['run_id'] == engine.run_id else 0)
+    if state['run_id'] != view['run_id']:
+        # A new run started since this session last looked
+        view['run_id'] = state['run_id']
+        view['chart'].reset()
+        view['latest_hazards'] = []
+    view['hazard_seq'] = state['hazard_total']
+    if state['new_hazards']:
+        view['latest_hazards'] = state['new_hazards'][-1]['hazards']
+    
     # Main content area
     col1, col2 = st.columns([2, 1])
     
     with col1:
         st.markdown('<div class="section-header"><h4>📊 Real-Time Flight Monitoring</h4></div>', unsafe_allow_html=True)
-        
-        # Create placeholders for real-time updates
-        chart_placeholder = st.empty()
-        status_placeholder = st.empty()
+        update_visualizations(engine, state, view)
         
     with col2:
         st.markdown('<div class="section-header"><h4>🚨 Alert Dashboard</h4></div>', unsafe_allow_html=True)
-        alert_placeholder = st.empty()
+        if view['latest_hazards']:
+            alert_html = f"""
+            <div class="alert-box warning">
+                <h4>⚠️ Latest Hazards Detected</h4>
+                <ul>
+            """
+            for hazard in view['latest_hazards']:
+                alert_html += f"<li>{hazard}</li>"
+            alert_html += "</ul></div>"
+            st.markdown(alert_html, unsafe_allow_html=True)
         
         # Display system status
         st.markdown("""
@@ -280,184 +342,72 @@ def main():
         </div>
         """, unsafe_allow_html=True)
     
-    # Initialize data storage
-    if 'flight_data' not in st.session_state:
-        st.session_state.flight_data = []
-        st.session_state.hazard_history = []
-        st.session_state.alert_system = AlertSystem()
-    
-    # Start simulation button with clean styling
-    if st.button("🚀 Start Flight Simulation", type="primary", use_container_width=True):
-        st.session_state.flight_data = []
-        st.session_state.hazard_history = []
-        st.session_state.alert_system = AlertSystem()
-        
+    if state['running']:
         # Progress bar with clean styling
         st.markdown('<div class="progress-container">', unsafe_allow_html=True)
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+        st.progress(state['steps'] / max(state['duration'], 1))
+        st.text(f"Time Step {state['steps']}/{state['duration']}")
         st.markdown('</div>', unsafe_allow_html=True)
-        
-        # Simulation loop
-        for t in range(flight_duration):
-            # Generate flight data
-            data = generate_flight_data()
-            data['registration'] = f"N{random.randint(10000, 99999)}"
-            data['timestamp'] = datetime.now().strftime("%H:%M:%S")
-            st.session_state.flight_data.append(data)
-            
-            # Detect hazards with custom thresholds
-            hazards = []
-            if data["g_force"] > g_force_threshold:
-                hazards.append(f"High G-Force ({data['g_force']:.1f}G)! Possible collision risk.")
-            if data["altitude"] < altitude_threshold and data["speed"] > speed_threshold:
-                hazards.append(f"Low Altitude ({data['altitude']}ft) & High Speed ({data['speed']}kts)! Terrain risk.")
-            if data["turbulence"]:
-                hazards.append("Turbulence detected! Advise altitude change.")
-            
-            # Record hazards
-            if hazards:
-                st.session_state.hazard_history.append({
-                    'time': t,
-                    'hazards': hazards,
-                    'data': data
-                })
-            
-            # Check for crash
-            crash_detected = check_crash(data)
-            
-            # Update progress
-            progress = (t + 1) / flight_duration
-            progress_bar.progress(progress)
-            status_text.text(f"Time Step {t + 1}/{flight_duration}")
-            
-            # Update visualizations
-            update_visualizations(chart_placeholder, status_placeholder, alert_placeholder)
-            
-            # Simulate real-time delay
-            time.sleep(simulation_speed)
-            
-            # Check for crash
-            if crash_detected:
-                st.error(f"💥 CRASH DETECTED at time {t}!")
-                st.session_state.alert_system.send_emergency_alert(data)
-                break
-        
-        progress_bar.empty()
-        status_text.empty()
-        
+    elif state['steps']:
+        if state['crashed_at'] is not None:
+            st.error(f"💥 CRASH DETECTED at time {state['crashed_at']}!")
         # Final summary with clean styling
         st.success("✅ Flight simulation completed!")
-        show_simulation_summary()
+        show_simulation_summary(engine, state)
 
-def update_visualizations(chart_placeholder, status_placeholder, alert_placeholder):
+def update_visualizations(engine, state, view):
     """Update real-time visualizations with clean styling"""
-    if not st.session_state.flight_data:
-        return
-    
-    # Create flight monitoring chart
-    df = pd.DataFrame(st.session_state.flight_data)
-    times = list(range(len(df)))
-    
-    # Create subplots with clean styling
-    fig = make_subplots(
-        rows=3, cols=1,
-        subplot_titles=('🛩️ Altitude (ft)', '⚡ Speed (knots)', '🔄 G-Force'),
-        vertical_spacing=0.1
-    )
-    
-    # Altitude plot
-    fig.add_trace(
-        go.Scatter(x=times, y=df['altitude'], name='Altitude', 
-                  line=dict(color='#667eea', width=3)),
-        row=1, col=1
-    )
-    
-    # Speed plot
-    fig.add_trace(
-        go.Scatter(x=times, y=df['speed'], name='Speed', 
-                  line=dict(color='#764ba2', width=3)),
-        row=2, col=1
-    )
-    
-    # G-Force plot
-    fig.add_trace(
-        go.Scatter(x=times, y=df['g_force'], name='G-Force', 
-                  line=dict(color='#f093fb', width=3)),
-        row=3, col=1
-    )
-    
-    # Add hazard markers
-    for hazard in st.session_state.hazard_history:
-        time_idx = hazard['time']
-        if time_idx < len(df):
-            fig.add_annotation(
-                x=time_idx, y=df.iloc[time_idx]['altitude'],
-                text="⚠️", showarrow=True, arrowhead=2, arrowcolor="red",
-                row=1, col=1
-            )
-    
-    # Clean layout
-    fig.update_layout(
-        height=600, 
-        showlegend=False,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(size=12, color='#495057'),
-        margin=dict(l=50, r=50, t=50, b=50)
-    )
-    
-    chart_placeholder.plotly_chart(fig, use_container_width=True)
+    with engine.lock:
+        flight_data = engine.telemetry
+        # A run started since `state` was taken: its hazards point into telemetry
+        # that has been cleared, so leave the chart to the next refresh
+        if state['run_id'] != engine.run_id or not len(flight_data):
+            return
+        # Update this session's chart with only what changed since its last view
+        with get_registry().timer("render"):
+            fig = view['chart'].update(flight_data, state['new_hazards'])
+        latest_data = flight_data.record(-1)
+    
+    st.plotly_chart(fig, use_container_width=True)
     
     # Update status with clean styling
-    if st.session_state.flight_data:
-        latest_data = st.session_state.flight_data[-1]
-        status_html = f"""
-        <div class="status-card">
-            <h4>🛩️ Current Flight Status</h4>
-            <p><strong>Aircraft:</strong> {latest_data['registration']}</p>
-            <p><strong>Altitude:</strong> {latest_data['altitude']:,} ft</p>
-            <p><strong>Speed:</strong> {latest_data['speed']} knots</p>
-            <p><strong>G-Force:</strong> {latest_data['g_force']:.1f}G</p>
-            <p><strong>Turbulence:</strong> {'Yes' if latest_data['turbulence'] else 'No'}</p>
-            <p><strong>Time:</strong> {latest_data['timestamp']}</p>
-        </div>
-        """
-        status_placeholder.markdown(status_html, unsafe_allow_html=True)
-    
-    # Update alerts with clean styling
-    if st.session_state.hazard_history:
-        latest_hazards = st.session_state.hazard_history[-1]['hazards']
-        alert_html = f"""
-        <div class="alert-box warning">
-            <h4>⚠️ Latest Hazards Detected</h4>
-            <ul>
-        """
-        for hazard in latest_hazards:
-            alert_html += f"<li>{hazard}</li>"
-        alert_html += "</ul></div>"
-        alert_placeholder.markdown(alert_html, unsafe_allow_html=True)
+    status_html = f"""
+    <div class="status-card">
+        <h4>🛩️ Current Flight Status</h4>
+        <p><strong>Aircraft:</strong> {latest_data['registration']}</p>
+        <p><strong>Altitude:</strong> {latest_data['altitude']:,.0f} ft</p>
+        <p><strong>Speed:</strong> {latest_data['speed']:.0f} knots</p>
+        <p><strong>G-Force:</strong> {latest_data['g_force']:.1f}G</p>
+        <p><strong>Turbulence:</strong> {'Yes' if latest_data['turbulence'] else 'No'}</p>
+        <p><strong>Position:</strong> {format_location(aircraft_position(latest_data))}</p>
+        <p><strong>Time:</strong> {datetime.fromtimestamp(latest_data['timestamp']).strftime("%H:%M:%S")}</p>
+    </div>
+    """
+    st.markdown(status_html, unsafe_allow_html=True)
 
-def show_simulation_summary():
+def show_simulation_summary(engine, state):
     """Display simulation summary with clean styling"""
     st.markdown('<div class="section-header"><h4>📈 Simulation Summary</h4></div>', unsafe_allow_html=True)
     
+    with engine.lock:
+        avg_altitude = engine.telemetry['altitude'].mean() if len(engine.telemetry) else None
+    hazard_history = engine.hazard_history()
+    
     # Summary metrics in a grid
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Total Time Steps", len(st.session_state.flight_data))
+        st.metric("Total Time Steps", state['steps'])
     
     with col2:
-        st.metric("Hazards Detected", len(st.session_state.hazard_history))
+        st.metric("Hazards Detected", state['hazard_total'])
     
     with col3:
-        if st.session_state.flight_data:
-            avg_altitude = sum(d['altitude'] for d in st.session_state.flight_data) / len(st.session_state.flight_data)
+        if avg_altitude is not None:
             st.metric("Average Altitude", f"{avg_altitude:,.0f} ft")
     
     # Hazard breakdown with clean styling
-    if st.session_state.hazard_history:
+    if hazard_history:
         st.markdown('<div class="section-header"><h4>⚠️ Hazard Analysis</h4></div>', unsafe_allow_html=True)
         hazard_df = pd.DataFrame([
             {
@@ -467,7 +417,7 @@ def show_simulation_summary():
                 'Speed': h['data']['speed'],
                 'G-Force': h['data']['g_force']
             }
-            for h in st.session_state.hazard_history
+            for h in hazard_history
         ])
         st.dataframe(hazard_df, use_container_width=True)
         
@@ -0,0 +1,183 @@
+import time
+import numpy as np
+
+# Column layout shared by every consumer of the buffer
+TELEMETRY_COLUMNS = {
+    "altitude": np.float64,      # in feet
+    "speed": np.float64,         # in knots
+    "g_force": np.float64,
+    "turbulence": np.bool_,
+    "latitude": np.float64,      # in degrees, NaN when unknown
+    "longitude": np.float64,
+    "registration_id": np.int32, # index into TelemetryBuffer.registrations
+    "timestamp": np.float64,     # seconds since the epoch
+}
+
+
+class TelemetryBuffer:
+    """
+    Fixed-capacity struct-of-arrays store for flight telemetry.
+
+    Each column is preallocated twice over and every sample is written to both
+    halves, so the most recent `capacity` samples are always one contiguous
+    slice. Appends are O(1) and every read returns a NumPy view, never a copy.
+    Once full, the oldest samples are overwritten.
+    """
+
+    def __init__(self, capacity=1000):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.total = 0  # samples appended since creation or the last clear()
+        self._data = {name: np.zeros(2 * capacity, dtype=dtype)
+                      for name, dtype in TELEMETRY_COLUMNS.items()}
+        self.registrations = []
+        self._registration_ids = {}
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def clear(self):
+        """Drop all samples but keep the allocated columns"""
+        self.total = 0
+
+    def registration_id(self, registration):
+        """Return the stable integer id for a registration, assigning one if new"""
+        reg_id = self._registration_ids.get(registration)
+        if reg_id is None:
+            reg_id = len(self.registrations)
+            self._registration_ids[registration] = reg_id
+            self.registrations.append(registration)
+        return reg_id
+
+    def append(self, data):
+        """Append one telemetry dict (the shape returned by generate_flight_data)"""
+        cap = self.capacity
+        lo = self.total % cap
+        hi = lo + cap
+        cols = self._data
+        for name in ("altitude", "speed", "g_force", "turbulence"):
+            cols[name][lo] = cols[name][hi] = data[name]
+        for name in ("latitude", "longitude"):
+            cols[name][lo] = cols[name][hi] = data.get(name, np.nan)
+        reg_id = self.registration_id(data.get("registration", "N12345"))
+        cols["registration_id"][lo] = cols["registration_id"][hi] = reg_id
+        ts = data.get("timestamp")
+        if ts is None:
+            ts = time.time()
+        cols["timestamp"][lo] = cols["timestamp"][hi] = ts
+        self.total += 1
+
+    def extend(self, columns, registration=None):
+        """
+        Append many samples at once from columnar input (dict of arrays or a
+        DataFrame). `registration` may be given instead of a per-sample
+        registration column.
+        """
+        altitude = np.asarray(columns["altitude"])
+        n = len(altitude)
+        if n == 0:
+            return
+        if "registration_id" in columns:
+            reg_ids = np.asarray(columns["registration_id"])
+        elif registration is not None:
+            reg_ids = np.full(n, self.registration_id(registration), dtype=np.int32)
+        else:
+            regs = columns["registration"] if "registration" in columns else ["N12345"] * n
+            reg_ids = np.fromiter((self.registration_id(r) for r in regs), dtype=np.int32, count=n)
+        timestamps = np.asarray(columns["timestamp"]) if "timestamp" in columns else np.full(n, time.time())
+        values = {
+            "altitude": altitude,
+            "speed": np.asarray(columns["speed"]),
+            "g_force": np.asarray(columns["g_force"]),
+            "turbulence": np.asarray(columns["turbulence"]),
+            "latitude": np.asarray(columns["latitude"]) if "latitude" in columns else np.full(n, np.nan),
+            "longitude": np.asarray(columns["longitude"]) if "longitude" in columns else np.full(n, np.nan),
+            "registration_id": reg_ids,
+            "timestamp": timestamps,
+        }
+
+        # Only the last `capacity` samples can survive the write
+        cap = self.capacity
+        skip = max(0, n - cap)
+        pos = (self.total + skip + np.arange(n - skip)) % cap
+        for name, col in self._data.items():
+            chunk = values[name][skip:]
+            col[pos] = chunk
+            col[pos + cap] = chunk
+        self.total += n
+
+    def window(self, start=0, stop=None):
+        """
+        Return zero-copy views of samples [start, stop) as a dict of columns.
+        Indices are relative to the oldest retained sample and may be negative.
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        stop = max(start, stop)
+        base = self._base()
+        return {name: col[base + start:base + stop] for name, col in self._data.items()}
+
+    def latest(self, n):
+        """Return views of the most recent n samples"""
+        return self.window(-n) if n else self.window(0, 0)
+
+    def column(self, name):
+        """Return a view of one column over every retained sample"""
+        base = self._base()
+        return self._data[name][base:base + len(self)]
+
+    def __getitem__(self, name):
+        # Lets the buffer be passed anywhere a DataFrame of columns is accepted
+        if name == "registration":
+            return [self.registrations[i] for i in self.column("registration_id")]
+        return self.column(name)
+
+    def __contains__(self, name):
+        return name in self._data or name == "registration"
+
+    def record(self, index):
+        """Return sample `index` as a telemetry dict"""
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("telemetry index out of range")
+        pos = self._base() + index
+        cols = self._data
+        return {
+            "altitude": float(cols["altitude"][pos]),
+            "speed": float(cols["speed"][pos]),
+            "g_force": float(cols["g_force"][pos]),
+            "turbulence": bool(cols["turbulence"][pos]),
+            "latitude": float(cols["latitude"][pos]),
+            "longitude": float(cols["longitude"][pos]),
+            "registration": self.registrations[cols["registration_id"][pos]],
+            "timestamp": float(cols["timestamp"][pos]),
+        }
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.record(i)
+
+    def _base(self):
+        # Start of the contiguous run holding the retained samples
+        if self.total <= self.capacity:
+            return 0
+        return (self.total - 1) % self.capacity + 1
+
+
+if __name__ == "__main__":
+    from flight_sim import FlightPath, generate_flight_data
+    from hazard_detection import detect_hazards_batch
+
+    buffer = TelemetryBuffer(capacity=5)
+    track = FlightPath()
+    for _ in range(8):
+        data = generate_flight_data(track)
+        data["registration"] = "N12345"
+        buffer.append(data)
+    print(f"Retained {len(buffer)} of {buffer.total} samples")
+    print("Altitudes:", buffer["altitude"])
+    print("Latest:", buffer.record(-1))
+    masks, crashes = detect_hazards_batch(buffer)
+    print("Hazard masks:", masks, "Crashes:", crashes)
@@ -0,0 +1,255 @@
+import os
+import struct
+import time
+import numpy as np
+
+# File layout: a 64-byte header followed by fixed-width little-endian records.
+# The header is MAGIC, then the format version, header size and record size
+# as uint16, zero padded. Readers reject versions they do not know.
+MAGIC = b"FTLM"
+FORMAT_VERSION = 2
+HEADER_SIZE = 64
+_HEADER = struct.Struct("<4sHHH")
+
+# One telemetry sample per record. Registrations are stored inline as up to
+# 8 ASCII bytes, so a file needs no side table and can always be appended to.
+RECORD_DTYPE_V1 = np.dtype([
+    ("timestamp_ns", "<i8"),   # nanoseconds since the epoch
+    ("registration", "S8"),
+    ("altitude", "<f8"),       # in feet
+    ("speed", "<f8"),          # in knots
+    ("g_force", "<f8"),
+    ("turbulence", "u1"),
+    ("flags", "u1"),           # reserved, written as 0
+    ("_pad", "V6"),            # keeps records 8-byte aligned
+])
+# Version 2 adds the aircraft position (NaN when unknown)
+RECORD_DTYPE = np.dtype([
+    ("timestamp_ns", "<i8"),
+    ("registration", "S8"),
+    ("altitude", "<f8"),
+    ("speed", "<f8"),
+    ("g_force", "<f8"),
+    ("latitude", "<f8"),       # in degrees
+    ("longitude", "<f8"),
+    ("turbulence", "u1"),
+    ("flags", "u1"),
+    ("_pad", "V6"),
+])
+FORMAT_DTYPES = {1: RECORD_DTYPE_V1, 2: RECORD_DTYPE}
+POSITION_FIELDS = ("latitude", "longitude")
+
+
+def _pack_header(version=FORMAT_VERSION):
+    header = _HEADER.pack(MAGIC, version, HEADER_SIZE, FORMAT_DTYPES[version].itemsize)
+    return header.ljust(HEADER_SIZE, b"\0")
+
+
+def read_header(f):
+    """Validate a file's header and return the record dtype it declares"""
+    raw = f.read(HEADER_SIZE)
+    if len(raw) < _HEADER.size:
+        raise ValueError("Not a telemetry recording: file too short")
+    magic, version, header_size, record_size = _HEADER.unpack_from(raw)
+    if magic != MAGIC:
+        raise ValueError("Not a telemetry recording: bad magic")
+    dtype = FORMAT_DTYPES.get(version)
+    if dtype is None:
+        raise ValueError(f"Unsupported telemetry format version {version}")
+    if header_size != HEADER_SIZE or record_size != dtype.itemsize:
+        raise ValueError("Corrupt telemetry header")
+    return dtype
+
+
+class TelemetryWriter:
+    """
+    Append-only writer for telemetry recordings.
+
+    Samples are staged in a preallocated record array and written with one
+    call per `buffer_size` samples, so recording costs a few field stores per
+    sample. Opening an existing recording appends to it in that file's
+    format version. A run that dies mid-write leaves at most one partial
+    record; readers ignore it, and reopening the file for writing truncates
+    it so later records stay aligned.
+    """
+
+    def __init__(self, path, buffer_size=4096):
+        self.path = path
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self.dtype = RECORD_DTYPE
+        if exists:
+            with open(path, "r+b") as f:
+                self.dtype = read_header(f)
+                # Drop a torn record left by an interrupted write
+                size = os.path.getsize(path)
+                whole = HEADER_SIZE + (size - HEADER_SIZE) // self.dtype.itemsize * self.dtype.itemsize
+                if whole != size:
+                    f.truncate(whole)
+        self._positions = [name for name in POSITION_FIELDS if name in self.dtype.names]
+        self._file = open(path, "ab")
+        if not exists:
+            self._file.write(_pack_header())
+        self._buffer = np.zeros(buffer_size, dtype=self.dtype)
+        self._pending = 0
+        self.written = 0
+
+    def append(self, data):
+        """Record one telemetry dict (the shape returned by generate_flight_data)"""
+        record = self._buffer[self._pending]
+        ts = data.get("timestamp")
+        record["timestamp_ns"] = int((time.time() if ts is None else ts) * 1e9)
+        record["registration"] = _encode_registration(data.get("registration", "N12345"))
+        record["altitude"] = data["altitude"]
+        record["speed"] = data["speed"]
+        record["g_force"] = data["g_force"]
+        record["turbulence"] = data["turbulence"]
+        for name in self._positions:
+            record[name] = data.get(name, np.nan)
+        self._pending += 1
+        if self._pending == len(self._buffer):
+            self.flush()
+
+    def extend(self, columns, registration=None, timestamp=None):
+        """
+        Record many samples from columnar input (dict of arrays or a
+        DataFrame). `registration` and `timestamp` may be given once for all
+        samples instead of as columns.
+        """
+        n = len(columns["altitude"])
+        if n == 0:
+            return
+        self.flush()
+        records = np.zeros(n, dtype=self.dtype)
+        if "timestamp" in columns:
+            records["timestamp_ns"] = np.asarray(columns["timestamp"], dtype=np.float64) * 1e9
+        else:
+            records["timestamp_ns"] = int((time.time() if timestamp is None else timestamp) * 1e9)
+        regs = columns["registration"] if "registration" in columns else [registration or "N12345"]
+        regs = np.asarray(regs, dtype="S")
+        if regs.dtype.itemsize > 8:
+            raise ValueError("Registrations are limited to 8 characters")
+        records["registration"] = regs
+        for name in ("altitude", "speed", "g_force", "turbulence"):
+            records[name] = columns[name]
+        for name in self._positions:
+            records[name] = columns[name] if name in columns else np.nan
+        self._file.write(records.tobytes())
+        self.written += n
+
+    def flush(self):
+        """Write staged samples to the file"""
+        if self._pending:
+            self._file.write(self._buffer[:self._pending].tobytes())
+            self.written += self._pending
+            self._pending = 0
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _encode_registration(registration):
+    encoded = registration.encode("ascii")
+    if len(encoded) > 8:
+        raise ValueError(f"Registration {registration!r} is longer than 8 characters")
+    return encoded
+
+
+class TelemetryRecording:
+    """
+    Read-only, memory-mapped view of a recording.
+
+    Opening costs one header read and an mmap regardless of file size. Every
+    column is a zero-copy strided view into the mapped records, and the
+    object can be passed wherever a TelemetryBuffer or DataFrame of columns is
+    accepted (detect_hazards_batch, plot_flight).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            dtype = read_header(f)
+        size = os.path.getsize(path)
+        # A trailing partial record from an interrupted write is ignored
+        count = (size - HEADER_SIZE) // dtype.itemsize
+        if count:
+            self.records = np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def column(self, name):
+        """Return a zero-copy view of one record field"""
+        return self.records[name]
+
+    def __getitem__(self, name):
+        if name == "timestamp":
+            return self.records["timestamp_ns"] / 1e9
+        if name == "registration":
+            return self.records["registration"].astype(str)
+        return self.records[name]
+
+    def __contains__(self, name):
+        return name in self.records.dtype.names or name in ("timestamp", "registration")
+
+    def columns(self, start=0, stop=None):
+        """
+        Return samples [start, stop) as a dict of columns in replay form.
+        Version 1 recordings have no latitude/longitude columns.
+        """
+        chunk = self.records[start:stop]
+        columns = {
+            "timestamp": chunk["timestamp_ns"] / 1e9,
+            "registration": chunk["registration"].astype(str),
+            "altitude": chunk["altitude"],
+            "speed": chunk["speed"],
+            "g_force": chunk["g_force"],
+            "turbulence": chunk["turbulence"],
+        }
+        for name in POSITION_FIELDS:
+            if name in chunk.dtype.names:
+                columns[name] = chunk[name]
+        return columns
+
+    def chunks(self, chunk_size=65536):
+        """Yield the recording as column dicts of at most `chunk_size` samples"""
+        for start in range(0, len(self), chunk_size):
+            yield self.columns(start, start + chunk_size)
+
+
+def read_ftlm_chunks(path, chunk_size=65536):
+    """Yield column dicts from a telemetry recording"""
+    yield from TelemetryRecording(path).chunks(chunk_size)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from flight_sim import FlightPath, generate_flight_data
+    from hazard_detection import detect_hazards_batch
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "flight.ftlm")
+        start = time.perf_counter()
+        track = FlightPath()
+        with TelemetryWriter(path) as writer:
+            for _ in range(100000):
+                data = generate_flight_data(track)
+                data["registration"] = "N12345"
+                writer.append(data)
+        print(f"📼 Recorded {writer.written} samples ({os.path.getsize(path):,} bytes) "
+              f"in {time.perf_counter() - start:.2f}s")
+        start = time.perf_counter()
+        recording = TelemetryRecording(path)
+        masks, crashes = detect_hazards_batch(recording)
+        print(f"🔎 Opened and scored {len(recording)} samples in {(time.perf_counter() - start) * 1000:.1f} ms: "
+              f"{int((masks != 0).sum())} hazards, {int(crashes.sum())} crashes")
@@ -0,0 +1,394 @@
+import math
+from collections import deque
+import numpy as np
+from hazard_rules import COMBINATORS
+
+# Temporal rules are plain data like hazard_rules. Each condition is
+# (field, statistic, window, comparator, threshold): the statistic of a field
+# over the last `window` samples compared against a threshold. A rule fires
+# once its conditions have held for `for` consecutive samples. "replaces"
+# names an instantaneous hazard rule the temporal one supersedes, so the
+# single-sample version can be masked out wherever this one runs.
+DEFAULT_TEMPORAL_RULES = [
+    {
+        "name": "rapid_descent",
+        "conditions": [("altitude", "rate", 5, "<", -100)],   # ft/s, i.e. 6000 ft/min
+        "combinator": "all",
+        "for": 3,
+        "severity": "WARNING",
+        "ground_severity": "ALERT",
+        "message": "Rapid descent! Sink rate above 6000 ft/min.",
+    },
+    {
+        "name": "sustained_high_g",
+        "conditions": [("g_force", "min", 3, ">", 2.5)],
+        "combinator": "all",
+        "for": 1,
+        "replaces": "high_g",
+        "severity": "WARNING",
+        "ground_severity": "ALERT",
+        "message": "Sustained high G-Force! Possible collision risk.",
+    },
+    {
+        "name": "terrain_closure",
+        "conditions": [("altitude", "value", 1, "<", 5000), ("altitude", "rate", 5, "<", -20),
+                       ("speed", "rate", 5, ">", 0)],
+        "combinator": "all",
+        "for": 2,
+        "severity": "CAUTION",
+        "ground_severity": "WARNING",
+        "message": "Descending and accelerating toward terrain!",
+    },
+    {
+        "name": "persistent_turbulence",
+        "conditions": [("turbulence", "mean", 10, ">=", 0.8)],
+        "combinator": "all",
+        "for": 1,
+        "severity": "ADVISORY",
+        "ground_severity": None,
+        "message": "Persistent turbulence! Advise altitude change.",
+    },
+]
+
+STATISTICS = {"value", "mean", "min", "max", "ewma", "rate"}
+_COMPARE = {
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+}
+
+
+class RollingWindow:
+    """
+    Mean, min and max of the last `size` values.
+
+    The sum is kept running and min/max come from monotonic deques, so each
+    push is O(1) amortized and memory is bounded by `size`.
+    """
+    __slots__ = ("size", "values", "total", "pushed", "_min", "_max")
+
+    def __init__(self, size):
+        if size < 1:
+            raise ValueError("window size must be at least 1")
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self.pushed = 0
+        self._min = deque()   # (index, value), values increasing
+        self._max = deque()   # (index, value), values decreasing
+
+    def push(self, x):
+        i = self.pushed
+        if len(self.values) == self.size:
+            self.total -= self.values[0]
+        self.values.append(x)
+        self.total += x
+        self.pushed += 1
+        # Re-add from scratch now and then so rounding in the running sum cannot build up
+        if self.pushed % 4096 == 0:
+            self.total = math.fsum(self.values)
+        while self._min and self._min[-1][1] >= x:
+            self._min.pop()
+        self._min.append((i, x))
+        if self._min[0][0] <= i - self.size:
+            self._min.popleft()
+        while self._max and self._max[-1][1] <= x:
+            self._max.pop()
+        self._max.append((i, x))
+        if self._max[0][0] <= i - self.size:
+            self._max.popleft()
+
+    @property
+    def full(self):
+        return len(self.values) == self.size
+
+    @property
+    def mean(self):
+        return self.total / len(self.values) if self.values else None
+
+    @property
+    def min(self):
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self):
+        return self._max[0][1] if self._max else None
+
+
+class EWMA:
+    """Exponentially weighted moving average with the smoothing of a `span`-sample window"""
+    __slots__ = ("alpha", "value")
+
+    def __init__(self, span):
+        self.alpha = 2.0 / (span + 1)
+        self.value = None
+
+    def push(self, x):
+        self.value = x if self.value is None else self.value + self.alpha * (x - self.value)
+
+
+class RateOfChange:
+    """Change per second between the newest sample and the one `window` samples before it"""
+    __slots__ = ("samples",)
+
+    def __init__(self, window):
+        self.samples = deque(maxlen=window + 1)
+
+    def push(self, t, x):
+        self.samples.append((t, x))
+
+    @property
+    def value(self):
+        if len(self.samples) < self.samples.maxlen:
+            return None
+        (t0, x0), (t1, x1) = self.samples[0], self.samples[-1]
+        return (x1 - x0) / (t1 - t0) if t1 > t0 else None
+
+
+class TemporalRules:
+    """
+    A validated temporal rule set.
+
+    Collects the accumulators its conditions need, so detectors built from
+    it keep exactly those and nothing else. Exposes `by_message` and
+    `margin` like hazard_rules.CompiledRules, so it can be passed to
+    AlertSystem.raise_hazard_alerts.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = [dict(rule) for rule in (DEFAULT_TEMPORAL_RULES if rules is None else rules)]
+        self.by_message = {rule["message"]: rule for rule in self.rules}
+        self.replaces = {rule["replaces"] for rule in self.rules if rule.get("replaces")}
+        self.windows, self.ewmas, self.rates, self.fields = set(), set(), set(), set()
+        for rule in self.rules:
+            if not rule.get("conditions"):
+                raise ValueError(f"Rule {rule['name']!r} has no conditions")
+            if rule.get("combinator", "all") not in COMBINATORS:
+                raise ValueError(f"Unknown combinator {rule.get('combinator')!r} in rule {rule['name']!r}")
+            if int(rule.get("for", 1)) < 1:
+                raise ValueError(f"Rule {rule['name']!r} must hold for at least one sample")
+            for field, statistic, window, comparator, _ in rule["conditions"]:
+                if statistic not in STATISTICS:
+                    raise ValueError(f"Unknown statistic {statistic!r} in rule {rule['name']!r}")
+                if comparator not in _COMPARE:
+                    raise ValueError(f"Unknown comparator {comparator!r} in rule {rule['name']!r}")
+                if int(window) < 1:
+                    raise ValueError(f"Window for {field!r} in rule {rule['name']!r} must be positive")
+                self.fields.add(field)
+                if statistic in ("mean", "min", "max"):
+                    self.windows.add((field, int(window)))
+                elif statistic == "ewma":
+                    self.ewmas.add((field, int(window)))
+                elif statistic == "rate":
+                    self.rates.add((field, int(window)))
+
+    def margin(self, rule, data):
+        """Temporal hazards escalate on persistence and severity, not on margin"""
+        return None
+
+
+class AircraftDetector:
+    """
+    Stateful temporal hazard detector for one aircraft.
+
+    Feed it every sample in order with `update`; it returns the messages of
+    the temporal rules firing at that sample. Memory is fixed by the rule
+    windows, however long the flight. Sample times come from the
+    "timestamp" field when present, otherwise samples are taken to be
+    `sample_interval` seconds apart.
+    """
+
+    def __init__(self, rules=None, sample_interval=1.0):
+        self.rules = rules if isinstance(rules, TemporalRules) else TemporalRules(rules)
+        self.sample_interval = sample_interval
+        self.samples = 0
+        self.windows = {key: RollingWindow(key[1]) for key in self.rules.windows}
+        self.ewmas = {key: EWMA(key[1]) for key in self.rules.ewmas}
+        self.rates = {key: RateOfChange(key[1]) for key in self.rules.rates}
+        self.latest = {}
+        self.streaks = [0] * len(self.rules.rules)
+
+    def feature(self, field, statistic, window):
+        """Current value of one statistic, or None while its window is still filling"""
+        if statistic == "value":
+            return self.latest.get(field)
+        if statistic == "ewma":
+            return self.ewmas[field, window].value
+        if statistic == "rate":
+            return self.rates[field, window].value
+        rolling = self.windows[field, window]
+        return getattr(rolling, statistic) if rolling.full else None
+
+    def update(self, data, t=None):
+        """Add one telemetry sample; return the temporal hazard messages it raises"""
+        if t is None:
+            t = data.get("timestamp")
+            if t is None:
+                t = self.samples * self.sample_interval
+        self.samples += 1
+        for field in self.rules.fields:
+            self.latest[field] = float(data[field])
+        for (field, _), rolling in self.windows.items():
+            rolling.push(self.latest[field])
+        for (field, _), ewma in self.ewmas.items():
+            ewma.push(self.latest[field])
+        for (field, _), rate in self.rates.items():
+            rate.push(t, self.latest[field])
+
+        hazards = []
+        for i, rule in enumerate(self.rules.rules):
+            results = []
+            for field, statistic, window, comparator, threshold in rule["conditions"]:
+                value = self.feature(field, statistic, int(window))
+                results.append(value is not None and _COMPARE[comparator](value, threshold))
+            held = all(results) if rule.get("combinator", "all") == "all" else any(results)
+            self.streaks[i] = self.streaks[i] + 1 if held else 0
+            if self.streaks[i] >= rule.get("for", 1):
+                hazards.append(rule["message"])
+        return hazards
+
+
+class FleetDetector:
+    """
+    Columnar counterpart of AircraftDetector for a fixed fleet.
+
+    Every update takes one sample per aircraft (a fleet snapshot of column
+    arrays) and evaluates the same rules for all of them with NumPy. Rolling
+    state is a (window, n_aircraft) ring per feature with running sums, so
+    memory per aircraft is fixed by the rule windows. Min and max use the
+    van Herk/Gil-Werman block scheme: the ring is cut into blocks of one
+    window, suffix extrema of the last full block are computed once per
+    block and a running prefix covers the current one, so each sample costs
+    O(1) amortized per aircraft rather than a scan of the window. Returns a
+    bitmask per aircraft; rule i sets bit 1 << i, as in hazard_rules.
+    """
+
+    def __init__(self, n_aircraft, rules=None, sample_interval=1.0):
+        self.rules = rules if isinstance(rules, TemporalRules) else TemporalRules(rules)
+        self.n_aircraft = n_aircraft
+        self.sample_interval = sample_interval
+        self.samples = 0
+        self.messages = [rule["message"] for rule in self.rules.rules]
+        self.mask_dtype = np.uint8 if len(self.messages) <= 8 else np.uint32 if len(self.messages) <= 32 else np.uint64
+        self.rings = {key: np.zeros((key[1], n_aircraft)) for key in self.rules.windows}
+        self.sums = {key: np.zeros(n_aircraft) for key in self.rules.windows}
+        # Suffix extrema of the previous block and prefix extrema of the current one
+        self.suffix_min = {key: np.zeros((key[1], n_aircraft)) for key in self.rules.windows}
+        self.suffix_max = {key: np.zeros((key[1], n_aircraft)) for key in self.rules.windows}
+        self.prefix_min = {key: np.zeros(n_aircraft) for key in self.rules.windows}
+        self.prefix_max = {key: np.zeros(n_aircraft) for key in self.rules.windows}
+        self.ewmas = {key: np.zeros(n_aircraft) for key in self.rules.ewmas}
+        self.rate_rings = {key: np.zeros((key[1] + 1, n_aircraft)) for key in self.rules.rates}
+        self.rate_times = {key: np.zeros(key[1] + 1) for key in self.rules.rates}
+        self.latest = {}
+        self.streaks = np.zeros((len(self.rules.rules), n_aircraft), dtype=np.int64)
+
+    def feature(self, field, statistic, window):
+        """Current values of one statistic for every aircraft, or None while its window fills"""
+        if statistic == "value":
+            return self.latest[field]
+        if statistic == "ewma":
+            return self.ewmas[field, window]
+        if statistic == "rate":
+            if self.samples <= window:
+                return None
+            i = self.samples - 1
+            times, ring = self.rate_times[field, window], self.rate_rings[field, window]
+            newest, oldest = i % (window + 1), (i - window) % (window + 1)
+            elapsed = times[newest] - times[oldest]
+            return (ring[newest] - ring[oldest]) / elapsed if elapsed > 0 else None
+        if self.samples < window:
+            return None
+        if statistic == "mean":
+            return self.sums[field, window] / window
+        # The window is the tail of the previous block after this offset plus the current block so far
+        offset = (self.samples - 1) % window
+        if statistic == "min":
+            prefix, suffix, combine = self.prefix_min[field, window], self.suffix_min[field, window], np.minimum
+        else:
+            prefix, suffix, combine = self.prefix_max[field, window], self.suffix_max[field, window], np.maximum
+        return prefix if offset == window - 1 else combine(suffix[offset + 1], prefix)
+
+    def update(self, columns, t=None, active=None):
+        """
+        Add one sample per aircraft; return the temporal hazard bitmask of
+        each. Rows where `active` is False are reported as clear.
+        """
+        if t is None:
+            t = self.samples * self.sample_interval
+        i = self.samples
+        self.samples += 1
+        for field in self.rules.fields:
+            self.latest[field] = np.asarray(columns[field], dtype=np.float64)
+        for key, ring in self.rings.items():
+            x = self.latest[key[0]]
+            offset = i % key[1]
+            if offset == 0:
+                # The ring holds exactly the block that just ended
+                np.minimum.accumulate(ring[::-1], axis=0, out=self.suffix_min[key][::-1])
+                np.maximum.accumulate(ring[::-1], axis=0, out=self.suffix_max[key][::-1])
+                self.prefix_min[key][:] = x
+                self.prefix_max[key][:] = x
+            else:
+                np.minimum(self.prefix_min[key], x, out=self.prefix_min[key])
+                np.maximum(self.prefix_max[key], x, out=self.prefix_max[key])
+            slot = ring[offset]
+            self.sums[key] += x - slot
+            slot[:] = x
+            # Re-add from scratch now and then so rounding in the running sums cannot build up
+            if self.samples % 4096 == 0:
+                self.sums[key] = ring.sum(axis=0)
+        for key, ewma in self.ewmas.items():
+            x = self.latest[key[0]]
+            if i == 0:
+                ewma[:] = x
+            else:
+                ewma += 2.0 / (key[1] + 1) * (x - ewma)
+        for key, ring in self.rate_rings.items():
+            ring[i % (key[1] + 1)] = self.latest[key[0]]
+            self.rate_times[key][i % (key[1] + 1)] = t
+
+        mask = np.zeros(self.n_aircraft, dtype=self.mask_dtype)
+        for r, rule in enumerate(self.rules.rules):
+            results = []
+            for field, statistic, window, comparator, threshold in rule["conditions"]:
+                value = self.feature(field, statistic, int(window))
+                if value is None:
+                    results.append(np.zeros(self.n_aircraft, dtype=bool))
+                else:
+                    results.append(_COMPARE[comparator](value, threshold))
+            reduce = np.logical_and if rule.get("combinator", "all") == "all" else np.logical_or
+            held = reduce.reduce(results)
+            streak = self.streaks[r]
+            streak[:] = np.where(held, streak + 1, 0)
+            mask |= (streak >= rule.get("for", 1)).astype(self.mask_dtype) << self.mask_dtype(r)
+        if active is not None:
+            mask[~np.asarray(active)] = 0
+        return mask
+
+    def messages_for(self, mask):
+        """Expand a temporal hazard bitmask into its list of messages"""
+        mask = int(mask)
+        return [msg for i, msg in enumerate(self.messages) if mask >> i & 1]
+
+
+if __name__ == "__main__":
+    from hazard_detection import detect_hazards
+
+    # A one-sample G spike at step 5, a turbulence burst, four samples of high G
+    # and then a dive toward terrain, one sample per second
+    detector = AircraftDetector()
+    altitude = 20000
+    for step in range(42):
+        if step >= 26:
+            altitude -= 1200
+        sample = {"altitude": altitude, "speed": 300 + 10 * max(0, step - 25),
+                  "g_force": 3.0 if step == 5 or 20 <= step < 24 else 1.0,
+                  "turbulence": 10 <= step < 22}
+        instantaneous = detect_hazards(sample)
+        temporal = detector.update(sample)
+        if instantaneous or temporal:
+            print(f"⏰ {step:2d}  single-sample: {len(instantaneous)}  temporal: {'; '.join(temporal) or '-'}")
@@ -0,0 +1,25 @@
+import numpy as np
+from telemetry_format import HEADER_SIZE, RECORD_DTYPE, TelemetryRecording, TelemetryWriter
+
+
+def _sample(altitude):
+    return {"registration": "N12345", "altitude": altitude, "speed": 250, "g_force": 1.0,
+            "turbulence": False, "timestamp": 1.0, "latitude": 30.0, "longitude": -88.0}
+
+
+def test_append_after_partial_tail(tmp_path):
+    path = str(tmp_path / "flight.ftlm")
+    with TelemetryWriter(path) as writer:
+        writer.append(_sample(1000))
+    with open(path, "ab") as f:
+        f.write(b"\xff" * 20)  # torn record from an interrupted write
+
+    with TelemetryWriter(path) as writer:
+        for altitude in (2000, 3000, 4000):
+            writer.append(_sample(altitude))
+
+    recording = TelemetryRecording(path)
+    assert len(recording) == 4
+    assert (tmp_path / "flight.ftlm").stat().st_size == HEADER_SIZE + 4 * RECORD_DTYPE.itemsize
+    np.testing.assert_array_equal(recording["altitude"], [1000, 2000, 3000, 4000])
+    assert list(recording["registration"]) == ["N12345"] * 4
@@ -1,54 +1,148 @@
-import matplotlib.pyplot as plt
-from flight_sim import generate_flight_data
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from flight_sim import FlightPath, generate_flight_data
 from hazard_detection import detect_hazards
+from telemetry_buffer import TelemetryBuffer
 
+DEFAULT_PLOT_PATH = "flight_monitoring.png"
+DEFAULT_DPI = 300
+# Series longer than this are decimated before drawing; the default figure
+# is 3600 pixels wide at 300 dpi, so more points cannot change what is seen
+DEFAULT_MAX_POINTS = 4000
+# Hazards are labelled with their message only when there are this few
+MAX_HAZARD_LABELS = 10
 
-def plot_flight(flight_data, hazard_indices, hazard_msgs):
+
+def _column(flight_data, name):
+    """Return one telemetry column from a TelemetryBuffer, DataFrame or list of dicts"""
+    if isinstance(flight_data, list):
+        return np.array([d[name] for d in flight_data])
+    return np.asarray(flight_data[name])
+
+
+def minmax_indices(y, max_points):
     """
-    Plot altitude, speed, and g-force over time. Annotate detected hazards.
+    Indices that keep the minimum and maximum of each of max_points/2 equal
+    bins, in order. Preserves every spike, which is what matters for
+    hazard plots.
     """
-    times = list(range(len(flight_data)))
-    altitudes = [d['altitude'] for d in flight_data]
-    speeds = [d['speed'] for d in flight_data]
-    g_forces = [d['g_force'] for d in flight_data]
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    bins = max(1, max_points // 2)
+    width = -(-n // bins)
+    padded = np.empty(bins * width)
+    padded[:n] = y
+    padded[n:] = y[-1]
+    blocks = padded.reshape(bins, width)
+    starts = np.arange(bins) * width
+    lo = starts + blocks.argmin(axis=1)
+    hi = starts + blocks.argmax(axis=1)
+    idx = np.sort(np.concatenate([lo, hi]))
+    return np.unique(np.minimum(idx, n - 1))
 
-    plt.figure(figsize=(12, 8))
 
-    plt.subplot(3, 1, 1)
-    plt.plot(times, altitudes, label='Altitude (ft)')
-    plt.ylabel('Altitude (ft)')
-    for idx, msg in zip(hazard_indices, hazard_msgs):
-        plt.annotate('⚠ ' + msg, (idx, altitudes[idx]), color='red', fontsize=8, rotation=15)
-    plt.legend()
+def lttb_indices(y, max_points):
+    """
+    Largest-Triangle-Three-Buckets downsampling: keep the first and last
+    sample plus, from each bucket, the sample forming the largest triangle
+    with the previous pick and the next bucket's mean. Best for smooth
+    series where shape matters more than extremes.
+    """
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    x = np.arange(n, dtype=np.float64)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    picks = np.empty(max_points, dtype=np.int64)
+    picks[0], picks[-1] = 0, n - 1
+    prev = 0
+    for b in range(max_points - 2):
+        lo, hi = edges[b], edges[b + 1]
+        next_lo, next_hi = hi, edges[b + 2] if b + 2 < len(edges) else n
+        mean_x = x[next_lo:next_hi].mean()
+        mean_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[prev] - mean_x) * (y[lo:hi] - y[prev])
+                      - (x[prev] - x[lo:hi]) * (mean_y - y[prev]))
+        prev = lo + int(area.argmax())
+        picks[b + 1] = prev
+    return picks
+
 
-    plt.subplot(3, 1, 2)
-    plt.plot(times, speeds, label='Speed (knots)', color='orange')
-    plt.ylabel('Speed (knots)')
-    plt.legend()
+DECIMATORS = {"minmax": minmax_indices, "lttb": lttb_indices}
 
-    plt.subplot(3, 1, 3)
-    plt.plot(times, g_forces, label='G-Force', color='green')
-    plt.ylabel('G-Force')
-    plt.xlabel('Time Step')
-    plt.legend()
 
-    plt.tight_layout()
-    plt.suptitle('Flight Monitoring System', fontsize=16, y=1.02)
-    plt.savefig('flight_monitoring.png', dpi=300, bbox_inches='tight')
-    plt.close()
-    print("Flight monitoring plot saved as 'flight_monitoring.png'")
+def render_flight(flight_data, hazard_indices, hazard_msgs, path=DEFAULT_PLOT_PATH, dpi=DEFAULT_DPI,
+                  format=None, max_points=DEFAULT_MAX_POINTS, decimation="minmax", figsize=(12, 8)):
+    """
+    Render altitude, speed and g-force over time to `path` and return it.
+
+    Draws on a private Agg figure, so calls are independent of each other and
+    of pyplot. Series longer than `max_points` are decimated (`decimation`
+    is "minmax" or "lttb"), all hazards go into one marker collection and
+    the output format follows `format` or the file extension (png, pdf,
+    svg).
+    """
+    series = [
+        (_column(flight_data, 'altitude'), 'Altitude (ft)', None),
+        (_column(flight_data, 'speed'), 'Speed (knots)', 'orange'),
+        (_column(flight_data, 'g_force'), 'G-Force', 'green'),
+    ]
+    times = np.arange(len(series[0][0]))
+    decimate = DECIMATORS[decimation]
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(3, 1, sharex=True)
+    for ax, (values, label, color) in zip(axes, series):
+        keep = decimate(values, max_points)
+        ax.plot(times[keep], values[keep], label=label, color=color)
+        ax.set_ylabel(label)
+
+    hazard_indices = np.asarray(hazard_indices, dtype=np.int64)
+    if len(hazard_indices):
+        altitudes = series[0][0]
+        shown = hazard_indices
+        if len(shown) > max_points:
+            # Markers closer together than a pixel column overlap anyway
+            _, first = np.unique(shown * max_points // len(times), return_index=True)
+            shown = shown[first]
+        axes[0].scatter(shown, altitudes[shown], marker='^', color='red',
+                        s=30, zorder=3, label=f'Hazards ({len(hazard_indices)})')
+        if len(hazard_indices) <= MAX_HAZARD_LABELS:
+            for idx, msg in zip(hazard_indices, hazard_msgs):
+                axes[0].annotate('⚠ ' + msg, (idx, altitudes[idx]), color='red', fontsize=8, rotation=15)
+    for ax in axes:
+        ax.legend(loc='upper right')
+    axes[-1].set_xlabel('Time Step')
+    fig.suptitle('Flight Monitoring System', fontsize=16)
+    fig.subplots_adjust(left=0.08, right=0.97, bottom=0.07, top=0.92, hspace=0.15)
+    fig.savefig(path, dpi=dpi, format=format)
+    return path
+
+
+def plot_flight(flight_data, hazard_indices, hazard_msgs, path=DEFAULT_PLOT_PATH, **options):
+    """
+    Plot altitude, speed, and g-force over time. Annotate detected hazards.
+    Options are passed to render_flight.
+    """
+    render_flight(flight_data, hazard_indices, hazard_msgs, path=path, **options)
+    print(f"Flight monitoring plot saved as '{path}'")
 
 
 if __name__ == "__main__":
     # Simulate a flight with 30 time steps
-    flight_data = []
+    flight_data = TelemetryBuffer(capacity=30)
     hazard_indices = []
     hazard_msgs = []
+    track = FlightPath()
     for t in range(30):
-        data = generate_flight_data()
+        data = generate_flight_data(track)
         flight_data.append(data)
         hazards = detect_hazards(data)
         if hazards:
             hazard_indices.append(t)
             hazard_msgs.append('; '.join(hazards))
-    plot_flight(flight_data, hazard_indices, hazard_msgs) 
\ No newline at end of file
+    plot_flight(flight_data, hazard_indices, hazard_msgs)